@@ -96,6 +96,86 @@ def test_gdal_fsspec_ls_error():
         fs.ls("gdalvsi://i/do/not/exist")
 
 
+def test_gdal_fsspec_ls_no_detail():
+
+    fs = fsspec.filesystem("gdalvsi")
+    assert "data/byte.tif" in fs.ls("data", detail=False)
+
+
+def test_gdal_fsspec_find(tmp_vsimem):
+
+    gdal.FileFromMemBuffer(tmp_vsimem / "a" / "b" / "c.txt", "foo")
+    gdal.FileFromMemBuffer(tmp_vsimem / "d.txt", "bar")
+
+    fs = fsspec.filesystem("gdalvsi")
+    assert fs.find(str(tmp_vsimem)) == [
+        str(tmp_vsimem / "a" / "b" / "c.txt"),
+        str(tmp_vsimem / "d.txt"),
+    ]
+    assert fs.find(str(tmp_vsimem), maxdepth=1) == [str(tmp_vsimem / "d.txt")]
+    assert str(tmp_vsimem / "a" / "b") in fs.find(str(tmp_vsimem), withdirs=True)
+    assert fs.find(str(tmp_vsimem / "d.txt")) == [str(tmp_vsimem / "d.txt")]
+
+
+def test_gdal_fsspec_cat_ranges(tmp_vsimem):
+
+    gdal.FileFromMemBuffer(tmp_vsimem / "a.bin", b"0123456789")
+    gdal.FileFromMemBuffer(tmp_vsimem / "b.bin", b"abcdefghij")
+
+    fs = fsspec.filesystem("gdalvsi")
+    a = str(tmp_vsimem / "a.bin")
+    b = str(tmp_vsimem / "b.bin")
+    assert fs.cat_file(a, 2, 5) == b"234"
+    assert fs.cat_file(a, -3) == b"789"
+    ret = fs.cat_ranges(
+        [a, b, a, b, a, str(tmp_vsimem / "i_do_not_exist")],
+        [0, 1, 8, None, 5, 0],
+        [2, 3, 20, -8, 6, 1],
+    )
+    assert ret[:5] == [b"01", b"bc", b"89", b"ab", b"5"]
+    assert isinstance(ret[5], FileNotFoundError)
+
+    with pytest.raises(FileNotFoundError):
+        fs.cat_ranges([str(tmp_vsimem / "i_do_not_exist")], 0, 1, on_error="raise")
+
+
+@pytest.mark.parametrize("cache_type", ["readahead", "blockcache", "none", "all"])
+def test_gdal_fsspec_open_read_cache_type(tmp_vsimem, cache_type):
+
+    data = bytes(range(256)) * 100
+    gdal.FileFromMemBuffer(tmp_vsimem / "a.bin", data)
+
+    fs = fsspec.filesystem("gdalvsi")
+    with fs.open(
+        str(tmp_vsimem / "a.bin"), block_size=1000, cache_type=cache_type
+    ) as f:
+        assert f.read(10) == data[0:10]
+        f.seek(5000)
+        assert f.read(3000) == data[5000:8000]
+        f.seek(-5, 2)
+        assert f.read() == data[-5:]
+
+
+def test_gdal_fsspec_listings_cache(tmp_vsimem):
+
+    gdal.FileFromMemBuffer(tmp_vsimem / "a.txt", "foo")
+
+    fs = fsspec.filesystem("gdalvsi", use_listings_cache=True)
+    fs.invalidate_cache()
+    assert fs.ls(str(tmp_vsimem), detail=False) == [str(tmp_vsimem / "a.txt")]
+    assert fs.info(str(tmp_vsimem / "a.txt"))["size"] == 3
+
+    with fs.open(str(tmp_vsimem / "b.txt"), "wb") as f:
+        f.write(b"bar")
+    assert fs.ls(str(tmp_vsimem), detail=False) == [
+        str(tmp_vsimem / "a.txt"),
+        str(tmp_vsimem / "b.txt"),
+    ]
+
+    fs.rm(str(tmp_vsimem / "a.txt"))
+    assert fs.ls(str(tmp_vsimem), detail=False) == [str(tmp_vsimem / "b.txt")]
+
+
 def test_gdal_fsspec_modified():
 
     fs = fsspec.filesystem("gdalvsi")
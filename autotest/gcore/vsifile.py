@@ -1701,6 +1701,73 @@ def test_vsifile_class_binary_line_iteration(tmp_path):
     assert lines_in == lines_out
 
 
+@pytest.mark.parametrize("read_ahead_size", (0, 5, 4096))
+def test_vsifile_class_read_ahead(tmp_path, read_ahead_size):
+
+    fname = str(tmp_path / "test.txt")
+
+    lines_out = random_lines()
+
+    with open(fname, "w", newline="\n") as f:
+        for line in lines_out:
+            f.write(line)
+            f.write("\n")
+    with open(fname, "rb") as f:
+        content = f.read()
+
+    with gdal.VSIFile(fname, "r", read_ahead_size=read_ahead_size) as f:
+        assert [line for line in f] == lines_out
+
+    with gdal.VSIFile(fname, "rb", read_ahead_size=read_ahead_size) as f:
+        assert f.read(3) == content[:3]
+        assert f.tell() == 3
+        assert f.read(2) == content[3:5]
+        assert f.seek(1, os.SEEK_CUR) == 6
+        assert f.read(10) == content[6:16]
+        assert f.seek(2) == 2
+        assert f.read(4) == content[2:6]
+        assert f.seek(-3, os.SEEK_END) == len(content) - 3
+        assert f.read() == content[-3:]
+
+
+def test_vsifile_class_readinto(tmp_path):
+
+    fname = str(tmp_path / "test.bin")
+    content = bytes(range(256)) * 10
+
+    with open(fname, "wb") as f:
+        f.write(content)
+
+    with gdal.VSIFile(fname, "rb") as f:
+        assert f.readable()
+        assert f.seekable()
+        assert not f.writable()
+
+        buf = bytearray(100)
+        assert f.readinto(buf) == 100
+        assert buf == content[:100]
+
+        view = memoryview(buf)[10:20]
+        assert f.readinto(view) == 10
+        assert buf[10:20] == content[100:110]
+
+        f.seek(len(content) - 5)
+        assert f.readinto(buf) == 5
+        assert buf[:5] == content[-5:]
+        assert f.readinto(buf) == 0
+
+    assert f.closed
+    with pytest.raises(ValueError, match="closed file"):
+        f.readinto(buf)
+
+    import io
+
+    with io.BufferedReader(gdal.VSIFile(fname, "rb"), buffer_size=64) as f:
+        assert f.read(1) == content[:1]
+        assert f.peek(1)[:1] == content[1:2]
+        assert f.read() == content[1:]
+
+
 def test_vsifile_class_zipped_csv_reader(tmp_path):
 
     test_csv = str(tmp_path / "input.csv")
@@ -26,6 +26,7 @@
 # Boston, MA 02111-1307, USA.
 ###############################################################################
 
+import json
 import math
 import os
 import struct
@@ -763,6 +764,132 @@ def test_ogr_basic_feature_iterator():
     assert count == 10
 
 
+def test_ogr_basic_layer_iter_batches():
+
+    ds = ogr.Open("data/poly.shp")
+    lyr = ds.GetLayer(0)
+
+    expected = []
+    for f in lyr:
+        expected.append(
+            (
+                f.GetFID(),
+                f.GetField("AREA"),
+                f.GetField("EAS_ID"),
+                f.GetField("PRFEDEA"),
+                f.GetGeometryRef().ExportToIsoWkb(),
+            )
+        )
+
+    batches = list(lyr.iter_batches(batch_size=3, include_fid=True))
+    assert [len(batch) for batch in batches] == [3, 3, 3, 1]
+    assert [x for batch in batches for x in batch] == expected
+
+    batches = list(
+        lyr.iter_batches(fields=["EAS_ID", 0], geometry_format="wkt", as_dict=True)
+    )
+    assert len(batches) == 1
+    assert batches[0][0] == {
+        "EAS_ID": 168,
+        "AREA": 215229.266,
+        "geometry": lyr.GetFeature(0).GetGeometryRef().ExportToIsoWkt(),
+    }
+
+    lyr.SetAttributeFilter("EAS_ID = 168")
+    assert list(lyr.iter_batches(fields=["EAS_ID"], geometry_format=None)) == [[(168,)]]
+    lyr.SetAttributeFilter(None)
+
+    with pytest.raises(KeyError):
+        next(lyr.iter_batches(fields=["i_do_not_exist"]))
+    with pytest.raises(ValueError):
+        next(lyr.iter_batches(geometry_format="invalid"))
+
+
+def test_ogr_basic_layer_iter_batches_field_types():
+
+    ds = ogr.GetDriverByName("MEM").CreateDataSource("")
+    lyr = ds.CreateLayer("test")
+    fld_defn = ogr.FieldDefn("bool", ogr.OFTInteger)
+    fld_defn.SetSubType(ogr.OFSTBoolean)
+    lyr.CreateField(fld_defn)
+    lyr.CreateField(ogr.FieldDefn("int64", ogr.OFTInteger64))
+    lyr.CreateField(ogr.FieldDefn("str", ogr.OFTString))
+    lyr.CreateField(ogr.FieldDefn("intlist", ogr.OFTIntegerList))
+    lyr.CreateField(ogr.FieldDefn("int64list", ogr.OFTInteger64List))
+    lyr.CreateField(ogr.FieldDefn("reallist", ogr.OFTRealList))
+    lyr.CreateField(ogr.FieldDefn("strlist", ogr.OFTStringList))
+    lyr.CreateField(ogr.FieldDefn("date", ogr.OFTDate))
+
+    f = ogr.Feature(lyr.GetLayerDefn())
+    f["bool"] = True
+    f["int64"] = 1234567890123
+    f["str"] = "\u00e9t\u00e9"
+    f["intlist"] = [1, 2]
+    f["int64list"] = [1234567890123]
+    f["reallist"] = [1.5, 2.5]
+    f["strlist"] = ["a", "b"]
+    f["date"] = "2024/01/02"
+    lyr.CreateFeature(f)
+    expected = tuple(f.GetField(i) for i in range(f.GetFieldCount()))
+
+    f = ogr.Feature(lyr.GetLayerDefn())
+    f.SetGeometry(ogr.CreateGeometryFromWkt("POINT (1 2)"))
+    lyr.CreateFeature(f)
+
+    assert list(lyr.iter_batches()) == [
+        [
+            expected + (None,),
+            (None,) * 8 + (ogr.CreateGeometryFromWkt("POINT (1 2)").ExportToIsoWkb(),),
+        ]
+    ]
+    assert isinstance(expected[0], bool)
+
+
+def test_ogr_basic_feature_field_access():
+
+    defn = ogr.FeatureDefn()
+    defn.AddFieldDefn(ogr.FieldDefn("foo", ogr.OFTString))
+    defn.AddFieldDefn(ogr.FieldDefn("FOO", ogr.OFTInteger))
+    fld_defn = ogr.FieldDefn("bar", ogr.OFTInteger)
+    fld_defn.SetSubType(ogr.OFSTBoolean)
+    defn.AddFieldDefn(fld_defn)
+    defn.AddFieldDefn(ogr.FieldDefn("baz", ogr.OFTReal))
+
+    f = ogr.Feature(defn)
+    f["foo"] = "x"
+    f["FOO"] = 1
+    f["bar"] = True
+    f.SetGeometry(ogr.CreateGeometryFromWkt("POINT (1 2)"))
+    f.SetFID(3)
+
+    # Exact match preferred over case insensitive one
+    assert f["foo"] == "x"
+    assert f["FOO"] == 1
+    assert f["Foo"] == "x"
+    assert f.GetField("bar") is True
+    assert f.baz is None
+    with pytest.raises(KeyError):
+        f["i_do_not_exist"]
+
+    assert f.keys() == ["foo", "FOO", "bar", "baz"]
+    assert f.items() == {"foo": "x", "FOO": 1, "bar": True, "baz": None}
+
+    expected = {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [1.0, 2.0]},
+        "properties": {"foo": "x", "FOO": 1, "bar": True, "baz": None},
+        "id": 3,
+    }
+    assert f.ExportToJson(as_object=True) == expected
+    assert json.loads(f.ExportToJson()) == expected
+
+    f.SetGeometry(None)
+    f.SetFID(ogr.NullFID)
+    del expected["id"]
+    expected["geometry"] = None
+    assert json.loads(f.ExportToJson()) == expected
+
+
 def test_ogr_basic_dataset_copy_layer_dst_srswkt():
 
     ds = ogr.GetDriverByName("MEM").CreateDataSource("")
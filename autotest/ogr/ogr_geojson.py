@@ -27,6 +27,7 @@
 # Boston, MA 02111-1307, USA.
 ###############################################################################
 
+import io
 import json
 import math
 import os
@@ -529,6 +530,56 @@ def test_ogr_geojson_15():
     assert out == expected_out
 
 
+###############################################################################
+# Test Layer.ExportToGeoJSONStream()
+
+
+def test_ogr_geojson_export_to_geojson_stream(tmp_vsimem):
+
+    ds = ogr.Open("data/poly.shp")
+    lyr = ds.GetLayer(0)
+
+    ref_filename = str(tmp_vsimem / "ref.geojson")
+    gdal.VectorTranslate(ref_filename, ds, preserveFID=True)
+    with gdal.VSIFile(ref_filename, "rb") as f:
+        ref = json.loads(f.read())
+
+    chunks = []
+    assert lyr.ExportToGeoJSONStream(chunks.append, batch_size=3) == 10
+    assert len(chunks) == 9
+    out = json.loads(b"".join(chunks))
+    assert out["type"] == "FeatureCollection"
+    assert out["name"] == "poly"
+    assert out["crs"] == ref["crs"]
+    assert out["features"] == ref["features"]
+
+    # Written directly into the file
+    out_filename = tmp_vsimem / "out.geojson"
+    assert lyr.ExportToGeoJSONStream(out_filename, batch_size=3) == 10
+    with gdal.VSIFile(str(out_filename), "rb") as f:
+        assert json.loads(f.read())["features"] == ref["features"]
+
+    out_filename = tmp_vsimem / "out_id_field.geojson"
+    assert lyr.ExportToGeoJSONStream(out_filename, options={"ID_FIELD": "EAS_ID"}) == 10
+    with ogr.Open(str(out_filename)) as out_ds:
+        assert out_ds.GetLayer(0).GetFeatureCount() == 10
+
+    lyr.SetAttributeFilter("EAS_ID = 170")
+    f = io.BytesIO()
+    assert lyr.ExportToGeoJSONStream(f, ndjson=True) == 1
+    lines = f.getvalue().decode("UTF-8").splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["properties"]["EAS_ID"] == 170
+
+    lyr.SetAttributeFilter("0")
+    chunks = []
+    assert lyr.ExportToGeoJSONStream(chunks.append) == 0
+    assert json.loads(b"".join(chunks))["features"] == []
+
+    with pytest.raises(ValueError):
+        lyr.ExportToGeoJSONStream(chunks.append, options=["WRITE_BBOX=YES"])
+
+
 ###############################################################################
 # Test reading files with no extension (#4314)
 
@@ -10212,6 +10212,51 @@ def test_ogr_gpkg_write_arrow_fallback_types(tmp_vsimem):
     assert f.GetGeometryRef().ExportToIsoWkt() == "POINT (1 2)"
 
 
+###############################################################################
+# Test WriteArrowStream()
+
+
+@gdaltest.enable_exceptions()
+@pytest.mark.parametrize("prefetch", [0, 2])
+def test_ogr_gpkg_write_arrow_stream(tmp_vsimem, prefetch):
+    pyarrow = pytest.importorskip("pyarrow")
+
+    table = pyarrow.table(
+        {
+            "id": pyarrow.array(list(range(10)), type=pyarrow.int32()),
+            "name": pyarrow.array(["feat%d" % i for i in range(10)]),
+        }
+    )
+
+    filename = tmp_vsimem / "test_ogr_gpkg_write_arrow_stream.gpkg"
+    ds = gdal.GetDriverByName("GPKG").Create(filename, 0, 0, 0, gdal.GDT_Unknown)
+    lyr = ds.CreateLayer("test", geom_type=ogr.wkbNone)
+
+    progress = []
+    assert (
+        lyr.WriteArrowStream(
+            table.to_batches(max_chunksize=3),
+            batches_per_transaction=2,
+            prefetch=prefetch,
+            progress=lambda rows, rows_per_sec: progress.append(rows),
+        )
+        == ogr.OGRERR_NONE
+    )
+    assert progress == [3, 6, 9, 10]
+
+    assert lyr.GetFeatureCount() == 10
+    assert [f["id"] for f in lyr] == list(range(10))
+    lyr.ResetReading()
+    assert [f["name"] for f in lyr] == ["feat%d" % i for i in range(10)]
+
+    # Fields already exist: subsequent writes must not try to recreate them
+    assert (
+        lyr.WriteArrowStream(table, prefetch=prefetch, createFieldsFromSchema=False)
+        == ogr.OGRERR_NONE
+    )
+    assert lyr.GetFeatureCount() == 20
+
+
 ###############################################################################
 # Test a SQL request with the geometry in the first row being null
 
@@ -978,6 +978,89 @@ def test_ogr_mem_arrow_stream_numpy():
     assert len(batches) == 0
 
 
+###############################################################################
+# Test GetArrowStreamAsNumPy() accumulate and columns arguments
+
+
+def test_ogr_mem_arrow_stream_numpy_accumulate_and_columns():
+    gdaltest.importorskip_gdal_array()
+    numpy = pytest.importorskip("numpy")
+
+    ds = ogr.GetDriverByName("MEM").CreateDataSource("")
+    lyr = ds.CreateLayer("foo")
+    lyr.CreateField(ogr.FieldDefn("str", ogr.OFTString))
+    lyr.CreateField(ogr.FieldDefn("int32", ogr.OFTInteger))
+    lyr.CreateField(ogr.FieldDefn("float64", ogr.OFTReal))
+    for i in range(10):
+        f = ogr.Feature(lyr.GetLayerDefn())
+        f["str"] = "x" * (i + 1)
+        f["int32"] = i
+        if i not in (1, 2):
+            f["float64"] = i * 0.5
+        f.SetGeometry(ogr.CreateGeometryFromWkt("POINT (%d 0)" % i))
+        lyr.CreateFeature(f)
+
+    # Fixed-width columns are zero-copy views of the Arrow buffers
+    stream = lyr.GetArrowStreamAsNumPy(options=["MAX_FEATURES_IN_BATCH=3"])
+    batches = [batch for batch in stream]
+    assert len(batches) == 4
+    assert not batches[0]["int32"].flags.owndata
+
+    ret = lyr.GetArrowStreamAsNumPy(
+        options=["MAX_FEATURES_IN_BATCH=3"], accumulate=True
+    )
+    assert ret.keys() == {"OGC_FID", "str", "int32", "float64", "wkb_geometry"}
+    assert ret["OGC_FID"].tolist() == list(range(10))
+    assert ret["int32"].dtype == numpy.int32
+    assert ret["int32"].tolist() == list(range(10))
+    assert ret["str"].tolist() == [b"x" * (i + 1) for i in range(10)]
+    assert ret["float64"].mask.tolist() == [i in (1, 2) for i in range(10)]
+    assert ret["float64"][9] == 4.5
+    assert len(ret["wkb_geometry"]) == 10
+
+    stream = lyr.GetArrowStreamAsNumPy(columns=["int32"])
+    batches = [batch for batch in stream]
+    assert batches[0].keys() == {"int32"}
+
+    # Ignored fields have been reset
+    lyr.ResetReading()
+    f = lyr.GetNextFeature()
+    assert f["str"] == "x"
+    assert f.GetGeometryRef() is not None
+
+    ret = lyr.GetArrowStreamAsNumPy(
+        columns=["OGC_FID", "wkb_geometry"], accumulate=True
+    )
+    assert ret.keys() == {"OGC_FID", "wkb_geometry"}
+
+    with pytest.raises(ValueError, match="Unknown column"):
+        lyr.GetArrowStreamAsNumPy(columns=["unknown"])
+
+    lyr.SetAttributeFilter("0")
+    assert lyr.GetArrowStreamAsNumPy(accumulate=True) == {}
+    lyr.SetAttributeFilter(None)
+
+    # Ignored fields set by the caller are restored
+    lyr.SetIgnoredFields(["str"])
+    ret = lyr.GetArrowStreamAsNumPy(columns=["int32"], accumulate=True)
+    assert ret.keys() == {"int32"}
+    defn = lyr.GetLayerDefn()
+    assert defn.GetFieldDefn(defn.GetFieldIndex("str")).IsIgnored()
+    assert not defn.GetFieldDefn(defn.GetFieldIndex("float64")).IsIgnored()
+    assert not defn.GetGeomFieldDefn(0).IsIgnored()
+
+    # Requested columns are read even if they were ignored
+    stream = lyr.GetArrowStreamAsNumPy(columns=["str"])
+    assert stream.GetNextRecordBatch()["str"].tolist()[0] == b"x"
+    assert defn.GetFieldDefn(defn.GetFieldIndex("int32")).IsIgnored()
+    # ... and the previous state is restored when the stream is garbage
+    # collected without having been exhausted
+    del stream
+    assert defn.GetFieldDefn(defn.GetFieldIndex("str")).IsIgnored()
+    assert not defn.GetFieldDefn(defn.GetFieldIndex("int32")).IsIgnored()
+    lyr.SetIgnoredFields([])
+
+
 ###############################################################################
 # Test DATETIME_AS_STRING=YES GetArrowStream() option
 
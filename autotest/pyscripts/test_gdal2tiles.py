@@ -16,6 +16,7 @@ import glob
 import os
 import os.path
 import shutil
+import sqlite3
 import struct
 import sys
 
@@ -833,3 +834,366 @@ def test_gdal2tiles_py_jpeg_1band_input(
             got_stats_14,
             got_stats_13,
         )
+
+
+def _get_tiles(out_dir):
+    return sorted(
+        os.path.relpath(x, out_dir) for x in glob.glob(f"{out_dir}/*/*/*.png")
+    )
+
+
+def _get_checksums(ds):
+    return [ds.GetRasterBand(i + 1).Checksum() for i in range(ds.RasterCount)]
+
+
+def _verify_same_tiles(out_dir_ref, out_dir, compare_checksums=True):
+    """Check that out_dir has the same tiles as out_dir_ref, with the same
+    checksums if compare_checksums, and return the list of tiles"""
+
+    ref_tiles = _get_tiles(out_dir_ref)
+    assert _get_tiles(out_dir) == ref_tiles
+
+    if compare_checksums:
+        for tile in ref_tiles:
+            ds_ref = gdal.Open(os.path.join(out_dir_ref, tile))
+            ds = gdal.Open(os.path.join(out_dir, tile))
+            assert _get_checksums(ds) == _get_checksums(ds_ref), tile
+
+    return ref_tiles
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.parametrize("overview_cache", ["100", "0.3"])
+@pytest.mark.parametrize("processes", [1, 2])
+def test_gdal2tiles_py_overview_cache(script_path, tmp_path, overview_cache, processes):
+
+    out_dir_ref = str(tmp_path / "out_ref")
+    out_dir = str(tmp_path / "out_overview_cache")
+
+    base_args = f"-q --processes={processes} -z 0-3 "
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_dir_ref}",
+    )
+
+    # A 0.3 MB cache can only hold one 256x256x4 tile, so most of them
+    # are spilled on disk
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + f"--overview-cache={overview_cache} "
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_dir}",
+    )
+
+    _verify_same_tiles(out_dir_ref, out_dir)
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.parametrize("overview_cache", [None, "100"])
+@pytest.mark.parametrize("processes", [1, 2])
+def test_gdal2tiles_py_depth_first(script_path, tmp_path, overview_cache, processes):
+
+    out_dir_ref = str(tmp_path / "out_ref")
+    out_dir = str(tmp_path / "out_depth_first")
+
+    base_args = f"-q --processes={processes} -z 0-3 "
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_dir_ref}",
+    )
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + "--depth-first "
+        + (f"--overview-cache={overview_cache} " if overview_cache else "")
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_dir}",
+    )
+
+    _verify_same_tiles(out_dir_ref, out_dir)
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.parametrize("resampling", ["near", "average"])
+@pytest.mark.parametrize("processes", [1, 2])
+def test_gdal2tiles_py_metatile(script_path, tmp_path, resampling, processes):
+
+    out_dir_ref = str(tmp_path / "out_ref")
+    out_dir = str(tmp_path / "out_metatile")
+
+    base_args = f"-q --processes={processes} -z 0-3 -r {resampling} "
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_dir_ref}",
+    )
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + "--metatile=3 "
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_dir}",
+    )
+
+    ref_tiles = _verify_same_tiles(out_dir_ref, out_dir, compare_checksums=False)
+
+    # Source windows may be rounded slightly differently when read by
+    # metatile, hence the tolerance
+    for tile in ref_tiles:
+        ds_ref = gdal.Open(os.path.join(out_dir_ref, tile))
+        ds = gdal.Open(os.path.join(out_dir, tile))
+        for i in range(ds.RasterCount):
+            assert ds.GetRasterBand(i + 1).ComputeStatistics(
+                approx_ok=0
+            ) == pytest.approx(
+                ds_ref.GetRasterBand(i + 1).ComputeStatistics(approx_ok=0),
+                rel=0.05,
+                abs=1,
+            ), (
+                tile,
+                i,
+            )
+
+
+def test_gdal2tiles_py_metatile_raster_profile(script_path, tmp_path):
+
+    _, err = test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        "-q -p raster --metatile=2 "
+        + test_py_scripts.get_data_path("gcore")
+        + f"byte.tif {tmp_path}/out",
+        return_stderr=True,
+    )
+    assert "--metatile is not supported with the raster profile" in err
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("MBTiles")
+@pytest.mark.parametrize("processes", [1, 2])
+def test_gdal2tiles_py_mbtiles(script_path, tmp_path, processes):
+
+    out_dir_ref = str(tmp_path / "out_ref")
+    out_filename = str(tmp_path / "out.mbtiles")
+
+    base_args = f"-q --processes={processes} -z 0-3 "
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_dir_ref}",
+    )
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        base_args
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_filename}",
+    )
+
+    ref_tiles = _get_tiles(out_dir_ref)
+
+    conn = sqlite3.connect(out_filename)
+    try:
+        metadata = dict(conn.execute("SELECT name, value FROM metadata"))
+        assert metadata["format"] == "png"
+        assert metadata["minzoom"] == "0"
+        assert metadata["maxzoom"] == "3"
+        got_tiles = sorted(
+            "%d/%d/%d.png" % (tz, tx, ty)
+            for tz, tx, ty in conn.execute(
+                "SELECT zoom_level, tile_column, tile_row FROM tiles"
+            )
+        )
+        assert got_tiles == sorted(x.replace(os.sep, "/") for x in ref_tiles)
+
+        tile_data = conn.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level = 3 AND "
+            "tile_column = 4 AND tile_row = 4"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    gdal.FileFromMemBuffer("/vsimem/tile.png", tile_data)
+    try:
+        ds = gdal.Open("/vsimem/tile.png")
+        ds_ref = gdal.Open(os.path.join(out_dir_ref, "3", "4", "4.png"))
+        assert _get_checksums(ds) == _get_checksums(ds_ref)
+        ds = None
+    finally:
+        gdal.Unlink("/vsimem/tile.png")
+
+    assert gdal.Open(out_filename) is not None
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("GPKG")
+def test_gdal2tiles_py_gpkg(script_path, tmp_path):
+
+    out_filename = str(tmp_path / "out.gpkg")
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        "-q -p geodetic -z 0-3 "
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_filename}",
+    )
+
+    ds = gdal.Open(out_filename)
+    assert ds is not None
+    assert ds.GetSpatialRef().GetAuthorityCode(None) == "4326"
+    assert ds.RasterCount == 4
+    assert ds.GetRasterBand(1).GetOverviewCount() > 0
+    assert ds.GetRasterBand(1).Checksum() != 0
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("MBTiles")
+def test_gdal2tiles_py_mbtiles_resume(script_path, tmp_path):
+
+    out_filename = str(tmp_path / "out.mbtiles")
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        "-q -z 0-3 "
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_filename}",
+    )
+
+    conn = sqlite3.connect(out_filename)
+    try:
+        expected_count = conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+        # Simulate an interrupted run
+        conn.execute("DELETE FROM tiles WHERE zoom_level IN (0, 3) AND tile_row = 4")
+        conn.commit()
+    finally:
+        conn.close()
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        "-q -z 0-3 --resume "
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {out_filename}",
+    )
+
+    conn = sqlite3.connect(out_filename)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] == (
+            expected_count
+        )
+    finally:
+        conn.close()
+
+
+def test_gdal2tiles_py_mbtiles_unsupported_profile(script_path, tmp_path):
+
+    _, err = test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        "-q -p geodetic "
+        + test_py_scripts.get_data_path("gcore")
+        + f"byte.tif {tmp_path}/out.mbtiles",
+        return_stderr=True,
+    )
+    assert "MBTiles output is only supported with the mercator profile" in err
+
+
+@pytest.mark.parametrize("overview_cache", ["0", "-1"])
+def test_gdal2tiles_py_mbtiles_invalid_overview_cache(
+    script_path, tmp_path, overview_cache
+):
+
+    _, err = test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        f"-q --overview-cache={overview_cache} "
+        + test_py_scripts.get_data_path("gdrivers")
+        + f"small_world.tif {tmp_path}/out.mbtiles",
+        return_stderr=True,
+    )
+    assert "overview_cache should be strictly positive" in err
+
+
+def _create_constant_world_raster(filename):
+
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    ds = gdal.GetDriverByName("GTiff").Create(filename, 512, 512, 3)
+    ds.SetSpatialRef(srs)
+    extent = 20037508.342789244
+    ds.SetGeoTransform([-extent, 2 * extent / 512, 0, extent, 0, -2 * extent / 512])
+    for i in range(3):
+        ds.GetRasterBand(i + 1).Fill(64 * (i + 1))
+    ds = None
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.parametrize("processes", [1, 2])
+def test_gdal2tiles_py_dedup(script_path, tmp_path, processes):
+
+    src_filename = str(tmp_path / "src.tif")
+    _create_constant_world_raster(src_filename)
+    out_dir_ref = str(tmp_path / "out_ref")
+    out_dir = str(tmp_path / "out_dedup")
+
+    base_args = f"-q --processes={processes} -z 0-2 {src_filename} "
+    test_py_scripts.run_py_script_as_external_script(
+        script_path, "gdal2tiles", base_args + out_dir_ref
+    )
+    test_py_scripts.run_py_script_as_external_script(
+        script_path, "gdal2tiles", "--dedup " + base_args + out_dir
+    )
+
+    ref_tiles = _verify_same_tiles(out_dir_ref, out_dir)
+    assert len(ref_tiles) == 1 + 4 + 16
+
+    if sys.platform != "win32":
+        # Zoom level 2 tiles are identical, and thus hard linked
+        nb_linked_tiles = len(
+            [x for x in glob.glob(f"{out_dir}/2/*/*.png") if os.stat(x).st_nlink > 1]
+        )
+        assert nb_linked_tiles >= 2
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("MBTiles")
+def test_gdal2tiles_py_dedup_mbtiles(script_path, tmp_path):
+
+    src_filename = str(tmp_path / "src.tif")
+    _create_constant_world_raster(src_filename)
+    out_filename = str(tmp_path / "out.mbtiles")
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        f"-q --dedup -z 0-2 {src_filename} {out_filename}",
+    )
+
+    conn = sqlite3.connect(out_filename)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] == 1 + 4 + 16
+        assert conn.execute("SELECT COUNT(*) FROM images").fetchone()[0] <= 3
+    finally:
+        conn.close()
+
+    ds = gdal.Open(out_filename)
+    assert ds.GetRasterBand(1).Checksum() != 0
@@ -27,7 +27,7 @@ from itertools import product
 
 import numpy as np
 
-from osgeo import gdal
+from osgeo import gdal, ogr
 from osgeo.gdal_array import flip_code
 from osgeo_utils import gdal2xyz
 from osgeo_utils.auxiliary.raster_creation import create_flat_raster
@@ -198,3 +198,116 @@ def test_gdal2xyz_py_vsistdout(script_path, tmp_path):
     with gdal.Open(out_filename) as ds:
         assert ds.GetGeoTransform() == (440720.0, 60.0, 0.0, 3751320.0, 0.0, -60.0)
         assert ds.GetRasterBand(1).Checksum() == 4672
+
+
+###############################################################################
+# Test -skip and -srcwin with sizes that are not multiple of the skip factor
+
+
+@pytest.mark.parametrize("skip", [1, 3, (2, 5)])
+def test_gdal2xyz_py_skip_srcwin(tmp_vsimem, skip):
+
+    ds = gdal.GetDriverByName("MEM").Create("", 23, 37, 2, gdal.GDT_Float32)
+    ds.SetGeoTransform([10.5, 0.25, 0, 40, 0, -0.25])
+    values = np.arange(2 * 37 * 23, dtype=np.float32).reshape(2, 37, 23)
+    ds.WriteRaster(0, 0, 23, 37, values.tobytes())
+
+    srcwin = (3, 4, 17, 31)
+    x_skip, y_skip = skip if isinstance(skip, tuple) else (skip, skip)
+    out_xyz = str(tmp_vsimem / "out.xyz")
+    geo_x, geo_y, data, _ = gdal2xyz.gdal2xyz(
+        ds,
+        out_xyz,
+        srcwin=srcwin,
+        skip=skip,
+        band_nums=[1, 2],
+        return_np_arrays=True,
+        progress_callback=None,
+    )
+
+    x = np.arange(3, 3 + 17, x_skip)
+    y = np.arange(4, 4 + 31, y_skip)
+    np.testing.assert_array_equal(
+        geo_x, np.tile(10.5 + (x + 0.5) * 0.25, len(y)).astype(np.float64)
+    )
+    np.testing.assert_array_equal(
+        geo_y, np.repeat(40 + (y + 0.5) * -0.25, len(x)).astype(np.float64)
+    )
+    np.testing.assert_array_equal(data, values[:, y[:, np.newaxis], x].reshape(2, -1))
+
+    with gdal.VSIFile(out_xyz, "rb") as f:
+        lines = f.read().decode("UTF-8").splitlines()
+    assert len(lines) == len(x) * len(y)
+    assert lines[1] == "%.10g %.10g %g %g" % (
+        geo_x[1],
+        geo_y[1],
+        data[0][1],
+        data[1][1],
+    )
+
+
+###############################################################################
+# Test the NPY output format
+
+
+def test_gdal2xyz_py_npy(tmp_path):
+
+    src_filename = test_py_scripts.get_data_path("gcore") + "rgbsmall.tif"
+    geo_x, geo_y, data, _ = gdal2xyz.gdal2xyz(
+        src_filename,
+        None,
+        band_nums=[1, 3],
+        skip_nodata=True,
+        src_nodata=0,
+        return_np_arrays=True,
+        progress_callback=None,
+    )
+
+    out_npy = str(tmp_path / "out.npy")
+    gdal2xyz.gdal2xyz(
+        src_filename,
+        out_npy,
+        band_nums=[1, 3],
+        skip_nodata=True,
+        src_nodata=0,
+        progress_callback=None,
+    )
+
+    points = np.load(out_npy, mmap_mode="r")
+    assert points.dtype.names == ("x", "y", "band_1", "band_3")
+    assert len(points) == len(geo_x)
+    np.testing.assert_array_equal(points["x"], geo_x)
+    np.testing.assert_array_equal(points["y"], geo_y)
+    np.testing.assert_array_equal(points["band_1"], data[0])
+    np.testing.assert_array_equal(points["band_3"], data[1])
+
+
+###############################################################################
+# Test the Parquet output format
+
+
+@pytest.mark.require_driver("Parquet")
+def test_gdal2xyz_py_parquet(script_path, tmp_path):
+    pytest.importorskip("pyarrow")
+
+    src_filename = test_py_scripts.get_data_path("gcore") + "byte.tif"
+    out_parquet = str(tmp_path / "out.parquet")
+    test_py_scripts.run_py_script(
+        script_path, "gdal2xyz", f"{src_filename} {out_parquet}"
+    )
+
+    geo_x, geo_y, data, _ = gdal2xyz.gdal2xyz(
+        src_filename, None, return_np_arrays=True, progress_callback=None
+    )
+
+    with ogr.Open(out_parquet) as ds:
+        lyr = ds.GetLayer(0)
+        assert lyr.GetFeatureCount() == 400
+        assert [
+            lyr.GetLayerDefn().GetFieldDefn(i).GetName()
+            for i in range(lyr.GetLayerDefn().GetFieldCount())
+        ] == ["x", "y", "band_1"]
+        f = lyr.GetNextFeature()
+        assert f["x"] == geo_x[0]
+        assert f["y"] == geo_y[0]
+        assert f["band_1"] == data[0][0]
@@ -844,3 +844,309 @@ def test_gdal_calc_py_hidenodata(tmp_vsimem):
     out_arr = out_ds.GetRasterBand(1).ReadAsMaskedArray()
     assert not np.any(out_arr.mask)
     np.testing.assert_array_equal(out_arr, data + 1)
+
+
+###############################################################################
+# test evaluation of blocks by several threads
+
+
+@pytest.mark.parametrize("num_threads", [1, 4, "ALL_CPUS"])
+def test_gdal_calc_py_threads(tmp_vsimem, stefan_full_rgba, num_threads):
+
+    input1 = tmp_vsimem / "in1.tif"
+    gdal.Translate(
+        input1,
+        stefan_full_rgba,
+        options="-co TILED=YES -co BLOCKXSIZE=16 -co BLOCKYSIZE=16 -a_nodata 0",
+    )
+    input2 = gdal.Translate("", stefan_full_rgba, format="MEM", bandList=[2])
+
+    ds_ref = gdal_calc.Calc(
+        calc=["A*2+B", "maximum(C[0], C[1])"],
+        A=input1,
+        A_band=1,
+        B=input2,
+        C=[input1, stefan_full_rgba],
+        outfile=tmp_vsimem / "ref.tif",
+        type="Float32",
+        quiet=True,
+    )
+
+    ds = gdal_calc.Calc(
+        calc=["A*2+B", "maximum(C[0], C[1])"],
+        A=input1,
+        A_band=1,
+        B=input2,
+        C=[input1, stefan_full_rgba],
+        outfile=tmp_vsimem / "out.tif",
+        type="Float32",
+        num_threads=num_threads,
+        quiet=True,
+    )
+
+    np.testing.assert_array_equal(ds.ReadAsArray(), ds_ref.ReadAsArray())
+
+
+def test_gdal_calc_py_threads_invalid(tmp_vsimem, stefan_full_rgba):
+
+    with pytest.raises(Exception, match="num_threads"):
+        gdal_calc.Calc(
+            calc="A",
+            A=stefan_full_rgba,
+            outfile=tmp_vsimem / "out.tif",
+            num_threads=-1,
+            quiet=True,
+        )
+
+
+def test_gdal_calc_py_threads_command_line(script_path, tmp_path, stefan_full_rgba):
+
+    out = tmp_path / "out.tif"
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal_calc",
+        f"-A {stefan_full_rgba} --threads=2 --calc=A --outfile {out}",
+    )
+
+    check_file(out, input_checksum[0])
+
+
+###############################################################################
+# test the evaluation engines
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "(A-B)/(A+B)*C",
+        "A*(A>100)",
+        "log10(A+1)-B",
+        "where(A>B, A-B, 0)",
+        "-A+1/2",
+        "A**2+B",
+        "maximum(A, B)*2",
+        "squeeze(A+B)",
+        "A.astype(float)+B",
+    ],
+)
+def test_gdal_calc_py_calc_expression(expression):
+
+    global_namespace = {
+        key: getattr(np, key) for key in dir(np) if not key.startswith("__")
+    }
+    calc_expression = gdal_calc.CalcExpression(expression, global_namespace)
+
+    rng = np.random.default_rng(0)
+    results = []
+    for shape in [(5, 7), (5, 7), (3, 7), (5, 7)]:
+        local_namespace = {
+            "A": rng.integers(0, 200, shape).astype(np.uint8),
+            "B": rng.integers(0, 200, shape).astype(np.uint8),
+            "C": rng.random(shape).astype(np.float32),
+        }
+        with np.errstate(all="ignore"):
+            expected = eval(expression, global_namespace, dict(local_namespace))
+            got = calc_expression.evaluate(dict(local_namespace))
+        assert got.dtype == expected.dtype
+        np.testing.assert_array_equal(got, expected)
+        results.append((got, expected))
+
+    # results must not be overwritten by the evaluation of next blocks
+    for got, expected in results:
+        np.testing.assert_array_equal(got, expected)
+
+
+def test_gdal_calc_py_engine_numexpr(tmp_vsimem, stefan_full_rgba):
+
+    pytest.importorskip("numexpr")
+
+    ds_ref = gdal_calc.Calc(
+        calc="(A*1.0-B)/(A+B+1.0)",
+        A=stefan_full_rgba,
+        B=stefan_full_rgba,
+        B_band=2,
+        outfile=tmp_vsimem / "ref.tif",
+        type="Float32",
+        quiet=True,
+    )
+    ds = gdal_calc.Calc(
+        calc="(A*1.0-B)/(A+B+1.0)",
+        A=stefan_full_rgba,
+        B=stefan_full_rgba,
+        B_band=2,
+        outfile=tmp_vsimem / "out.tif",
+        type="Float32",
+        engine="numexpr",
+        quiet=True,
+    )
+    np.testing.assert_allclose(ds.ReadAsArray(), ds_ref.ReadAsArray(), rtol=1e-6)
+
+
+def test_gdal_calc_py_engine_invalid(tmp_vsimem, stefan_full_rgba):
+
+    with pytest.raises(Exception, match="Unknown engine"):
+        gdal_calc.Calc(
+            calc="A",
+            A=stefan_full_rgba,
+            outfile=tmp_vsimem / "out.tif",
+            engine="invalid",
+            quiet=True,
+        )
+
+
+###############################################################################
+# test the chunk size planner
+
+
+@pytest.mark.parametrize(
+    "raster_size,block_sizes,max_chunk_memory,expected",
+    [
+        # striped input and tiled output: whole rows of output tiles
+        ((1000, 800), [(1000, 1), (256, 256)], 1000 * 256 * 4, (1000, 256)),
+        # tiled inputs, extended horizontally first
+        ((1000, 800), [(256, 256)], 512 * 256 * 4, (512, 256)),
+        ((1000, 800), [(256, 256)], 1000 * 512 * 4, (1000, 512)),
+        # whole raster
+        ((1000, 800), [(256, 256)], 1 << 30, (1000, 800)),
+        # multiple of all the blocks when it fits in the budget
+        ((1000, 800), [(128, 128), (256, 64)], 256 * 128 * 4, (256, 128)),
+        # striped output and tiled input: the multiple of all the blocks does
+        # not fit, use whole rows of output blocks
+        ((100000, 1000), [(100000, 1), (256, 256)], 64 << 20, (100000, 167)),
+        ((100000, 1000), [(100000, 1), (256, 1000), (40000, 1)], 1 << 20, (100000, 2)),
+        # a single output block does not fit either: parts of rows
+        ((100000, 1000), [(100000, 1000)], 1 << 18, (65536, 1)),
+    ],
+)
+def test_gdal_calc_py_plan_chunk_size(
+    raster_size, block_sizes, max_chunk_memory, expected
+):
+
+    chunk_x, chunk_y = gdal_calc.plan_chunk_size(
+        raster_size, block_sizes, 4, max_chunk_memory
+    )
+    assert (chunk_x, chunk_y) == expected
+    assert chunk_x * chunk_y * 4 <= max_chunk_memory
+
+
+@pytest.mark.parametrize("max_chunk_memory", [0.001, 1, None])
+def test_gdal_calc_py_max_chunk_memory(tmp_vsimem, stefan_full_rgba, max_chunk_memory):
+
+    input1 = tmp_vsimem / "striped.tif"
+    gdal.Translate(input1, stefan_full_rgba, options="-co BLOCKYSIZE=1")
+
+    ds = gdal_calc.Calc(
+        calc="A+B*C",
+        A=input1,
+        A_band=1,
+        B=input1,
+        B_band=2,
+        C=stefan_full_rgba,
+        C_band=3,
+        outfile=tmp_vsimem / "out.tif",
+        type="Float32",
+        max_chunk_memory=max_chunk_memory,
+        quiet=True,
+    )
+
+    src_ds = gdal.Open(stefan_full_rgba)
+    a, b, c = [
+        src_ds.GetRasterBand(i + 1).ReadAsArray().astype(np.uint8) for i in range(3)
+    ]
+    np.testing.assert_array_equal(ds.ReadAsArray(), (a + b * c).astype(np.float32))
+
+
+def test_gdal_calc_py_allbands_multiband_read(tmp_vsimem, stefan_full_rgba):
+
+    ds = gdal_calc.Calc(
+        calc="A*2-B",
+        A=stefan_full_rgba,
+        B=stefan_full_rgba,
+        B_band=4,
+        allBands="A",
+        outfile=tmp_vsimem / "out.tif",
+        type="Int16",
+        max_chunk_memory=0.01,
+        quiet=True,
+    )
+
+    src = gdal.Open(stefan_full_rgba).ReadAsArray()
+    assert ds.RasterCount == 4
+    np.testing.assert_array_equal(
+        ds.ReadAsArray(), (src * 2 - src[3]).astype(np.uint8).astype(np.int16)
+    )
+
+
+@pytest.mark.parametrize("allbands", [False, True])
+def test_gdal_calc_py_lazy(tmp_path, stefan_full_rgba, allbands):
+
+    kwargs = dict(
+        calc="A*2-B",
+        A=stefan_full_rgba,
+        B=stefan_full_rgba,
+        B_band=4,
+        type="Int16",
+        NoDataValue=-1,
+        quiet=True,
+    )
+    if allbands:
+        kwargs["allBands"] = "A"
+    else:
+        kwargs["A_band"] = 2
+
+    expected_ds = gdal_calc.Calc(outfile=tmp_path / "out.tif", **kwargs)
+    ds = gdal_calc.Calc(outfile=tmp_path / "out.vrt", lazy=True, **kwargs)
+    assert ds.GetDriver().ShortName == "VRT"
+    assert ds.RasterCount == expected_ds.RasterCount
+    assert ds.GetRasterBand(1).GetNoDataValue() == -1
+    assert ds.GetGeoTransform() == expected_ds.GetGeoTransform()
+    ds = None
+
+    with gdal.config_option("GDAL_VRT_ENABLE_PYTHON", "YES"):
+        ds = gdal.Open(tmp_path / "out.vrt")
+        np.testing.assert_array_equal(ds.ReadAsArray(), expected_ds.ReadAsArray())
+        np.testing.assert_array_equal(
+            ds.ReadAsArray(10, 20, 30, 40), expected_ds.ReadAsArray(10, 20, 30, 40)
+        )
+
+
+def test_gdal_calc_py_lazy_list_alpha(tmp_path, stefan_full_rgba):
+
+    kwargs = dict(
+        calc="sum(A,axis=0)",
+        A=[stefan_full_rgba, stefan_full_rgba],
+        hideNoData=True,
+        quiet=True,
+    )
+
+    expected_ds = gdal_calc.Calc(outfile=tmp_path / "out.tif", **kwargs)
+    gdal_calc.Calc(outfile=tmp_path / "out.vrt", lazy=True, **kwargs)
+
+    with gdal.config_option("GDAL_VRT_ENABLE_PYTHON", "YES"):
+        ds = gdal.Open(tmp_path / "out.vrt")
+        np.testing.assert_array_equal(ds.ReadAsArray(), expected_ds.ReadAsArray())
+
+
+def test_gdal_calc_py_lazy_errors(tmp_vsimem, stefan_full_rgba):
+
+    with pytest.raises(Exception, match="VRT output format"):
+        gdal_calc.Calc(
+            calc="A", A=stefan_full_rgba, outfile=tmp_vsimem / "out.tif", lazy=True
+        )
+
+    with pytest.raises(Exception, match="user_namespace"):
+        gdal_calc.Calc(
+            calc="A",
+            A=stefan_full_rgba,
+            outfile=tmp_vsimem / "out.vrt",
+            user_namespace={"x": 1},
+            lazy=True,
+        )
+
+    with pytest.raises(Exception, match="reopened"):
+        gdal_calc.Calc(
+            calc="A",
+            A=gdal.Translate("", stefan_full_rgba, format="MEM"),
+            outfile=tmp_vsimem / "out.vrt",
+            lazy=True,
+        )
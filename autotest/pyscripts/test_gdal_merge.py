@@ -260,3 +260,68 @@ def test_gdal_merge_5(script_path, tmp_path):
         assert ds.GetRasterBand(2).Checksum() == cs, "Wrong checksum"
         assert ds.GetRasterBand(3).Checksum() == 0, "Wrong checksum"
         assert ds.GetRasterBand(4).Checksum() == cs, "Wrong checksum"
+
+
+###############################################################################
+# Test -threads option
+
+
+def test_gdal_merge_threads(script_path, tmp_path, sample_tifs):
+
+    output_tif = str(tmp_path / "test_gdal_merge_threads.tif")
+
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal_merge",
+        f"-q -threads 2 -o {output_tif} {' '.join(sample_tifs)}",
+    )
+
+    with gdal.Open(output_tif) as ds:
+        assert ds.GetRasterBand(1).Checksum() == 3508, "Wrong checksum"
+
+
+###############################################################################
+# Test compositing with nodata over several chunks of the output file
+
+
+@pytest.mark.parametrize("threads", ["1", "ALL_CPUS"])
+def test_gdal_merge_chunks_nodata(script_path, tmp_path, threads):
+    np = pytest.importorskip("numpy")
+    gdaltest.importorskip_gdal_array()
+
+    drv = gdal.GetDriverByName("GTiff")
+    srs = osr.SpatialReference()
+    srs.SetWellKnownGeogCS("WGS84")
+    wkt = srs.ExportToWkt()
+
+    input1 = (np.arange(1200 * 1000) % 250 + 1).reshape(1000, 1200).astype(np.uint8)
+    input1[100:300, 200:900] = 0
+    input1_tif = str(tmp_path / "in1.tif")
+    with drv.Create(input1_tif, 1200, 1000, 1) as ds:
+        ds.SetProjection(wkt)
+        ds.SetGeoTransform([0, 1, 0, 1000, 0, -1])
+        ds.GetRasterBand(1).WriteArray(input1)
+
+    input2 = np.full((700, 800), 7, dtype=np.uint8)
+    input2[300:500, :] = 0
+    input2_tif = str(tmp_path / "in2.tif")
+    with drv.Create(input2_tif, 800, 700, 1) as ds:
+        ds.SetProjection(wkt)
+        ds.SetGeoTransform([600, 1, 0, 800, 0, -1])
+        ds.GetRasterBand(1).WriteArray(input2)
+
+    output_tif = str(tmp_path / "out.tif")
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal_merge",
+        f"-q -n 0 -init 3 -threads {threads} -co TILED=YES -co BLOCKXSIZE=256 "
+        f"-co BLOCKYSIZE=256 -o {output_tif} {input1_tif} {input2_tif}",
+    )
+
+    expected = np.full((1000, 1400), 3, dtype=np.uint8)
+    expected[:, :1200] = np.where(input1 != 0, input1, 3)
+    window = expected[200:900, 600:1400]
+    window[...] = np.where(input2 != 0, input2, window)
+
+    with gdal.Open(output_tif) as ds:
+        np.testing.assert_array_equal(ds.ReadAsArray(), expected)
@@ -13,12 +13,13 @@
 
 import glob
 import os
+import re
 
 import gdaltest
 import pytest
 import test_py_scripts
 
-from osgeo import gdal, osr
+from osgeo import gdal, ogr, osr
 
 pytestmark = pytest.mark.skipif(
     test_py_scripts.get_py_script("gdal_retile") is None,
@@ -119,6 +120,201 @@ def test_gdal_retile_2(script_path, tmp_path):
     ds = None
 
 
+###############################################################################
+# Return the (tile, band checksums) of the tiles of all levels of out_dir
+
+
+def _get_tile_checksums(out_dir):
+
+    tiles = sorted(
+        os.path.relpath(filename, out_dir)
+        for filename in glob.glob(os.path.join(str(out_dir), "**", "*.tif"))
+        + glob.glob(os.path.join(str(out_dir), "*.tif"))
+    )
+    assert tiles
+
+    checksums = []
+    for tile in tiles:
+        with gdal.Open(os.path.join(out_dir, tile)) as ds:
+            checksums.append(
+                (
+                    tile,
+                    [ds.GetRasterBand(i + 1).Checksum() for i in range(ds.RasterCount)],
+                )
+            )
+    return checksums
+
+
+###############################################################################
+# Test -processes against a single process run
+
+
+def test_gdal_retile_processes(script_path, tmp_path):
+
+    src_filename = test_py_scripts.get_data_path("gcore") + "rgba.tif"
+
+    checksums = []
+    for processes in (1, 2):
+        out_dir = tmp_path / ("outretile_processes_%d" % processes)
+        out_dir.mkdir()
+
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_retile",
+            f"-levels 2 -ps 8 8 -processes {processes} -tileIndex index.shp "
+            f"-targetDir {out_dir} {src_filename}",
+        )
+
+        checksums.append(_get_tile_checksums(out_dir))
+
+        with ogr.Open(str(out_dir / "index.shp")) as ds:
+            lyr = ds.GetLayer(0)
+            assert lyr.GetFeatureCount() == len(
+                glob.glob(os.path.join(str(out_dir), "*.tif"))
+            )
+
+    assert checksums[0] == checksums[1]
+
+
+###############################################################################
+# Test -vrtMosaic against the default mosaicing of the input tiles
+
+
+def test_gdal_retile_vrt_mosaic(script_path, tmp_path):
+
+    drv = gdal.GetDriverByName("GTiff")
+    srs = osr.SpatialReference()
+    srs.SetWellKnownGeogCS("WGS84")
+
+    input_tifs = []
+    for i, (ulx, uly, value) in enumerate(((0, 15, 1), (15, 30, 2), (15, 15, 3))):
+        input_tif = str(tmp_path / ("in%d.tif" % (i + 1)))
+        with drv.Create(input_tif, 30, 30, 1) as ds:
+            ds.SetSpatialRef(srs)
+            ds.SetGeoTransform([ulx, 0.5, 0, uly, 0, -0.5])
+            ds.GetRasterBand(1).SetNoDataValue(255)
+            ds.GetRasterBand(1).Fill(value)
+        input_tifs.append(input_tif)
+
+    checksums = []
+    for options in ("", "-vrtMosaic"):
+        out_dir = tmp_path / ("outretile%s" % options)
+        out_dir.mkdir()
+
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_retile",
+            f"-levels 2 -ps 16 16 {options} -targetDir {out_dir} "
+            + " ".join(input_tifs),
+        )
+
+        checksums.append(_get_tile_checksums(out_dir))
+
+    assert checksums[0] == checksums[1]
+
+
+###############################################################################
+# Test -cacheSize and the reporting of the dataset cache statistics
+
+
+def test_gdal_retile_cache_size(script_path, tmp_path):
+
+    drv = gdal.GetDriverByName("GTiff")
+    input_tifs = []
+    for i in range(3):
+        input_tif = str(tmp_path / ("in%d.tif" % (i + 1)))
+        with drv.Create(input_tif, 10, 10, 1) as ds:
+            ds.SetGeoTransform([i * 10, 1, 0, 10, 0, -1])
+            ds.GetRasterBand(1).Fill(i + 1)
+        input_tifs.append(input_tif)
+
+    out_dir = tmp_path / "outretile_cache"
+    out_dir.mkdir()
+
+    ret = test_py_scripts.run_py_script(
+        script_path,
+        "gdal_retile",
+        f"-v -cacheSize 1 -ps 5 10 -targetDir {out_dir} " + " ".join(input_tifs),
+    )
+    # Each source is needed for two tiles, but only one is kept open
+    assert _get_cache_evictions(ret) > 0
+
+    for i in range(3):
+        with gdal.Open(str(out_dir / ("in1_1_%d.tif" % (2 * i + 1)))) as ds:
+            assert ds.GetRasterBand(1).Checksum() == gdal.Open(
+                input_tifs[i]
+            ).GetRasterBand(1).Checksum(xsize=5)
+
+    out_dir = tmp_path / "outretile_large_cache"
+    out_dir.mkdir()
+
+    ret = test_py_scripts.run_py_script(
+        script_path,
+        "gdal_retile",
+        f"-v -cacheSize 3 -ps 5 10 -targetDir {out_dir} " + " ".join(input_tifs),
+    )
+    assert _get_cache_evictions(ret) == 0
+
+
+def _get_cache_evictions(output):
+    m = re.search(r"Dataset cache: .* (\d+) evictions", output)
+    assert m, output
+    return int(m.group(1))
+
+
+###############################################################################
+# Test -cacheMemory
+
+
+def test_gdal_retile_cache_memory(script_path, tmp_path):
+
+    # The memory of each source is estimated as one row of 512x512 blocks,
+    # that is 512 KB
+    drv = gdal.GetDriverByName("GTiff")
+    input_tifs = []
+    for i in range(3):
+        input_tif = str(tmp_path / ("in%d.tif" % (i + 1)))
+        with drv.Create(
+            input_tif,
+            1024,
+            1024,
+            1,
+            options=[
+                "TILED=YES",
+                "BLOCKXSIZE=512",
+                "BLOCKYSIZE=512",
+                "COMPRESS=DEFLATE",
+            ],
+        ) as ds:
+            ds.SetGeoTransform([i * 1024, 1, 0, 1024, 0, -1])
+            ds.GetRasterBand(1).Fill(i + 1)
+        input_tifs.append(input_tif)
+
+    evictions = {}
+    for cache_memory in (1, 2):
+        out_dir = tmp_path / ("outretile_cache_memory_%d" % cache_memory)
+        out_dir.mkdir()
+
+        ret = test_py_scripts.run_py_script(
+            script_path,
+            "gdal_retile",
+            f"-v -cacheMemory {cache_memory} -ps 512 512 -targetDir {out_dir} "
+            + " ".join(input_tifs),
+        )
+        evictions[cache_memory] = _get_cache_evictions(ret)
+
+    # Only 2 of the 3 sources fit in 1 MB
+    assert evictions[1] > 0
+    assert evictions[2] == 0
+
+    ret = test_py_scripts.run_py_script(
+        script_path,
+        "gdal_retile",
+        f"-cacheMemory 0 -targetDir {tmp_path} " + " ".join(input_tifs),
+    )
+    assert "Invalid cache memory : 0" in ret
+
+
 ###############################################################################
 # test gdal_retile.py with input having gaps
 
@@ -12,6 +12,7 @@
 # SPDX-License-Identifier: MIT
 ###############################################################################
 
+import concurrent.futures
 import shutil
 
 import gdaltest
@@ -138,6 +139,126 @@ def test_gdalcompare_different_pixel_content(
 ###############################################################################
 
 
+def test_gdalcompare_fail_fast_and_num_threads(tmp_vsimem, source_filename):
+
+    golden_filename = str(tmp_vsimem / "golden.tif")
+    gdal.Translate(golden_filename, source_filename, options="-b 1 -b 1 -b 1")
+    filename = str(tmp_vsimem / "new.tif")
+    gdal.Translate(filename, source_filename, options="-b 1 -b 1 -b 1 -scale 0 1 0 0")
+
+    printed = []
+
+    def capture_print(*args, **kwargs):
+        printed.append(" ".join(str(x) for x in args))
+
+    ori_print = gdalcompare.my_print
+    gdalcompare.my_print = capture_print
+    try:
+        assert (
+            gdalcompare.find_diff(golden_filename, filename, options=["SKIP_BINARY"])
+            == 3
+        )
+        sequential = printed[:]
+
+        del printed[:]
+        assert (
+            gdalcompare.find_diff(
+                golden_filename,
+                filename,
+                options=["SKIP_BINARY", "NUM_THREADS=3"],
+            )
+            == 3
+        )
+        assert printed == sequential
+
+        # Concurrent comparisons do not lose messages
+        del printed[:]
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            futures = [
+                executor.submit(
+                    gdalcompare.find_diff,
+                    golden_filename,
+                    filename,
+                    options=["SKIP_BINARY", "NUM_THREADS=3"],
+                )
+                for _ in range(2)
+            ]
+            assert [future.result() for future in futures] == [3, 3]
+        assert sorted(printed) == sorted(sequential * 2)
+        assert gdalcompare.my_print is capture_print
+
+        del printed[:]
+        assert (
+            gdalcompare.find_diff(
+                golden_filename,
+                filename,
+                options=["SKIP_BINARY", "FAIL_FAST"],
+            )
+            == 1
+        )
+        assert "  Comparison stopped at the first differing block." in printed
+    finally:
+        gdalcompare.my_print = ori_print
+
+
+###############################################################################
+
+
+def test_gdalcompare_hash_tree(tmp_vsimem, captured_print, source_filename):
+
+    golden_filename = source_filename
+    filename = str(tmp_vsimem / "new.tif")
+    gdal.Translate(filename, golden_filename, options="-scale 0 1 0 0")
+
+    assert (
+        gdalcompare.find_diff(
+            golden_filename, golden_filename, options=["SKIP_BINARY", "HASH_TREE"]
+        )
+        == 0
+    )
+    assert (
+        gdalcompare.find_diff(
+            golden_filename, filename, options=["SKIP_BINARY", "HASH_TREE"]
+        )
+        == 1
+    )
+    assert gdal.VSIStatL(golden_filename + ".hashtree.json") is None
+
+    for _ in range(2):
+        assert (
+            gdalcompare.find_diff(
+                golden_filename, filename, options=["SKIP_BINARY", "HASH_TREE_CACHE"]
+            )
+            == 1
+        )
+        assert gdal.VSIStatL(golden_filename + ".hashtree.json") is not None
+        assert (
+            gdalcompare.find_diff(
+                golden_filename,
+                golden_filename,
+                options=["SKIP_BINARY", "HASH_TREE_CACHE"],
+            )
+            == 0
+        )
+
+    prefix = str(tmp_vsimem / "")
+    gdalcompare.find_diff(
+        golden_filename,
+        filename,
+        options=[
+            "SKIP_BINARY",
+            "HASH_TREE",
+            "DUMP_DIFFS",
+            "DUMP_DIFFS_PREFIX=" + prefix,
+        ],
+    )
+    ds = gdal.Open(prefix + "1.tif")
+    assert ds.GetRasterBand(1).Checksum() == 4672
+
+
+###############################################################################
+
+
 def test_gdalcompare_different_band_count(tmp_vsimem, captured_print, source_filename):
 
     golden_filename = source_filename
@@ -23,7 +23,7 @@ from itertools import product
 import test_py_scripts
 from numpy.testing import assert_allclose
 
-from osgeo import gdal, osr
+from osgeo import gdal, gdal_array, osr
 from osgeo_utils.auxiliary.osr_util import get_srs, get_transform, transform_points
 from osgeo_utils.auxiliary.raster_creation import copy_raster_and_add_overviews
 from osgeo_utils.auxiliary.util import open_ds
@@ -201,3 +201,112 @@ def test_gdallocationinfo_py_7(tmp_path):
                 outputs = list(zip(x, y, pixels, lines, *results))
                 print(f"ovr: {ovr_idx}, srs: {srs}, x/y/pixel/line/result: {outputs}")
             assert_allclose(expected, actual, rtol=1e-4, atol=1e-3)
+
+
+def test_gdallocationinfo_py_many_points(tmp_path):
+    filename = str(tmp_path / "tiled.tif")
+    src_ds = gdal.Open("../gcore/data/byte.tif")
+    ds = gdal.Translate(
+        filename,
+        src_ds,
+        options="-b 1 -b 1 -co TILED=YES -co BLOCKXSIZE=16 -co BLOCKYSIZE=16",
+    )
+    ds.GetRasterBand(2).WriteArray(255 - src_ds.GetRasterBand(1).ReadAsArray())
+    ds.FlushCache()
+    array = ds.ReadAsArray()
+
+    rng = np.random.RandomState(0)
+    pixels = rng.uniform(0, ds.RasterXSize, 1000)
+    lines = rng.uniform(0, ds.RasterYSize, 1000)
+
+    _, _, results = gdallocationinfo.gdallocationinfo(
+        filename_or_ds=ds, x=pixels, y=lines
+    )
+    cols = pixels.astype(int)
+    rows = lines.astype(int)
+    assert_allclose(results, array[:, rows, cols])
+
+    # at pixel centers, bilinear interpolation returns the pixel values
+    _, _, results = gdallocationinfo.gdallocationinfo(
+        filename_or_ds=ds,
+        x=cols + 0.5,
+        y=rows + 0.5,
+        resample_alg=gdal.GRIORA_Bilinear,
+    )
+    assert_allclose(results, array[:, rows, cols])
+
+
+@pytest.mark.parametrize(
+    "resample_alg", [gdal.GRIORA_NearestNeighbour, gdal.GRIORA_Bilinear]
+)
+def test_gdallocationinfo_py_single_block(tmp_path, resample_alg):
+    # the whole image is a single block, which is split in windows of at most
+    # max_window_size pixels
+    filename = str(tmp_path / "single_strip.tif")
+    ds = gdal.Translate(filename, "../gcore/data/byte.tif", options="-co BLOCKYSIZE=20")
+    assert ds.GetRasterBand(1).GetBlockSize() == [20, 20]
+    array = ds.GetRasterBand(1).ReadAsArray()
+
+    rng = np.random.RandomState(0)
+    cols = rng.randint(0, ds.RasterXSize, 100)
+    rows = rng.randint(0, ds.RasterYSize, 100)
+
+    results = np.zeros((1, 100), dtype=np.uint8)
+    gdallocationinfo.sample_by_blocks(
+        ds,
+        [1],
+        [ds.GetRasterBand(1)],
+        cols + 0.5,
+        rows + 0.5,
+        results,
+        gdal.GDT_Byte,
+        resample_alg,
+        max_window_size=4,
+    )
+    assert_allclose(results[0], array[rows, cols])
+
+
+@pytest.mark.parametrize(
+    "resample_alg,nodata",
+    [(gdal.GRIORA_Cubic, None), (gdal.GRIORA_Average, None), (gdal.GRIORA_Bilinear, 0)],
+)
+def test_gdallocationinfo_py_raster_io_fallback(tmp_path, resample_alg, nodata):
+    # other resampling algorithms, and bilinear interpolation with invalid
+    # pixels, are done with one resampled RasterIO per point
+    filename = str(tmp_path / "test.tif")
+    ds = gdal.Translate(filename, "../gcore/data/byte.tif")
+    if nodata is not None:
+        array = ds.GetRasterBand(1).ReadAsArray()
+        array[::2, ::2] = nodata
+        ds.GetRasterBand(1).WriteArray(array)
+        ds.GetRasterBand(1).SetNoDataValue(nodata)
+
+    rng = np.random.RandomState(0)
+    pixels = rng.uniform(1, ds.RasterXSize - 1, 50)
+    lines = rng.uniform(1, ds.RasterYSize - 1, 50)
+
+    _, _, results = gdallocationinfo.gdallocationinfo(
+        filename_or_ds=ds, x=pixels, y=lines, resample_alg=resample_alg
+    )
+
+    expected = []
+    buf_obj = np.empty([1, 1], dtype=np.uint8)
+    for pixel, line in zip(pixels, lines):
+        assert (
+            gdal_array.BandRasterIONumPy(
+                ds.GetRasterBand(1),
+                0,
+                pixel - 0.5,
+                line - 0.5,
+                1,
+                1,
+                buf_obj,
+                gdal.GDT_Byte,
+                resample_alg,
+                None,
+                None,
+            )
+            == 0
+        )
+        expected.append(buf_obj[0][0])
+    assert_allclose(results[0], expected)
@@ -243,6 +243,7 @@ typedef enum
 
 %{
 #include <iostream>
+#include <vector>
 using namespace std;
 
 #define CPL_SUPRESS_CPLUSPLUS
@@ -1684,6 +1685,114 @@ public:
         return ret;
     }
 
+    /* Return a list of at most nMaxFeatures tuples, one per feature, with the
+     * FID if bIncludeFID, the values of the fields of indices pList, and the
+     * geometry as WKB (nGeometryFormat == 1) or WKT (nGeometryFormat == 2) */
+%thread;
+    PyObject* _GetNextFeatureBatch(int nMaxFeatures, int nList, int* pList,
+                                   int bIncludeFID, int nGeometryFormat)
+    {
+        // Fetch the features without holding the GIL
+        std::vector<OGRFeatureH> ahFeatures;
+        ahFeatures.reserve(nMaxFeatures > 0 ? nMaxFeatures : 0);
+        for (int i = 0; i < nMaxFeatures; ++i)
+        {
+            OGRFeatureH hFeat = OGR_L_GetNextFeature(self);
+            if (hFeat == NULL)
+                break;
+            ahFeatures.push_back(hFeat);
+        }
+
+        const Py_ssize_t nColumns = nList + (bIncludeFID ? 1 : 0) +
+                                    (nGeometryFormat != 0 ? 1 : 0);
+
+        SWIG_PYTHON_THREAD_BEGIN_BLOCK;
+        PyObject* list = PyList_New(static_cast<Py_ssize_t>(ahFeatures.size()));
+        for (size_t iFeat = 0; list != NULL && iFeat < ahFeatures.size(); ++iFeat)
+        {
+            OGRFeatureH hFeat = ahFeatures[iFeat];
+            PyObject* tuple = PyTuple_New(nColumns);
+            if (tuple == NULL)
+            {
+                Py_DECREF(list);
+                list = NULL;
+                break;
+            }
+            Py_ssize_t iCol = 0;
+            if (bIncludeFID)
+            {
+                PyTuple_SET_ITEM(tuple, iCol++,
+                                 PyLong_FromLongLong(OGR_F_GetFID(hFeat)));
+            }
+            for (int i = 0; i < nList; ++i)
+            {
+                PyTuple_SET_ITEM(tuple, iCol++,
+                                 OGRFeatureFieldAsPyObject(hFeat, pList[i]));
+            }
+            if (nGeometryFormat != 0)
+            {
+                PyTuple_SET_ITEM(tuple, iCol++,
+                                 OGRGeometryAsPyObject(OGR_F_GetGeometryRef(hFeat),
+                                                       nGeometryFormat));
+            }
+            PyList_SET_ITEM(list, static_cast<Py_ssize_t>(iFeat), tuple);
+        }
+        if (list == NULL)
+        {
+            PyErr_Clear();
+            Py_INCREF(Py_None);
+            list = Py_None;
+        }
+        SWIG_PYTHON_THREAD_END_BLOCK;
+
+        for (OGRFeatureH hFeat : ahFeatures)
+            OGR_F_Destroy(hFeat);
+
+        if (list == Py_None)
+            CPLError(CE_Failure, CPLE_OutOfMemory, "Cannot allocate feature batch");
+        return list;
+    }
+%nothread;
+
+    /* Copy at most nMaxFeatures of the next features into dst_layer, keeping
+     * their FID, and return the number of features copied, or -1 in case of
+     * error */
+%apply Pointer NONNULL {OGRLayerShadow *dst_layer};
+%thread;
+    int _CopyNextFeatures(OGRLayerShadow* dst_layer, int nMaxFeatures)
+    {
+        OGRFeatureDefnH hDstDefn = OGR_L_GetLayerDefn(dst_layer);
+        int nCopied = 0;
+        while (nCopied < nMaxFeatures)
+        {
+            OGRFeatureH hSrcFeat = OGR_L_GetNextFeature(self);
+            if (hSrcFeat == NULL)
+                break;
+            OGRFeatureH hDstFeat = OGR_F_Create(hDstDefn);
+            OGRErr eErr = OGR_F_SetFrom(hDstFeat, hSrcFeat, TRUE);
+            if (eErr == OGRERR_NONE)
+            {
+                OGR_F_SetFID(hDstFeat, OGR_F_GetFID(hSrcFeat));
+                eErr = OGR_L_CreateFeature(dst_layer, hDstFeat);
+            }
+            if (eErr != OGRERR_NONE)
+            {
+                CPLError(CE_Failure, CPLE_AppDefined,
+                         "Cannot write feature " CPL_FRMT_GIB,
+                         OGR_F_GetFID(hSrcFeat));
+                nCopied = -1;
+            }
+            OGR_F_Destroy(hDstFeat);
+            OGR_F_Destroy(hSrcFeat);
+            if (nCopied < 0)
+                break;
+            ++nCopied;
+        }
+        return nCopied;
+    }
+%nothread;
+%clear OGRLayerShadow *dst_layer;
+
 %newobject GetArrowStream;
   ArrowArrayStream* GetArrowStream(char** options = NULL) {
       struct ArrowArrayStream* stream = (struct ArrowArrayStream* )malloc(sizeof(struct ArrowArrayStream));
@@ -2347,6 +2456,58 @@ public:
       return OGR_F_GetFieldIndex(self, field_name);
   }
 
+#ifdef SWIGPYTHON
+  /* Same as GetFieldIndex(), except that an exact match is preferred over
+   * a case insensitive one */
+  int _GetFieldIndexExactFirst(const char* field_name) {
+      OGRFeatureDefnH hDefn = OGR_F_GetDefnRef(self);
+      const int nFirstIdx = OGR_FD_GetFieldIndex(hDefn, field_name);
+      if (nFirstIdx < 0 ||
+          strcmp(OGR_Fld_GetNameRef(OGR_FD_GetFieldDefn(hDefn, nFirstIdx)), field_name) == 0)
+          return nFirstIdx;
+      const int nFieldCount = OGR_FD_GetFieldCount(hDefn);
+      for (int i = nFirstIdx + 1; i < nFieldCount; ++i)
+      {
+          if (strcmp(OGR_Fld_GetNameRef(OGR_FD_GetFieldDefn(hDefn, i)), field_name) == 0)
+              return i;
+      }
+      return nFirstIdx;
+  }
+
+  /* Return the value of a field in its native Python type */
+  PyObject* _GetFieldValue(int id) {
+      if (id < 0 || id >= OGR_F_GetFieldCount(self)) {
+          CPLError(CE_Failure, 1, FIELD_INDEX_ERROR_TMPL, id);
+          Py_RETURN_NONE;
+      }
+      return OGRFeatureFieldAsPyObject(self, id);
+  }
+
+  /* Return the list of the values of all fields in their native Python type */
+  PyObject* _GetFieldValues() {
+      const int nFieldCount = OGR_F_GetFieldCount(self);
+      PyObject* list = PyList_New(nFieldCount);
+      for (int i = 0; list != NULL && i < nFieldCount; ++i)
+      {
+          PyList_SET_ITEM(list, i, OGRFeatureFieldAsPyObject(self, i));
+      }
+      return list;
+  }
+
+  /* Return the list of the names of all fields */
+  PyObject* _GetFieldNames() {
+      OGRFeatureDefnH hDefn = OGR_F_GetDefnRef(self);
+      const int nFieldCount = OGR_FD_GetFieldCount(hDefn);
+      PyObject* list = PyList_New(nFieldCount);
+      for (int i = 0; list != NULL && i < nFieldCount; ++i)
+      {
+          PyList_SET_ITEM(list, i, GDALPythonObjectFromCStr(
+              OGR_Fld_GetNameRef(OGR_FD_GetFieldDefn(hDefn, i))));
+      }
+      return list;
+  }
+#endif
+
   int GetGeomFieldIndex(const char* field_name) {
       // Do not issue an error if the field doesn't exist. It is intended to be silent
       return OGR_F_GetGeomFieldIndex(self, field_name);
@@ -572,6 +572,121 @@ unsigned int wrapper_VSIFReadL( void **buf, unsigned int nMembSize, unsigned int
 %clear (void **buf );
 %clear VSILFILE* fp;
 
+/* -------------------------------------------------------------------- */
+/*      VSIFReadIntoL()                                                 */
+/* -------------------------------------------------------------------- */
+
+%rename (VSIFReadIntoL) wrapper_VSIFReadIntoL;
+
+%apply Pointer NONNULL {VSILFILE* fp};
+%inline %{
+/* Read directly into a writable Python buffer (bytearray, memoryview, ...),
+ * and return the number of bytes read. */
+unsigned int wrapper_VSIFReadIntoL( PyObject* pyBuffer, VSILFILE *fp)
+{
+    Py_buffer view;
+    SWIG_PYTHON_THREAD_BEGIN_BLOCK;
+    if (PyObject_GetBuffer(pyBuffer, &view, PyBUF_SIMPLE | PyBUF_WRITABLE) != 0)
+    {
+        PyErr_Clear();
+        SWIG_PYTHON_THREAD_END_BLOCK;
+        CPLError(CE_Failure, CPLE_AppDefined,
+                 "buffer is not a simple writable buffer");
+        return 0;
+    }
+    SWIG_PYTHON_THREAD_END_BLOCK;
+
+    /* Short reads are allowed, so cap requests to the return type range */
+    const size_t nToRead = static_cast<size_t>(view.len) > 0x7FFFFFFFU ?
+                           0x7FFFFFFFU : static_cast<size_t>(view.len);
+    const size_t nRet = nToRead ? VSIFReadL( view.buf, 1, nToRead, fp ) : 0;
+
+    {
+        SWIG_PYTHON_THREAD_BEGIN_BLOCK;
+        PyBuffer_Release(&view);
+        SWIG_PYTHON_THREAD_END_BLOCK;
+    }
+    return static_cast<unsigned int>(nRet);
+}
+%}
+%clear VSILFILE* fp;
+
+/* -------------------------------------------------------------------- */
+/*      VSIFReadMultiRangeL()                                           */
+/* -------------------------------------------------------------------- */
+
+%rename (VSIFReadMultiRangeL) wrapper_VSIFReadMultiRangeL;
+
+%apply Pointer NONNULL {VSILFILE* fp};
+%inline %{
+/* Read several ranges, given as a sequence of (offset, size) tuples, with
+ * a single VSIFReadMultiRangeL() call, and return a list of bytearray. */
+PyObject* wrapper_VSIFReadMultiRangeL( PyObject* ranges, VSILFILE *fp)
+{
+    SWIG_PYTHON_THREAD_BEGIN_BLOCK;
+    PyObject* seq = PySequence_Fast(ranges, "ranges should be a sequence");
+    if (seq == NULL)
+    {
+        PyErr_Clear();
+        Py_INCREF(Py_None);
+        SWIG_PYTHON_THREAD_END_BLOCK;
+        CPLError(CE_Failure, CPLE_AppDefined,
+                 "ranges should be a sequence of (offset, size) tuples");
+        return Py_None;
+    }
+
+    const Py_ssize_t nRanges = PySequence_Fast_GET_SIZE(seq);
+    std::vector<void*> apData(nRanges);
+    std::vector<vsi_l_offset> anOffsets(nRanges);
+    std::vector<size_t> anSizes(nRanges);
+    PyObject* list = PyList_New(nRanges);
+    for (Py_ssize_t i = 0; list != NULL && i < nRanges; ++i)
+    {
+        unsigned long long nOffset = 0;
+        Py_ssize_t nSize = 0;
+        PyObject* item = PySequence_Fast_GET_ITEM(seq, i);
+        PyObject* buffer = NULL;
+        if (!PyTuple_Check(item) ||
+            !PyArg_ParseTuple(item, "Kn", &nOffset, &nSize) || nSize < 0 ||
+            (buffer = PyByteArray_FromStringAndSize(NULL, nSize)) == NULL)
+        {
+            PyErr_Clear();
+            Py_DECREF(list);
+            list = NULL;
+            break;
+        }
+        PyList_SET_ITEM(list, i, buffer);
+        apData[i] = PyByteArray_AsString(buffer);
+        anOffsets[i] = static_cast<vsi_l_offset>(nOffset);
+        anSizes[i] = static_cast<size_t>(nSize);
+    }
+    Py_DECREF(seq);
+    if (list == NULL)
+    {
+        Py_INCREF(Py_None);
+        SWIG_PYTHON_THREAD_END_BLOCK;
+        CPLError(CE_Failure, CPLE_AppDefined,
+                 "invalid (offset, size) range, or cannot allocate buffer");
+        return Py_None;
+    }
+    SWIG_PYTHON_THREAD_END_BLOCK;
+
+    if (nRanges > 0 &&
+        VSIFReadMultiRangeL(static_cast<int>(nRanges), apData.data(),
+                            anOffsets.data(), anSizes.data(), fp) != 0)
+    {
+        SWIG_PYTHON_THREAD_BEGIN_BLOCK;
+        Py_DECREF(list);
+        Py_INCREF(Py_None);
+        SWIG_PYTHON_THREAD_END_BLOCK;
+        CPLError(CE_Failure, CPLE_FileIO, "VSIFReadMultiRangeL() failed");
+        return Py_None;
+    }
+    return list;
+}
+%}
+%clear VSILFILE* fp;
+
 /* -------------------------------------------------------------------- */
 /*      VSIGetMemFileBuffer_unsafe()                                    */
 /* -------------------------------------------------------------------- */
@@ -628,6 +743,16 @@ void wrapper_VSIGetMemFileBuffer(const char *utf8_path, GByte **out, vsi_l_offse
         raise ValueError("I/O operation on closed file.")
 %}
 
+%pythonprepend wrapper_VSIFReadIntoL %{
+    if args[1].this is None:
+        raise ValueError("I/O operation on closed file.")
+%}
+
+%pythonprepend wrapper_VSIFReadMultiRangeL %{
+    if args[1].this is None:
+        raise ValueError("I/O operation on closed file.")
+%}
+
 %pythonprepend VSIFEofL %{
     if args[0].this is None:
         raise ValueError("I/O operation on closed file.")
@@ -6193,16 +6318,28 @@ from io import BytesIO
 class VSIFile(BytesIO):
     """Class wrapping a GDAL VSILFILE instance as a Python BytesIO instance
 
+       It also implements the :py:class:`io.RawIOBase` interface (readinto(),
+       readable(), seekable(), ...), so that it can be wrapped in a
+       :py:class:`io.BufferedReader`.
+
+       :param read_ahead_size: if strictly positive, size in bytes of a
+           read-ahead buffer used to coalesce small reads and line iteration.
+           Added in GDAL 3.13.
+
        :since: GDAL 3.11
     """
 
-    def __init__(self, path, mode, encoding="utf-8", options = {}):
+    def __init__(self, path, mode, encoding="utf-8", options = {}, read_ahead_size=0):
         self._path = path
         self._mode = mode
 
         self._binary = "b" in mode
         self._encoding = encoding
 
+        self._read_ahead_size = read_ahead_size
+        self._buffer = bytearray()
+        self._buffer_pos = 0
+
         self._fp = VSIFOpenExL(self._path, self._mode, True, options)
         if self._fp is None:
             self._closed = True
@@ -6220,34 +6357,135 @@ class VSIFile(BytesIO):
         return self
 
     def __next__(self):
-        line = CPLReadLineL(self._fp)
+        if self._read_ahead_size > 0:
+            line = self._read_line_buffered()
+        else:
+            line = CPLReadLineL(self._fp)
+            if line is not None and self._binary:
+                line = line.encode()
         if line is None:
             raise StopIteration
-        if self._binary:
-            return line.encode()
         return line
 
+    def _read_line_buffered(self):
+        # Same behavior as CPLReadLineL(): the end of line characters are
+        # removed, and None is returned at end of file.
+        chunks = []
+        while True:
+            if self._buffer_pos >= len(self._buffer):
+                self._fill_buffer()
+                if not self._buffer:
+                    break
+            idx = self._buffer.find(b"\n", self._buffer_pos)
+            if idx >= 0:
+                chunks.append(self._buffer[self._buffer_pos:idx])
+                self._buffer_pos = idx + 1
+                break
+            chunks.append(self._buffer[self._buffer_pos:])
+            self._buffer_pos = len(self._buffer)
+
+        if not chunks:
+            return None
+        line = b"".join(chunks)
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if self._binary:
+            return line
+        return line.decode(self._encoding)
+
+    def _fill_buffer(self):
+        self._buffer = VSIFReadL(1, self._read_ahead_size, self._fp) or bytearray()
+        self._buffer_pos = 0
+
+    def _discard_buffer(self):
+        # Move the file position back to the logical position
+        remaining = len(self._buffer) - self._buffer_pos
+        self._buffer = bytearray()
+        self._buffer_pos = 0
+        if remaining:
+            VSIFSeekL(self._fp, VSIFTellL(self._fp) - remaining, 0)
+
+    @property
+    def closed(self):
+        return self._closed
+
     def close(self):
         if self._closed:
             return
 
         self._closed = True
+        self._buffer = bytearray()
+        self._buffer_pos = 0
         VSIFCloseL(self._fp)
 
+    def readable(self):
+        return "r" in self._mode or "+" in self._mode
+
+    def writable(self):
+        return any(c in self._mode for c in "wax+")
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        """Read bytes into a pre-allocated, writable bytes-like object,
+           directly from the file when the read-ahead buffer is not used.
+
+           Returns the number of bytes read (0 at end of file).
+        """
+
+        if self._closed:
+            raise ValueError("I/O operation on closed file.")
+
+        view = memoryview(b).cast("B")
+        nread = 0
+        if self._buffer_pos < len(self._buffer):
+            nread = min(len(view), len(self._buffer) - self._buffer_pos)
+            view[:nread] = memoryview(self._buffer)[
+                self._buffer_pos : self._buffer_pos + nread
+            ]
+            self._buffer_pos += nread
+            if nread == len(view):
+                return nread
+            view = view[nread:]
+
+        if 0 < len(view) < self._read_ahead_size:
+            self._fill_buffer()
+            n = min(len(view), len(self._buffer))
+            view[:n] = memoryview(self._buffer)[:n]
+            self._buffer_pos = n
+            return nread + n
+
+        return nread + VSIFReadIntoL(view, self._fp)
+
+    readinto1 = readinto
+
     def read(self, size=-1):
-        if size == -1:
+        if size is None or size < 0:
             pos = self.tell()
             self.seek(0, 2)
-            size = self.tell()
+            size = self.tell() - pos
             self.seek(pos)
 
-        raw = VSIFReadL(1, size, self._fp)
+        raw = bytearray(size)
+        view = memoryview(raw)
+        total = 0
+        while total < size:
+            n = self.readinto(view[total:])
+            if n == 0:
+                break
+            total += n
+        view.release()
+        del raw[total:]
 
         if self._binary:
             return bytes(raw)
         else:
             return raw.decode(self._encoding)
 
+    def readall(self):
+        return self.read()
+
     def write(self, x):
 
         if self._binary:
@@ -6256,6 +6494,9 @@ class VSIFile(BytesIO):
             assert type(x) is str
             x = x.encode(self._encoding)
 
+        if self._buffer:
+            self._discard_buffer()
+
         planned_write = len(x)
         actual_write = VSIFWriteL(x, 1, planned_write, self._fp)
 
@@ -6277,11 +6518,28 @@ class VSIFile(BytesIO):
            Returns the new absolute position.
         """
 
+        if self._closed:
+            raise ValueError("I/O operation on closed file.")
+
+        if whence == 1:
+            offset += self.tell()
+            whence = 0
+
+        if self._buffer:
+            # Seek within the read-ahead buffer if possible
+            raw_pos = VSIFTellL(self._fp)
+            buffer_start = raw_pos - len(self._buffer)
+            if whence == 0 and buffer_start <= offset <= raw_pos:
+                self._buffer_pos = offset - buffer_start
+                return offset
+            self._discard_buffer()
+
         if VSIFSeekL(self._fp, offset, whence) != 0:
             raise OSError(VSIGetLastErrorMsg())
+        return self.tell()
 
     def tell(self):
-        return VSIFTellL(self._fp)
+        return VSIFTellL(self._fp) - (len(self._buffer) - self._buffer_pos)
 %}
 
 
@@ -50,6 +50,125 @@
 %include "python_exceptions.i"
 %include "python_strings.i"
 
+%{
+/* Return the value of a field as a Python object, with the same conventions
+ * as Feature.GetField() */
+static PyObject* OGRFeatureFieldAsPyObject(OGRFeatureH hFeat, int iField)
+{
+    if (iField < 0 || iField >= OGR_F_GetFieldCount(hFeat) ||
+        !OGR_F_IsFieldSetAndNotNull(hFeat, iField))
+    {
+        Py_RETURN_NONE;
+    }
+
+    OGRFieldDefnH hFieldDefn = OGR_F_GetFieldDefnRef(hFeat, iField);
+    const bool bBoolean = OGR_Fld_GetSubType(hFieldDefn) == OFSTBoolean;
+    switch (OGR_Fld_GetType(hFieldDefn))
+    {
+        case OFTInteger:
+        {
+            const int nVal = OGR_F_GetFieldAsInteger(hFeat, iField);
+            return bBoolean ? PyBool_FromLong(nVal) : PyLong_FromLong(nVal);
+        }
+
+        case OFTInteger64:
+            return PyLong_FromLongLong(OGR_F_GetFieldAsInteger64(hFeat, iField));
+
+        case OFTReal:
+            return PyFloat_FromDouble(OGR_F_GetFieldAsDouble(hFeat, iField));
+
+        case OFTIntegerList:
+        {
+            int nCount = 0;
+            const int* panVals = OGR_F_GetFieldAsIntegerList(hFeat, iField, &nCount);
+            PyObject* list = PyList_New(nCount);
+            for (int i = 0; list != NULL && i < nCount; ++i)
+            {
+                PyList_SET_ITEM(list, i, bBoolean ? PyBool_FromLong(panVals[i])
+                                                  : PyLong_FromLong(panVals[i]));
+            }
+            return list;
+        }
+
+        case OFTInteger64List:
+        {
+            int nCount = 0;
+            const GIntBig* panVals = OGR_F_GetFieldAsInteger64List(hFeat, iField, &nCount);
+            PyObject* list = PyList_New(nCount);
+            for (int i = 0; list != NULL && i < nCount; ++i)
+            {
+                PyList_SET_ITEM(list, i, PyLong_FromLongLong(panVals[i]));
+            }
+            return list;
+        }
+
+        case OFTRealList:
+        {
+            int nCount = 0;
+            const double* padfVals = OGR_F_GetFieldAsDoubleList(hFeat, iField, &nCount);
+            PyObject* list = PyList_New(nCount);
+            for (int i = 0; list != NULL && i < nCount; ++i)
+            {
+                PyList_SET_ITEM(list, i, PyFloat_FromDouble(padfVals[i]));
+            }
+            return list;
+        }
+
+        case OFTStringList:
+        {
+            char** papszVals = OGR_F_GetFieldAsStringList(hFeat, iField);
+            const int nCount = CSLCount(papszVals);
+            PyObject* list = PyList_New(nCount);
+            for (int i = 0; list != NULL && i < nCount; ++i)
+            {
+                PyList_SET_ITEM(list, i, GDALPythonObjectFromCStr(papszVals[i]));
+            }
+            return list;
+        }
+
+        default:
+            break;
+    }
+    return GDALPythonObjectFromCStr(OGR_F_GetFieldAsString(hFeat, iField));
+}
+
+/* Return a geometry as ISO WKB bytes (nFormat == 1) or ISO WKT (nFormat == 2) */
+static PyObject* OGRGeometryAsPyObject(OGRGeometryH hGeom, int nFormat)
+{
+    if (hGeom == NULL)
+    {
+        Py_RETURN_NONE;
+    }
+
+    if (nFormat == 1)
+    {
+        const size_t nSize = OGR_G_WkbSizeEx(hGeom);
+        PyObject* obj = PyBytes_FromStringAndSize(NULL, static_cast<Py_ssize_t>(nSize));
+        if (obj != NULL)
+        {
+            OGR_G_ExportToIsoWkb(hGeom, wkbNDR,
+                                 reinterpret_cast<unsigned char*>(PyBytes_AS_STRING(obj)));
+        }
+        return obj;
+    }
+
+    char* pszWKT = NULL;
+    OGR_G_ExportToIsoWkt(hGeom, &pszWKT);
+    PyObject* obj;
+    if (pszWKT != NULL)
+    {
+        obj = GDALPythonObjectFromCStr(pszWKT);
+    }
+    else
+    {
+        Py_INCREF(Py_None);
+        obj = Py_None;
+    }
+    CPLFree(pszWKT);
+    return obj;
+}
+%}
+
 // Start: to be removed in GDAL 4.0
 
 // Issue a FutureWarning in a number of functions and methods that will
@@ -175,6 +294,260 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
                 break
             yield feature
 
+    def iter_batches(self, batch_size=1000, fields=None, geometry_format="wkb",
+                     include_fid=False, as_dict=False):
+        """Iterate over the features of the layer by batches of plain Python values.
+
+        This is much faster than iterating over Feature objects and calling
+        :py:meth:`Feature.GetField`, as the values of each batch of features
+        are built at once in C.
+
+        Like ``__iter__()``, this resets the reading of the layer, and
+        honours the attribute and spatial filters.
+
+        Parameters
+        ----------
+        batch_size : int, default = 1000
+            Maximum number of features per batch.
+        fields : list of str or int, optional
+            Names or indices of the fields to return. Defaults to all fields.
+        geometry_format : str, default = "wkb"
+            "wkb" to return the geometry as ISO WKB bytes, "wkt" to return
+            it as ISO WKT, or None to not return it.
+        include_fid : bool, default = False
+            Whether the feature ID should be returned.
+        as_dict : bool, default = False
+            Whether each feature should be returned as a dictionary instead
+            of a tuple. Keys are the FID column name (or "FID"), the field
+            names and the geometry column name (or "geometry").
+
+        Returns
+        -------
+        iterator of lists
+            Each feature is a tuple (or dictionary) with the FID if
+            include_fid is set, the field values, with the same types as
+            returned by :py:meth:`Feature.GetField`, and the geometry if
+            geometry_format is not None.
+
+        Examples
+        --------
+        >>> with gdal.OpenEx("poly.shp", gdal.OF_VECTOR) as ds:
+        ...     lyr = ds.GetLayer(0)
+        ...     for batch in lyr.iter_batches(fields=["EAS_ID"], geometry_format=None):
+        ...         print(batch[0])
+        ...
+        (168,)
+        """
+
+        if batch_size <= 0:
+            raise ValueError("batch_size should be strictly positive")
+
+        defn = self.GetLayerDefn()
+        field_count = defn.GetFieldCount()
+        if fields is None:
+            field_indices = list(range(field_count))
+        else:
+            field_indices = []
+            for field in fields:
+                idx = defn.GetFieldIndex(field) if isinstance(field, str) else field
+                if idx < 0 or idx >= field_count:
+                    raise KeyError("Illegal field requested in iter_batches(): %s" % str(field))
+                field_indices.append(idx)
+
+        if geometry_format is None:
+            geometry_format_code = 0
+        elif geometry_format.lower() == "wkb":
+            geometry_format_code = 1
+        elif geometry_format.lower() == "wkt":
+            geometry_format_code = 2
+        else:
+            raise ValueError("geometry_format should be 'wkb', 'wkt' or None")
+
+        keys = None
+        if as_dict:
+            keys = []
+            if include_fid:
+                keys.append(self.GetFIDColumn() or "FID")
+            keys += [defn.GetFieldDefn(idx).GetName() for idx in field_indices]
+            if geometry_format_code:
+                keys.append(self.GetGeometryColumn() or "geometry")
+
+        self.ResetReading()
+        while True:
+            batch = self._GetNextFeatureBatch(batch_size, field_indices,
+                                              include_fid, geometry_format_code)
+            if not batch:
+                break
+            if keys is not None:
+                batch = [dict(zip(keys, values)) for values in batch]
+            yield batch
+
+    def ExportToGeoJSONStream(self, output, batch_size=1000, ndjson=False, options=None):
+        """Write the features of the layer as a GeoJSON FeatureCollection, or
+        as newline-delimited GeoJSON, in a streaming way.
+
+        Features are copied and serialized in C by the GeoJSON driver (or the
+        GeoJSONSeq driver if ndjson=True). When output is a filename, the
+        driver writes directly into it. Otherwise, features are serialized by
+        batches of batch_size features, so that the memory usage does not
+        depend on the number of features. The output is the same as the one
+        of the driver, except that the bbox of the FeatureCollection cannot be
+        written.
+
+        Like ``__iter__()``, this resets the reading of the layer, and
+        honours the attribute and spatial filters.
+
+        Parameters
+        ----------
+        output : str, os.PathLike, file-like object or callable
+            Name of a (possibly /vsi) file to create, object with a write()
+            method accepting bytes, or callable accepting bytes.
+        batch_size : int, default = 1000
+            Number of features serialized at a time.
+        ndjson : bool, default = False
+            Whether to write newline-delimited GeoJSON features instead of a
+            FeatureCollection.
+        options : list of str or dict, optional
+            Layer creation options of the GeoJSON or GeoJSONSeq driver,
+            such as COORDINATE_PRECISION or RFC7946. WRITE_BBOX is not supported.
+
+        Returns
+        -------
+        int
+            Number of features written.
+
+        Examples
+        --------
+        >>> with gdal.OpenEx("poly.shp", gdal.OF_VECTOR) as ds:
+        ...     lyr = ds.GetLayer(0)
+        ...     with open("poly.geojson", "wb") as f:
+        ...         lyr.ExportToGeoJSONStream(f)
+        ...
+        10
+        """
+
+        import os
+        import uuid
+
+        from . import gdal
+
+        if batch_size <= 0:
+            raise ValueError("batch_size should be strictly positive")
+
+        if options is None:
+            options = []
+        elif isinstance(options, dict):
+            options = ["%s=%s" % (k, v) for k, v in options.items()]
+        else:
+            options = list(options)
+        for opt in options:
+            if opt.upper().startswith("WRITE_BBOX="):
+                raise ValueError("WRITE_BBOX option is not supported")
+
+        driver_name = "GeoJSONSeq" if ndjson else "GeoJSON"
+        driver = gdal.GetDriverByName(driver_name)
+        if driver is None:
+            raise Exception("%s driver is not available" % driver_name)
+
+        src_defn = self.GetLayerDefn()
+
+        def create_dataset(filename):
+            ds = driver.Create(filename, 0, 0, 0, gdal.GDT_Unknown)
+            if ds is None:
+                raise Exception("Cannot create %s" % filename)
+            lyr = ds.CreateLayer(self.GetName(), srs=self.GetSpatialRef(),
+                                 geom_type=self.GetGeomType(), options=options)
+            if lyr is None:
+                raise Exception("Cannot create layer in %s" % filename)
+            for i in range(src_defn.GetFieldCount()):
+                lyr.CreateField(src_defn.GetFieldDefn(i))
+            return ds, lyr
+
+        def copy_features(lyr, max_features):
+            copied = self._CopyNextFeatures(lyr, max_features)
+            if copied < 0:
+                raise Exception("Cannot write features")
+            return copied
+
+        if isinstance(output, (str, os.PathLike)):
+            # The driver writes directly into the file
+            ds, lyr = create_dataset(os.fspath(output))
+            count = 0
+            try:
+                self.ResetReading()
+                while True:
+                    copied = copy_features(lyr, batch_size)
+                    count += copied
+                    if copied < batch_size:
+                        break
+            finally:
+                lyr = None
+                ds.Close()
+            return count
+
+        if hasattr(output, "write"):
+            write = output.write
+        elif callable(output):
+            write = output
+        else:
+            raise TypeError("output should be a filename, a file-like object or a callable")
+
+        temp_filename = "/vsimem/" + str(uuid.uuid4()) + (".geojsonl" if ndjson else ".geojson")
+
+        def read_temp_dataset():
+            try:
+                with gdal.VSIFile(temp_filename, "rb") as f:
+                    return f.read()
+            finally:
+                gdal.Unlink(temp_filename)
+
+        # The FeatureCollection header is the content of an empty dataset,
+        # without its footer
+        footer = b"\n]\n}\n"
+        if not ndjson:
+            create_dataset(temp_filename)[0].Close()
+            header = read_temp_dataset()
+            if not header.endswith(footer):
+                raise Exception("Unexpected output of the GeoJSON driver")
+            header = header[0:-len(footer)]
+
+        ds = None
+        count = 0
+        try:
+            if not ndjson:
+                write(header)
+            self.ResetReading()
+            while True:
+                ds, lyr = create_dataset(temp_filename)
+                copied = copy_features(lyr, batch_size)
+                lyr = None
+                # Clear ds before closing it, so that it is not closed again
+                # in case of error
+                temp_ds, ds = ds, None
+                temp_ds.Close()
+                data = read_temp_dataset()
+                if copied == 0:
+                    break
+                if not ndjson:
+                    if not data.startswith(header) or not data.endswith(footer):
+                        raise Exception("Unexpected output of the GeoJSON driver")
+                    data = data[len(header):-len(footer)]
+                    if count > 0:
+                        write(b",\n")
+                write(data)
+                count += copied
+                if copied < batch_size:
+                    break
+            if not ndjson:
+                write(footer)
+        finally:
+            if ds is not None:
+                lyr = None
+                ds.Close()
+                gdal.Unlink(temp_filename)
+
+        return count
+
     def schema(self):
         output = []
         defn = self.GetLayerDefn()
@@ -322,15 +695,39 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
         return Stream(stream)
 
 
-    def GetArrowStreamAsNumPy(self, options = []):
+    def GetArrowStreamAsNumPy(self, options = [], columns=None, accumulate=False):
         """ Return an ArrowStream as NumPy Array objects.
             A specific option to this method is USE_MASKED_ARRAYS=YES/NO (default is YES).
+
+            Fixed-width numeric and datetime columns, and fixed-width string
+            columns, are returned as zero-copy views of the Arrow buffers of
+            each batch. Other columns are converted.
+
+            Parameters
+            ----------
+            options : list of str, optional
+                Options of GetArrowStream(), and USE_MASKED_ARRAYS=YES/NO.
+            columns : list of str, optional
+                Names of the columns to return (attribute fields, geometry
+                column and FID column). Other fields are set as ignored
+                fields of the layer, and requested ones as not ignored, while
+                the stream is active, so that they are not read at all. The ignored fields of the layer before
+                the call are restored when the stream is exhausted, closed
+                or garbage collected.
+            accumulate : bool, default = False
+                If True, the whole stream is consumed, and a single dictionary
+                of NumPy arrays with all features is returned, instead of an
+                iterator over record batches. Arrays are grown in place by
+                doubling their capacity, to avoid concatenating per-batch
+                arrays. An empty dictionary is returned if there is no feature.
         """
 
         from osgeo import gdal_array
 
         class Stream:
-            def __init__(self, stream, use_masked_arrays):
+            def __init__(self, lyr, stream, use_masked_arrays, restore_ignored_fields):
+                self.lyr = lyr
+                self.restore_ignored_fields = restore_ignored_fields
                 self.stream = stream
                 self.schema = stream.GetSchema()
                 self.end_of_stream = False
@@ -340,13 +737,22 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
                 return self
 
             def __exit__(self, type, value, tb):
+                self._close()
+
+            def __del__(self):
+                if self.restore_ignored_fields is not None:
+                    self._close()
+
+            def _close(self):
                 self.end_of_stream = True
                 self.schema = None
                 self.stream = None
+                if self.restore_ignored_fields is not None:
+                    restore_ignored_fields = self.restore_ignored_fields
+                    self.restore_ignored_fields = None
+                    self.lyr.SetIgnoredFields(restore_ignored_fields)
 
-            def GetNextRecordBatch(self):
-                """ Return the next RecordBatch as a dictionary of Numpy arrays, or None at end of iteration """
-
+            def _GetNextRecordBatchAsDict(self):
                 array = self.stream.GetNextRecordBatch()
                 if array is None:
                     return None
@@ -356,6 +762,13 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
                                                      array)
                 if ret is None:
                     gdal_array._RaiseException()
+                return ret
+
+            def GetNextRecordBatch(self):
+                """ Return the next RecordBatch as a dictionary of Numpy arrays, or None at end of iteration """
+
+                ret = self._GetNextRecordBatchAsDict()
+                if ret is None:
                     return ret
                 for key, val in ret.items():
                     if isinstance(val, dict):
@@ -379,20 +792,147 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
                             break
                         yield batch
                 finally:
-                    self.end_of_stream = True
-                    self.stream = None
-
-        stream = self.GetArrowStream(options)
-        if not stream:
-            raise Exception("GetArrowStream() failed")
+                    self._close()
+
+            def _Accumulate(self, capacity):
+                """ Return all record batches as a single dictionary of Numpy arrays """
+
+                import numpy as np
+
+                def grow(buf, size, min_capacity, dtype):
+                    new_capacity = max(buf.shape[0], 1)
+                    while new_capacity < min_capacity:
+                        new_capacity *= 2
+                    # Zero-initialize masks
+                    alloc = np.zeros if dtype == np.bool_ else np.empty
+                    new_buf = alloc((new_capacity,) + buf.shape[1:], dtype=dtype)
+                    size = min(size, buf.shape[0])
+                    new_buf[0:size] = buf[0:size]
+                    return new_buf
+
+                buffers = {}
+                masks = {}
+                size = 0
+                try:
+                    while True:
+                        batch = self._GetNextRecordBatchAsDict()
+                        if batch is None:
+                            break
+                        n = 0
+                        for key, val in batch.items():
+                            mask = None
+                            if isinstance(val, dict):
+                                mask = val["mask"]
+                                val = val["data"]
+                            n = val.shape[0]
+
+                            buf = buffers.get(key)
+                            if buf is None:
+                                buf = np.empty((max(capacity, size + n),) + val.shape[1:], dtype=val.dtype)
+                            else:
+                                try:
+                                    dtype = np.result_type(buf.dtype, val.dtype)
+                                except TypeError:
+                                    dtype = np.dtype(object)
+                                if buf.shape[0] < size + n or dtype != buf.dtype:
+                                    buf = grow(buf, size, size + n, dtype)
+                            buf[size:size + n] = val
+                            buffers[key] = buf
+
+                            if mask is not None:
+                                mask_buf = masks.get(key)
+                                if mask_buf is None:
+                                    mask_buf = np.zeros(buf.shape[0], dtype=np.bool_)
+                                elif mask_buf.shape[0] < size + n:
+                                    mask_buf = grow(mask_buf, size, size + n, np.bool_)
+                                mask_buf[size:size + n] = mask
+                                masks[key] = mask_buf
+                        size += n
+                finally:
+                    self._close()
+
+                ret = {}
+                for key, buf in buffers.items():
+                    if buf.shape[0] != size:
+                        try:
+                            buf.resize((size,) + buf.shape[1:], refcheck=False)
+                        except ValueError:
+                            buf = buf[0:size].copy()
+                    if key in masks and self.use_masked_arrays:
+                        import numpy.ma as ma
+                        mask = masks[key]
+                        if mask.shape[0] < size:
+                            mask = grow(mask, size, size, np.bool_)
+                        buf = ma.masked_array(buf, mask[0:size])
+                    ret[key] = buf
+                return ret
 
         use_masked_arrays = True
+        has_include_fid = False
+        geometry_name = "wkb_geometry"
         for opt in options:
             opt = opt.upper()
             if opt.startswith('USE_MASKED_ARRAYS='):
                 use_masked_arrays = opt[len('USE_MASKED_ARRAYS='):] in ('YES', 'TRUE', 'ON', '1')
+            elif opt.startswith('INCLUDE_FID='):
+                has_include_fid = True
+        for opt in options:
+            if opt.upper().startswith('GEOMETRY_NAME='):
+                geometry_name = opt[len('GEOMETRY_NAME='):]
+
+        restore_ignored_fields = None
+        if columns is not None:
+            columns = set(columns)
+            available_columns = set()
+            ignored_fields = []
+            previous_ignored_fields = []
+            defn = self.GetLayerDefn()
+            for i in range(defn.GetFieldCount()):
+                fld_defn = defn.GetFieldDefn(i)
+                name = fld_defn.GetName()
+                available_columns.add(name)
+                if fld_defn.IsIgnored():
+                    previous_ignored_fields.append(name)
+                if name not in columns:
+                    ignored_fields.append(name)
+            for i in range(defn.GetGeomFieldCount()):
+                geom_fld_defn = defn.GetGeomFieldDefn(i)
+                name = geom_fld_defn.GetName()
+                available_columns.add(name if name else geometry_name)
+                if geom_fld_defn.IsIgnored():
+                    previous_ignored_fields.append(name if name else "OGR_GEOMETRY")
+                if (name if name else geometry_name) not in columns:
+                    ignored_fields.append(name if name else "OGR_GEOMETRY")
+            if defn.IsStyleIgnored():
+                previous_ignored_fields.append("OGR_STYLE")
+                ignored_fields.append("OGR_STYLE")
+            fid_name = self.GetFIDColumn() or "OGC_FID"
+            available_columns.add(fid_name)
+            if fid_name not in columns and not has_include_fid:
+                options = list(options) + ["INCLUDE_FID=NO"]
+            unknown_columns = columns - available_columns
+            if unknown_columns:
+                raise ValueError("Unknown column(s): %s" % ", ".join(sorted(unknown_columns)))
+            if ignored_fields != previous_ignored_fields:
+                if self.SetIgnoredFields(ignored_fields) != OGRERR_NONE:
+                    self.SetIgnoredFields(previous_ignored_fields)
+                    raise Exception("SetIgnoredFields() failed")
+                restore_ignored_fields = previous_ignored_fields
+
+        try:
+            stream = self.GetArrowStream(options)
+            if not stream:
+                raise Exception("GetArrowStream() failed")
+        except Exception:
+            if restore_ignored_fields is not None:
+                self.SetIgnoredFields(restore_ignored_fields)
+            raise
 
-        return Stream(stream, use_masked_arrays)
+        stream = Stream(self, stream, use_masked_arrays, restore_ignored_fields)
+        if accumulate:
+            feature_count = self.GetFeatureCount(0)
+            return stream._Accumulate(feature_count if feature_count > 0 else 0)
+        return stream
 
 
     def IsPyArrowSchemaSupported(self, pa_schema, options=[]):
@@ -467,6 +1007,172 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
         raise Exception("Passed object does not implement the __arrow_c_stream__ or __arrow_c_array__ interface.")
 
 
+    def WriteArrowStream(self, stream, batches_per_transaction=0, prefetch=1,
+                         progress=None, createFieldsFromSchema=None, options=[]):
+        """Write the record batches of the passed stream into the layer, batch
+           per batch, optionally grouping batches in transactions and reading the
+           next batches from a background thread while the current one is written.
+
+           Parameters
+           ----------
+           stream : object
+               pyarrow.Table, pyarrow.RecordBatchReader, object implementing
+               the __arrow_c_stream__ interface (split in record batches with
+               pyarrow), or iterable of objects implementing the
+               __arrow_c_array__ or __arrow_c_stream__ interface.
+
+           batches_per_transaction : int, default = 0
+               If strictly positive, and the layer supports transactions,
+               a transaction is committed every batches_per_transaction
+               batches. Otherwise, the caller is responsible for managing
+               transactions.
+
+           prefetch : int, default = 1
+               Maximum number of batches read in advance from a background
+               thread. The stream must then not be read from a layer of the
+               dataset being written. 0 to read batches from the calling thread.
+
+           progress : callable, optional
+               Called after each written batch as progress(rows_written,
+               rows_per_second). rows_written only counts batches whose
+               length is known.
+
+           createFieldsFromSchema : bool or None, optional
+               Same as for :py:meth:`Layer.WriteArrow`, for the first batch.
+
+           options : list[str]
+               Options to pass to OGRLayer::CreateFieldFromArrowSchema() and OGRLayer::WriteArrowBatch()
+
+           Returns
+           -------
+           int
+               OGRERR_NONE in case of success. In case of failure, the
+               current transaction is rolled back.
+        """
+
+        import time
+
+        def get_batches():
+            if hasattr(stream, "to_batches"):
+                # pyarrow.Table
+                return stream.to_batches()
+            if hasattr(stream, "read_next_batch"):
+                # pyarrow.RecordBatchReader
+                return stream
+            if hasattr(stream, "__arrow_c_stream__"):
+                try:
+                    import pyarrow as pa
+                    return pa.RecordBatchReader.from_stream(stream)
+                except (ImportError, AttributeError):
+                    # Cannot be split in batches: write it at once
+                    return [stream]
+            return stream
+
+        def prepare(batch):
+            try:
+                rows = len(batch)
+            except TypeError:
+                rows = None
+            if hasattr(batch, "__arrow_c_array__"):
+                return batch.__arrow_c_array__(), rows
+            return batch, rows
+
+        def prefetched_batches():
+            import queue
+            import threading
+
+            batch_queue = queue.Queue(maxsize=prefetch)
+            stop = threading.Event()
+            end_marker = object()
+
+            def put(item):
+                while not stop.is_set():
+                    try:
+                        batch_queue.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        pass
+                return False
+
+            def producer():
+                try:
+                    for batch in get_batches():
+                        if not put(prepare(batch)):
+                            return
+                    put(end_marker)
+                except BaseException as e:
+                    put(e)
+
+            thread = threading.Thread(target=producer, daemon=True)
+            thread.start()
+            try:
+                while True:
+                    item = batch_queue.get()
+                    if item is end_marker:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            finally:
+                stop.set()
+                thread.join()
+
+        if prefetch > 0:
+            batches = prefetched_batches()
+        else:
+            batches = (prepare(batch) for batch in get_batches())
+
+        use_transactions = batches_per_transaction > 0 and self.TestCapability(OLCTransactions)
+        in_transaction = False
+        batches_in_transaction = 0
+        rows_written = 0
+        start_time = time.monotonic()
+        try:
+            for batch, rows in batches:
+                if use_transactions and not in_transaction:
+                    if self.StartTransaction() != OGRERR_NONE:
+                        return OGRERR_FAILURE
+                    in_transaction = True
+
+                if isinstance(batch, tuple):
+                    schema_capsule, array_capsule = batch
+                    ret = self.WriteArrowSchemaAndArrowArrayCapsule(
+                        schema_capsule, array_capsule,
+                        -1 if createFieldsFromSchema is None else 1 if createFieldsFromSchema is True else 0,
+                        options)
+                else:
+                    ret = self.WriteArrow(batch, createFieldsFromSchema=createFieldsFromSchema, options=options)
+                if ret != OGRERR_NONE:
+                    return ret
+                # Fields are only created from the schema of the first batch
+                createFieldsFromSchema = False
+
+                if in_transaction:
+                    batches_in_transaction += 1
+                    if batches_in_transaction == batches_per_transaction:
+                        in_transaction = False
+                        batches_in_transaction = 0
+                        if self.CommitTransaction() != OGRERR_NONE:
+                            return OGRERR_FAILURE
+
+                if rows is not None:
+                    rows_written += rows
+                if progress is not None:
+                    elapsed = time.monotonic() - start_time
+                    progress(rows_written, rows_written / elapsed if elapsed > 0 else 0.0)
+
+            if in_transaction:
+                in_transaction = False
+                if self.CommitTransaction() != OGRERR_NONE:
+                    return OGRERR_FAILURE
+        finally:
+            if in_transaction:
+                self.RollbackTransaction()
+            batches.close()
+
+        return OGRERR_NONE
+
+
     def WritePyArrow(self, pa_batch, options=[]):
         """Write the content of the passed PyArrow batch (either a pyarrow.Table, a pyarrow.RecordBatch or a pyarrow.StructArray) into the layer.
 
@@ -527,15 +1233,7 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
         return self.Clone()
 
     def _getfieldindex(self, fieldname):
-        case_insensitive_idx = -1
-        fdefn = _ogr.Feature_GetDefnRef(self)
-        for i in range(fdefn.GetFieldCount()):
-            name = fdefn.GetFieldDefn(i).GetName()
-            if name == fieldname:
-                return i
-            elif case_insensitive_idx < 0 and name.lower() == fieldname.lower():
-                case_insensitive_idx = i
-        return case_insensitive_idx
+        return _ogr.Feature__GetFieldIndexExactFirst(self, fieldname)
 
     # This makes it possible to fetch fields in the form "feature.area".
     # This has some risk of name collisions.
@@ -644,36 +1342,10 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
             fld_index = self._getfieldindex(fld_index)
         if (fld_index < 0) or (fld_index > self.GetFieldCount()):
             raise KeyError("Illegal field requested in GetField()")
-        if not (self.IsFieldSet(fld_index)) or self.IsFieldNull(fld_index):
-            return None
-        fld_type = self.GetFieldType(fld_index)
-        if fld_type == OFTInteger:
-            if self.GetFieldDefnRef(fld_index).GetSubType() == OFSTBoolean:
-                return bool(self.GetFieldAsInteger(fld_index))
-            return self.GetFieldAsInteger(fld_index)
-        if fld_type == OFTInteger64:
-            return self.GetFieldAsInteger64(fld_index)
-        if fld_type == OFTReal:
-            return self.GetFieldAsDouble(fld_index)
-        if fld_type == OFTStringList:
-            return self.GetFieldAsStringList(fld_index)
-        if fld_type == OFTIntegerList:
-            ret = self.GetFieldAsIntegerList(fld_index)
-            if self.GetFieldDefnRef(fld_index).GetSubType() == OFSTBoolean:
-                 ret = [bool(x) for x in ret]
-            return ret
-        if fld_type == OFTInteger64List:
-            return self.GetFieldAsInteger64List(fld_index)
-        if fld_type == OFTRealList:
-            return self.GetFieldAsDoubleList(fld_index)
-        ## if fld_type == OFTDateTime or fld_type == OFTDate or fld_type == OFTTime:
-        #     return self.GetFieldAsDate(fld_index)
-        # default to returning as a string.  Should we add more types?
-        try:
-            return self.GetFieldAsString(fld_index)
-        except:
-            # For Python3 on non-UTF8 strings
-            return self.GetFieldAsBinary(fld_index)
+        # The value is converted in C, according to the field type and
+        # subtype: bool for OFSTBoolean, int, float, lists, and str (or
+        # bytes for non-UTF8 strings) for other types.
+        return self._GetFieldValue(fld_index)
 
     def SetFieldBinary(self, field_index_or_name, value):
         """
@@ -735,18 +1407,14 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
 
     def keys(self):
         """Return the list of field names (of the layer definition)"""
-        names = []
-        for i in range(self.GetFieldCount()):
-            fieldname = self.GetFieldDefnRef(i).GetName()
-            names.append(fieldname)
-        return names
+        return self._GetFieldNames()
 
     def items(self):
         """Return a dictionary with the field names as key, and their value in the feature"""
-        keys = self.keys()
         output = {}
-        for key in keys:
-            output[key] = self.GetField(key)
+        for key, value in zip(self._GetFieldNames(), self._GetFieldValues()):
+            # Keep the value of the first field in case of duplicated names
+            output.setdefault(key, value)
         return output
 
     def geometry(self):
@@ -801,29 +1469,30 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
             if options is None:
                 options = []
             geom_json_string = geom.ExportToJson(options=options)
-            geom_json_object = simplejson.loads(geom_json_string)
         else:
-            geom_json_object = None
+            geom_json_string = None
+
+        fid = self.GetFID()
+        properties = self.items()
+
+        if not as_object:
+            # Embed the GeoJSON of the geometry as it is, instead of decoding
+            # and re-encoding it
+            output = '{"type": "Feature", "geometry": %s, "properties": %s' % (
+                geom_json_string if geom_json_string is not None else "null",
+                simplejson.dumps(properties))
+            if fid != NullFID:
+                output += ', "id": %d' % fid
+            return output + '}'
 
         output = {'type':'Feature',
-                   'geometry': geom_json_object,
-                   'properties': {}
+                   'geometry': simplejson.loads(geom_json_string) if geom_json_string is not None else None,
+                   'properties': properties
                   }
 
-        fid = self.GetFID()
         if fid != NullFID:
             output['id'] = fid
 
-        for key in self.keys():
-            fld_defn = self.GetFieldDefnRef(self.GetFieldIndex(key))
-            if fld_defn.GetType() == _ogr.OFTInteger and fld_defn.GetSubType() == _ogr.OFSTBoolean:
-                output['properties'][key] = bool(self.GetField(key))
-            else:
-                output['properties'][key] = self.GetField(key)
-
-        if not as_object:
-            output = simplejson.dumps(output)
-
         return output
 
 
@@ -21,18 +21,22 @@
 
 import contextlib
 import glob
+import hashlib
 import json
 import logging
 import math
 import optparse
 import os
+import queue
 import shutil
+import sqlite3
 import stat
 import sys
 import tempfile
 import threading
 from functools import partial
 from typing import Any, Dict, List, NoReturn, Optional, Tuple
+from urllib.request import pathname2url
 from uuid import uuid4
 from xml.etree import ElementTree
 
@@ -1280,35 +1284,161 @@ def _get_creation_options(options):
     return copts
 
 
-def create_base_tile(
-    tile_job_info: "TileJobInfo", tmsMap: dict, tile_detail: "TileDetail"
-) -> None:
+def _overview_cache_enabled(tile_job_info: "TileJobInfo", tz: int) -> bool:
+    """Whether the raw content of a tile at zoom level tz must be returned to
+    feed the overview cache"""
+    return bool(getattr(tile_job_info.options, "overview_cache", None)) and (
+        tz > tile_job_info.tminz
+    )
 
-    if tmsMap is None:
-        _, tmsMap = get_profile_list_and_tmsMap()
 
-    dataBandsCount = tile_job_info.nb_data_bands
-    output = tile_job_info.output_file_path
-    tileext = tile_job_info.tile_extension
-    tile_size = tile_job_info.tile_size
-    options = tile_job_info.options
+def _get_raw_tile(dstile: gdal.Dataset, tile_job_info: "TileJobInfo") -> bytes:
+    """
+    Return the content of a tile dataset as a band sequential buffer, with
+    the alpha band as last band, suitable for create_overview_tile().
+    For JPEG tiles, the alpha band is set to opaque, consistently with what
+    re-reading the encoded tile would give.
+    """
+    if tile_job_info.tile_driver == "JPEG":
+        tile_size = tile_job_info.tile_size
+        data = dstile.ReadRaster(
+            band_list=list(range(1, tile_job_info.nb_data_bands + 1))
+        )
+        return data + b"\xff" * (tile_size * tile_size)
+    return dstile.ReadRaster()
 
-    tilebands = dataBandsCount + 1
 
+def _get_source_dataset(tile_job_info: "TileJobInfo") -> gdal.Dataset:
+    """Return the source dataset, kept open across calls in a thread"""
     cached_ds = getattr(threadLocal, "cached_ds", None)
     if cached_ds and cached_ds.GetDescription() == tile_job_info.src_file:
-        ds = cached_ds
-    else:
-        ds = gdal.Open(tile_job_info.src_file, gdal.GA_ReadOnly)
-        threadLocal.cached_ds = ds
+        return cached_ds
+    ds = gdal.Open(tile_job_info.src_file, gdal.GA_ReadOnly)
+    threadLocal.cached_ds = ds
+    return ds
+
+
+def _write_tile(
+    tile_job_info: "TileJobInfo",
+    dstile: gdal.Dataset,
+    tilefilename: str,
+    raw_tile: Optional[bytes] = None,
+) -> Optional[bytes]:
+    """
+    Encode a tile dataset with the tile driver into tilefilename, or, when
+    tiles are written into a container, return the encoded tile.
+
+    When tile deduplication is enabled, a tile whose raw content (raw_tile,
+    computed if not provided) is identical to a recently generated tile is
+    not encoded again: the previous encoded tile is returned, or the previous
+    tile file is hard linked (or copied) to tilefilename.
+    """
+    container = getattr(tile_job_info.options, "container", None)
+
+    deduplicator = _get_tile_deduplicator(tile_job_info)
+    if deduplicator:
+        if raw_tile is None:
+            raw_tile = _get_raw_tile(dstile, tile_job_info)
+        digest = deduplicator.digest(raw_tile)
+        previous_tile = deduplicator.get(digest)
+        if previous_tile is not None and (
+            container or _link_tile(previous_tile, tilefilename)
+        ):
+            deduplicator.hits += 1
+            return previous_tile if container else None
+        deduplicator.misses += 1
 
-    mem_drv = gdal.GetDriverByName("MEM")
     out_drv = gdal.GetDriverByName(tile_job_info.tile_driver)
+    if tile_job_info.tile_driver == "JPEG":
+        dstile = remove_alpha_band(dstile)
+
+    if container:
+        tmp_filename = "/vsimem/gdal2tiles/%s.%s" % (
+            uuid4(),
+            tile_job_info.tile_extension,
+        )
+        out_drv.CreateCopy(
+            tmp_filename,
+            dstile,
+            strict=0,
+            options=_get_creation_options(tile_job_info.options),
+        )
+        f = gdal.VSIFOpenL(tmp_filename, "rb")
+        gdal.VSIFSeekL(f, 0, os.SEEK_END)
+        size = gdal.VSIFTellL(f)
+        gdal.VSIFSeekL(f, 0, os.SEEK_SET)
+        data = gdal.VSIFReadL(1, size, f)
+        gdal.VSIFCloseL(f)
+        gdal.Unlink(tmp_filename)
+        if gdal.VSIStatL(tmp_filename + ".aux.xml") is not None:
+            gdal.Unlink(tmp_filename + ".aux.xml")
+        if deduplicator:
+            deduplicator.put(digest, data)
+        return data
+
+    if not tilefilename.startswith("/vsi"):
+        # Do not overwrite the content of tiles hard linked to this one by a
+        # previous deduplicated run
+        try:
+            if os.stat(tilefilename).st_nlink > 1:
+                os.unlink(tilefilename)
+        except FileNotFoundError:
+            pass
+
+    # Write a copy of tile to png/jpg
+    out_drv.CreateCopy(
+        tilefilename,
+        dstile,
+        strict=0,
+        options=_get_creation_options(tile_job_info.options),
+    )
+
+    # Remove useless side car file
+    aux_xml = tilefilename + ".aux.xml"
+    if gdal.VSIStatL(aux_xml) is not None:
+        gdal.Unlink(aux_xml)
+
+    if deduplicator:
+        deduplicator.put(digest, tilefilename)
+
+    return None
+
+
+def _link_tile(src_filename: str, tilefilename: str) -> bool:
+    """Make tilefilename a hard link to, or if not possible a copy of, the
+    src_filename tile. Returns False on failure"""
+    if gdal.VSIStatL(tilefilename) is not None:
+        gdal.Unlink(tilefilename)
+    if not tilefilename.startswith("/vsi"):
+        try:
+            os.link(src_filename, tilefilename)
+            return True
+        except OSError:
+            pass
+    try:
+        return gdal.CopyFile(src_filename, tilefilename) == 0
+    except RuntimeError:
+        return False
+
+
+def create_base_tile(
+    tile_job_info: "TileJobInfo", tmsMap: dict, tile_detail: "TileDetail"
+) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """
+    Generate a base tile from the source dataset.
+
+    Returns a (raw_tile, encoded_tile) tuple. raw_tile is the raw content of
+    the tile (see _get_raw_tile()) when the overview cache is enabled, and
+    encoded_tile the encoded tile when tiles are written into a container.
+    Both are None otherwise, or when the tile is skipped.
+    """
+
+    dataBandsCount = tile_job_info.nb_data_bands
+    options = tile_job_info.options
+
+    ds = _get_source_dataset(tile_job_info)
     alphaband = ds.GetRasterBand(1).GetMaskBand()
 
-    tx = tile_detail.tx
-    ty = tile_detail.ty
-    tz = tile_detail.tz
     rx = tile_detail.rx
     ry = tile_detail.ry
     rxsize = tile_detail.rxsize
@@ -1317,12 +1447,6 @@ def create_base_tile(
     wy = tile_detail.wy
     wxsize = tile_detail.wxsize
     wysize = tile_detail.wysize
-    querysize = tile_detail.querysize
-
-    # Tile dataset in memory
-    tilefilename = os.path.join(output, str(tz), str(tx), "%s.%s" % (ty, tileext))
-    dstile = mem_drv.Create("", tile_size, tile_size, tilebands)
-    dstile.GetRasterBand(tilebands).SetColorInterpretation(gdal.GCI_AlphaBand)
 
     data = alpha = None
 
@@ -1341,7 +1465,7 @@ def create_base_tile(
         if tile_job_info.exclude_transparent and len(alpha) == alpha.count(
             "\x00".encode("ascii")
         ):
-            return
+            return None, None
 
         data = ds.ReadRaster(
             rx,
@@ -1353,6 +1477,157 @@ def create_base_tile(
             band_list=list(range(1, dataBandsCount + 1)),
         )
 
+    return _write_base_tile(
+        tile_job_info,
+        tmsMap,
+        tile_detail,
+        data,
+        alpha,
+        (wx, wy, wxsize, wysize),
+        tile_detail.querysize,
+    )
+
+
+def create_base_metatile(
+    tile_job_info: "TileJobInfo", tmsMap: dict, tile_details: List["TileDetail"]
+) -> List[Tuple[Optional[bytes], Optional[bytes]]]:
+    """
+    Generate the base tiles of a metatile from a single read of the source
+    dataset covering all of them.
+
+    Returns, for each of tile_details, what create_base_tile() would return.
+    """
+
+    dataBandsCount = tile_job_info.nb_data_bands
+    options = tile_job_info.options
+    tilebands = dataBandsCount + 1
+
+    ds = _get_source_dataset(tile_job_info)
+    alphaband = ds.GetRasterBand(1).GetMaskBand()
+
+    metatile = tile_details[0].metatile
+    rx = metatile.rx
+    ry = metatile.ry
+    rxsize = metatile.rxsize
+    rysize = metatile.rysize
+    wx = metatile.wx
+    wy = metatile.wy
+    wxsize = metatile.wxsize
+    wysize = metatile.wysize
+
+    if options.verbose:
+        logger.debug(
+            f"\tMetatile ReadRaster Extent: ({rx}, {ry}, {rxsize}, {rysize}), ({wx}, {wy}, {wxsize}, {wysize})"
+        )
+
+    dsmeta = gdal.GetDriverByName("MEM").Create(
+        "", metatile.querysize, metatile.querysize, tilebands
+    )
+    if rxsize != 0 and rysize != 0 and wxsize != 0 and wysize != 0:
+        dsmeta.WriteRaster(
+            wx,
+            wy,
+            wxsize,
+            wysize,
+            ds.ReadRaster(
+                rx,
+                ry,
+                rxsize,
+                rysize,
+                wxsize,
+                wysize,
+                band_list=list(range(1, dataBandsCount + 1)),
+            ),
+            band_list=list(range(1, dataBandsCount + 1)),
+        )
+        dsmeta.GetRasterBand(tilebands).WriteRaster(
+            wx,
+            wy,
+            wxsize,
+            wysize,
+            alphaband.ReadRaster(rx, ry, rxsize, rysize, wxsize, wysize),
+        )
+
+    tiles = []
+    for tile_detail in tile_details:
+        querysize = tile_detail.querysize
+        tile_wx = tile_detail.metatile_col * querysize
+        tile_wy = tile_detail.metatile_row * querysize
+
+        alpha = dsmeta.GetRasterBand(tilebands).ReadRaster(
+            tile_wx, tile_wy, querysize, querysize
+        )
+
+        # Detect totally transparent tile and skip its creation
+        if tile_job_info.exclude_transparent and len(alpha) == alpha.count(
+            "\x00".encode("ascii")
+        ):
+            tiles.append((None, None))
+            continue
+
+        data = dsmeta.ReadRaster(
+            tile_wx,
+            tile_wy,
+            querysize,
+            querysize,
+            band_list=list(range(1, dataBandsCount + 1)),
+        )
+
+        tiles.append(
+            _write_base_tile(
+                tile_job_info,
+                tmsMap,
+                tile_detail,
+                data,
+                alpha,
+                (0, 0, querysize, querysize),
+                querysize,
+            )
+        )
+
+    return tiles
+
+
+def _write_base_tile(
+    tile_job_info: "TileJobInfo",
+    tmsMap: dict,
+    tile_detail: "TileDetail",
+    data: Optional[bytes],
+    alpha: Optional[bytes],
+    window: Tuple[int, int, int, int],
+    querysize: int,
+) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """
+    Write a base tile (and its KML file) from the data and alpha buffers read
+    from the source dataset into the window (wx, wy, wxsize, wysize) of a
+    querysize x querysize query.
+
+    Returns the same as create_base_tile().
+    """
+
+    if tmsMap is None:
+        _, tmsMap = get_profile_list_and_tmsMap()
+
+    dataBandsCount = tile_job_info.nb_data_bands
+    output = tile_job_info.output_file_path
+    tileext = tile_job_info.tile_extension
+    tile_size = tile_job_info.tile_size
+    options = tile_job_info.options
+
+    tilebands = dataBandsCount + 1
+
+    mem_drv = gdal.GetDriverByName("MEM")
+
+    tx = tile_detail.tx
+    ty = tile_detail.ty
+    tz = tile_detail.tz
+    wx, wy, wxsize, wysize = window
+
+    # Tile dataset in memory
+    tilefilename = os.path.join(output, str(tz), str(tx), "%s.%s" % (ty, tileext))
+    dstile = mem_drv.Create("", tile_size, tile_size, tilebands)
+    dstile.GetRasterBand(tilebands).SetColorInterpretation(gdal.GCI_AlphaBand)
+
     # The tile in memory is a transparent file by default. Write pixel values into it if
     # any
     if data:
@@ -1395,18 +1670,11 @@ def create_base_tile(
 
     del data
 
-    # Write a copy of tile to png/jpg
-    out_drv.CreateCopy(
-        tilefilename,
-        dstile if tile_job_info.tile_driver != "JPEG" else remove_alpha_band(dstile),
-        strict=0,
-        options=_get_creation_options(options),
-    )
+    raw_tile = None
+    if _overview_cache_enabled(tile_job_info, tz):
+        raw_tile = _get_raw_tile(dstile, tile_job_info)
 
-    # Remove useless side car file
-    aux_xml = tilefilename + ".aux.xml"
-    if gdal.VSIStatL(aux_xml) is not None:
-        gdal.Unlink(aux_xml)
+    encoded_tile = _write_tile(tile_job_info, dstile, tilefilename, raw_tile)
 
     del dstile
 
@@ -1435,6 +1703,8 @@ def create_base_tile(
                         ).encode("utf-8")
                     )
 
+    return raw_tile, encoded_tile
+
 
 def remove_alpha_band(src_ds):
     if (
@@ -1475,8 +1745,17 @@ def create_overview_tile(
     tile_job_info: "TileJobInfo",
     options: Options,
     tmsMap: dict,
-):
-    """Generating an overview tile from no more than 4 underlying tiles(base tiles)"""
+    base_tiles_data: Optional[Dict[Tuple[int, int], bytes]] = None,
+) -> Tuple[Optional[bytes], Optional[bytes]]:
+    """
+    Generating an overview tile from no more than 4 underlying tiles(base tiles)
+
+    base_tiles_data may contain the raw content of some of the base tiles, as
+    returned by create_base_tile() or create_overview_tile(), in which case
+    they are used instead of reading back the encoded tiles.
+
+    Returns a (raw_tile, encoded_tile) tuple, as create_base_tile().
+    """
 
     if tmsMap is None:
         _, tmsMap = get_profile_list_and_tmsMap()
@@ -1492,16 +1771,20 @@ def create_overview_tile(
         str(overview_tx),
         "%s.%s" % (overview_ty_real, tile_job_info.tile_extension),
     )
+    tile_container = _get_tile_container(tile_job_info)
+
     if options.verbose:
         logger.debug(tilefilename)
-    if options.resume and isfile(tilefilename):
+    if options.resume and (
+        tile_container.has_tile(overview_tz, overview_tx, overview_ty)
+        if tile_container
+        else isfile(tilefilename)
+    ):
         if options.verbose:
             logger.debug("Tile generation skipped because of --resume")
-        return
+        return None, None
 
     mem_driver = gdal.GetDriverByName("MEM")
-    tile_driver = tile_job_info.tile_driver
-    out_driver = gdal.GetDriverByName(tile_driver)
 
     tilebands = tile_job_info.nb_data_bands + 1
 
@@ -1522,17 +1805,6 @@ def create_overview_tile(
         base_ty = base_tile[1]
         base_ty_real = GDAL2Tiles.getYTile(base_ty, base_tz, options, tmsMap)
 
-        base_tile_path = os.path.join(
-            output_folder,
-            str(base_tz),
-            str(base_tx),
-            "%s.%s" % (base_ty_real, tile_job_info.tile_extension),
-        )
-        if not isfile(base_tile_path):
-            continue
-
-        dsquerytile = gdal.Open(base_tile_path, gdal.GA_ReadOnly)
-
         if base_tx % 2 == 0:
             tileposx = 0
         else:
@@ -1549,6 +1821,43 @@ def create_overview_tile(
             else:
                 tileposy = 0
 
+        if base_tiles_data and (base_tx, base_ty) in base_tiles_data:
+            dsquery.WriteRaster(
+                tileposx,
+                tileposy,
+                tile_job_info.tile_size,
+                tile_job_info.tile_size,
+                base_tiles_data[(base_tx, base_ty)],
+                band_list=list(range(1, tilebands + 1)),
+            )
+            usable_base_tiles.append(base_tile)
+            continue
+
+        if tile_container:
+            base_tile_content = tile_container.read_tile(base_tz, base_tx, base_ty)
+            if base_tile_content is None:
+                continue
+            base_tile_path = "/vsimem/gdal2tiles/%s.%s" % (
+                uuid4(),
+                tile_job_info.tile_extension,
+            )
+            gdal.FileFromMemBuffer(base_tile_path, base_tile_content)
+            dsquerytile = mem_driver.CreateCopy(
+                "", gdal.Open(base_tile_path, gdal.GA_ReadOnly)
+            )
+            gdal.Unlink(base_tile_path)
+        else:
+            base_tile_path = os.path.join(
+                output_folder,
+                str(base_tz),
+                str(base_tx),
+                "%s.%s" % (base_ty_real, tile_job_info.tile_extension),
+            )
+            if not isfile(base_tile_path):
+                continue
+
+            dsquerytile = gdal.Open(base_tile_path, gdal.GA_ReadOnly)
+
         if (
             tile_job_info.tile_driver == "JPEG"
             and dsquerytile.RasterCount == 3
@@ -1615,21 +1924,15 @@ def create_overview_tile(
         usable_base_tiles.append(base_tile)
 
     if not usable_base_tiles:
-        return
+        return None, None
 
     scale_query_to_tile(dsquery, dstile, options, tilefilename=tilefilename)
 
-    # Write a copy of tile to png/jpg
-    out_driver.CreateCopy(
-        tilefilename,
-        dstile if tile_job_info.tile_driver != "JPEG" else remove_alpha_band(dstile),
-        strict=0,
-        options=_get_creation_options(options),
-    )
-    # Remove useless side car file
-    aux_xml = tilefilename + ".aux.xml"
-    if gdal.VSIStatL(aux_xml) is not None:
-        gdal.Unlink(aux_xml)
+    raw_tile = None
+    if _overview_cache_enabled(tile_job_info, overview_tz):
+        raw_tile = _get_raw_tile(dstile, tile_job_info)
+
+    encoded_tile = _write_tile(tile_job_info, dstile, tilefilename, raw_tile)
 
     if options.verbose:
         logger.debug(
@@ -1662,6 +1965,8 @@ def create_overview_tile(
                     ).encode("utf-8")
                 )
 
+    return raw_tile, encoded_tile
+
 
 def group_overview_base_tiles(
     base_tz: int, output_folder: str, tile_job_info: "TileJobInfo"
@@ -1684,10 +1989,13 @@ def group_overview_base_tiles(
 
     # Create directories for the tiles
     overview_tz = base_tz - 1
-    for tx in range(tminx, tmaxx + 1):
-        overview_tx = tx >> 1
-        tiledirname = os.path.join(output_folder, str(overview_tz), str(overview_tx))
-        makedirs(tiledirname)
+    if not getattr(tile_job_info.options, "container", None):
+        for tx in range(tminx, tmaxx + 1):
+            overview_tx = tx >> 1
+            tiledirname = os.path.join(
+                output_folder, str(overview_tz), str(overview_tx)
+            )
+            makedirs(tiledirname)
 
     return list(overview_to_bases.values())
 
@@ -1701,6 +2009,609 @@ def count_overview_tiles(tile_job_info: "TileJobInfo") -> int:
     return tile_number
 
 
+class RawTileCache:
+    """
+    Bounded cache of raw (decoded) tiles, keyed by (tz, tx, ty), used to build
+    overview tiles without decoding the tiles written on disk.
+
+    Tiles that do not fit within max_bytes are spilled, oldest first, as raw
+    files in spill_dir.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: str) -> None:
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.mem_tiles: Dict[Tuple[int, int, int], bytes] = {}
+        self.mem_bytes = 0
+        self.spilled_tiles = set()
+        # Jobs may be consumed from a pool feeder thread
+        self.lock = threading.Lock()
+
+    def _spill_filename(self, key: Tuple[int, int, int]) -> str:
+        return os.path.join(self.spill_dir, "%d_%d_%d.raw" % key)
+
+    def put(self, key: Tuple[int, int, int], data: Optional[bytes]) -> None:
+        if data is None:
+            return
+        with self.lock:
+            self.mem_tiles[key] = data
+            self.mem_bytes += len(data)
+            while self.mem_bytes > self.max_bytes and self.mem_tiles:
+                oldest_key = next(iter(self.mem_tiles))
+                oldest_data = self.mem_tiles.pop(oldest_key)
+                self.mem_bytes -= len(oldest_data)
+                with open(self._spill_filename(oldest_key), "wb") as f:
+                    f.write(oldest_data)
+                self.spilled_tiles.add(oldest_key)
+
+    def pop(self, key: Tuple[int, int, int]) -> Optional[bytes]:
+        with self.lock:
+            data = self.mem_tiles.pop(key, None)
+            if data is not None:
+                self.mem_bytes -= len(data)
+                return data
+            if key not in self.spilled_tiles:
+                return None
+            self.spilled_tiles.remove(key)
+            filename = self._spill_filename(key)
+            with open(filename, "rb") as f:
+                data = f.read()
+            os.unlink(filename)
+            return data
+
+    def pop_base_tiles(
+        self, base_tz: int, base_tiles: List[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], bytes]:
+        """Extract the raw content of the base tiles of an overview tile"""
+        base_tiles_data = {}
+        for tx, ty in base_tiles:
+            data = self.pop((base_tz, tx, ty))
+            if data is not None:
+                base_tiles_data[(tx, ty)] = data
+        return base_tiles_data
+
+
+class TileDeduplicator:
+    """
+    LRU of the digests of the raw content of the last generated tiles, used
+    to avoid encoding again identical tiles, such as blank or ocean tiles.
+
+    Each digest maps to the encoded tile when tiles are written into a
+    container, or to the filename of the tile otherwise.
+    """
+
+    max_entries = 256
+
+    def __init__(self) -> None:
+        self.entries: Dict[bytes, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(raw_tile: bytes) -> bytes:
+        return hashlib.blake2b(raw_tile, digest_size=16).digest()
+
+    def get(self, digest: bytes) -> Any:
+        entry = self.entries.pop(digest, None)
+        if entry is not None:
+            # Move to the most recently used position
+            self.entries[digest] = entry
+        return entry
+
+    def put(self, digest: bytes, entry: Any) -> None:
+        self.entries.pop(digest, None)
+        self.entries[digest] = entry
+        if len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def pop_stats(self) -> Tuple[int, int]:
+        """Return and reset the number of deduplicated and encoded tiles"""
+        stats = (self.hits, self.misses)
+        self.hits = 0
+        self.misses = 0
+        return stats
+
+
+class DedupStats:
+    """Deduplication statistics of the tile jobs, gathered in the main process"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, stats: Tuple[int, int]) -> None:
+        self.hits += stats[0]
+        self.misses += stats[1]
+
+    def report(self, options: Options) -> None:
+        total = self.hits + self.misses
+        if total and not options.quiet:
+            logger.info(
+                "Tile deduplication: %d of %d tiles reused (%.1f%% hit rate)"
+                % (self.hits, total, 100.0 * self.hits / total)
+            )
+
+
+def _get_tile_deduplicator(tile_job_info: "TileJobInfo") -> Optional[TileDeduplicator]:
+    """Return the tile deduplicator of the current thread, or None if tile
+    deduplication is disabled"""
+    if not getattr(tile_job_info.options, "dedup", False):
+        return None
+    deduplicator = getattr(threadLocal, "tile_deduplicator", None)
+    if deduplicator is None:
+        deduplicator = TileDeduplicator()
+        threadLocal.tile_deduplicator = deduplicator
+    return deduplicator
+
+
+def _pop_dedup_stats(tile_job_info: "TileJobInfo") -> Tuple[int, int]:
+    deduplicator = _get_tile_deduplicator(tile_job_info)
+    return deduplicator.pop_stats() if deduplicator else (0, 0)
+
+
+class TileContainer:
+    """
+    Base class of the single file containers (MBTiles, GeoPackage) tiles can
+    be written into instead of a directory tree.
+
+    Tiles are identified by their zoom level and TMS column and row. Writes
+    are batched in transactions of batch_size tiles.
+    """
+
+    batch_size = 1000
+
+    def __init__(self, filename: str, options: Options, update: bool = False) -> None:
+        self.filename = filename
+        self.options = options
+        self.update = update
+        self._conn = None
+        self.pending_tiles = []
+
+    @property
+    def conn(self) -> Optional[sqlite3.Connection]:
+        """Connection to the container. In read-only mode, None as long as
+        the container does not exist"""
+        if self._conn is None:
+            if self.update:
+                self._conn = sqlite3.connect(self.filename, timeout=60)
+            elif isfile(self.filename):
+                self._conn = sqlite3.connect(
+                    "file:%s?mode=ro" % pathname2url(os.path.abspath(self.filename)),
+                    uri=True,
+                    timeout=60,
+                )
+        return self._conn
+
+    def has_tile(self, tz: int, tx: int, ty: int) -> bool:
+        return self.read_tile(tz, tx, ty) is not None
+
+    def read_tile(self, tz: int, tx: int, ty: int) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def create(self, tile_job_info: "TileJobInfo") -> None:
+        """Create the tables and metadata of the container, if needed"""
+        raise NotImplementedError
+
+    def _flush(self) -> None:
+        raise NotImplementedError
+
+    def write_tile(self, tz: int, tx: int, ty: int, data: bytes) -> None:
+        self.pending_tiles.append((tz, tx, ty, data))
+        if len(self.pending_tiles) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending_tiles:
+            with self.conn:
+                self._flush()
+            self.pending_tiles = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class MBTilesContainer(TileContainer):
+    """MBTiles 1.3 container. Only the mercator profile is supported.
+
+    With tile deduplication, tiles are stored in a map table referencing
+    blobs of an images table, shared by identical tiles, and exposed through
+    a tiles view.
+    """
+
+    shared_blobs = False
+
+    def read_tile(self, tz: int, tx: int, ty: int) -> Optional[bytes]:
+        if self.conn is None:
+            return None
+        try:
+            # Fetch all rows so that no read lock is kept on the container
+            rows = self.conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND "
+                "tile_column = ? AND tile_row = ?",
+                (tz, tx, ty),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # tiles table not created yet
+            return None
+        return rows[0][0] if rows else None
+
+    def create(self, tile_job_info: "TileJobInfo") -> None:
+        mercator = GlobalMercator(tile_job_info.tile_size)
+        tminx, tminy, tmaxx, tmaxy = tile_job_info.tminmax[tile_job_info.tmaxz]
+        south, west, _, _ = mercator.TileLatLonBounds(tminx, tminy, tile_job_info.tmaxz)
+        _, _, north, east = mercator.TileLatLonBounds(tmaxx, tmaxy, tile_job_info.tmaxz)
+        metadata = {
+            "name": self.options.title,
+            "type": "overlay",
+            "version": "1.3",
+            "description": self.options.title,
+            "format": tile_job_info.tile_extension,
+            "bounds": "%.8f,%.8f,%.8f,%.8f" % (west, south, east, north),
+            "minzoom": str(tile_job_info.tminz),
+            "maxzoom": str(tile_job_info.tmaxz),
+        }
+        if self.options.copyright:
+            metadata["attribution"] = self.options.copyright
+
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS metadata (name text, value text)"
+            )
+            rows = self.conn.execute(
+                "SELECT type FROM sqlite_master WHERE name = 'tiles'"
+            ).fetchall()
+            if rows:
+                self.shared_blobs = rows[0][0] == "view"
+            else:
+                self.shared_blobs = bool(getattr(self.options, "dedup", False))
+            if self.shared_blobs:
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS map (zoom_level integer, "
+                    "tile_column integer, tile_row integer, tile_id text)"
+                )
+                self.conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS map_index ON map "
+                    "(zoom_level, tile_column, tile_row)"
+                )
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS images (tile_data blob, tile_id text)"
+                )
+                self.conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS images_id ON images (tile_id)"
+                )
+                self.conn.execute(
+                    "CREATE VIEW IF NOT EXISTS tiles AS SELECT "
+                    "map.zoom_level AS zoom_level, "
+                    "map.tile_column AS tile_column, map.tile_row AS tile_row, "
+                    "images.tile_data AS tile_data FROM map "
+                    "JOIN images ON images.tile_id = map.tile_id"
+                )
+            else:
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS tiles (zoom_level integer, "
+                    "tile_column integer, tile_row integer, tile_data blob)"
+                )
+                self.conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles "
+                    "(zoom_level, tile_column, tile_row)"
+                )
+            self.conn.executemany(
+                "DELETE FROM metadata WHERE name = ?", [(k,) for k in metadata]
+            )
+            self.conn.executemany(
+                "INSERT INTO metadata (name, value) VALUES (?, ?)", metadata.items()
+            )
+
+    def _flush(self) -> None:
+        if not self.shared_blobs:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, "
+                "tile_data) VALUES (?, ?, ?, ?)",
+                self.pending_tiles,
+            )
+            return
+
+        images = {}
+        tiles = []
+        for tz, tx, ty, data in self.pending_tiles:
+            tile_id = hashlib.blake2b(data, digest_size=16).hexdigest()
+            images[tile_id] = data
+            tiles.append((tz, tx, ty, tile_id))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO images (tile_id, tile_data) VALUES (?, ?)",
+            images.items(),
+        )
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO map (zoom_level, tile_column, tile_row, "
+            "tile_id) VALUES (?, ?, ?, ?)",
+            tiles,
+        )
+
+
+class GPKGContainer(TileContainer):
+    """GeoPackage tile pyramid container. Only the mercator and geodetic
+    profiles are supported"""
+
+    def __init__(self, filename: str, options: Options, update: bool = False) -> None:
+        if update and not isfile(filename):
+            # Let the GPKG driver create the mandatory tables
+            ds = gdal.GetDriverByName("GPKG").Create(
+                filename, 0, 0, 0, gdal.GDT_Unknown
+            )
+            if ds is None:
+                raise Exception(f"Cannot create {filename}")
+            ds = None
+        super().__init__(filename, options, update)
+        self.table_name = os.path.splitext(os.path.basename(filename))[0]
+        self.quoted_table_name = '"%s"' % self.table_name.replace('"', '""')
+
+    def read_tile(self, tz: int, tx: int, ty: int) -> Optional[bytes]:
+        if self.conn is None:
+            return None
+        try:
+            # Fetch all rows so that no read lock is kept on the container
+            rows = self.conn.execute(
+                "SELECT tile_data FROM %s WHERE zoom_level = ? AND "
+                "tile_column = ? AND tile_row = ?" % self.quoted_table_name,
+                (tz, tx, 2**tz - 1 - ty),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # tile table not created yet
+            return None
+        return rows[0][0] if rows else None
+
+    def create(self, tile_job_info: "TileJobInfo") -> None:
+        tile_size = tile_job_info.tile_size
+        if self.options.profile == "mercator":
+            srs_id = 3857
+            profile = GlobalMercator(tile_size)
+            matrix_width = 1
+            bounds = profile.TileBounds(0, 0, 0)
+        else:
+            srs_id = 4326
+            profile = GlobalGeodetic(self.options.tmscompatible, tile_size)
+            matrix_width = 2 if self.options.tmscompatible else 1
+            bounds = profile.TileBounds(0, 0, 0)
+            bounds = (bounds[0], bounds[1], 180.0, bounds[3])
+
+        tminx, tminy, tmaxx, tmaxy = tile_job_info.tminmax[tile_job_info.tmaxz]
+        data_min_x, data_min_y, _, _ = profile.TileBounds(
+            tminx, tminy, tile_job_info.tmaxz
+        )
+        _, _, data_max_x, data_max_y = profile.TileBounds(
+            tmaxx, tmaxy, tile_job_info.tmaxz
+        )
+
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(srs_id)
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO gpkg_spatial_ref_sys (srs_name, srs_id, "
+                "organization, organization_coordsys_id, definition) "
+                "VALUES (?, ?, 'EPSG', ?, ?)",
+                (srs.GetName(), srs_id, srs_id, srs.ExportToWkt()),
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS gpkg_tile_matrix_set ("
+                "table_name TEXT NOT NULL PRIMARY KEY, srs_id INTEGER NOT NULL, "
+                "min_x DOUBLE NOT NULL, min_y DOUBLE NOT NULL, "
+                "max_x DOUBLE NOT NULL, max_y DOUBLE NOT NULL, "
+                "CONSTRAINT fk_gtms_table_name FOREIGN KEY (table_name) "
+                "REFERENCES gpkg_contents(table_name), "
+                "CONSTRAINT fk_gtms_srs FOREIGN KEY (srs_id) "
+                "REFERENCES gpkg_spatial_ref_sys (srs_id))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS gpkg_tile_matrix ("
+                "table_name TEXT NOT NULL, zoom_level INTEGER NOT NULL, "
+                "matrix_width INTEGER NOT NULL, matrix_height INTEGER NOT NULL, "
+                "tile_width INTEGER NOT NULL, tile_height INTEGER NOT NULL, "
+                "pixel_x_size DOUBLE NOT NULL, pixel_y_size DOUBLE NOT NULL, "
+                "CONSTRAINT pk_ttm PRIMARY KEY (table_name, zoom_level), "
+                "CONSTRAINT fk_tmm_table_name FOREIGN KEY (table_name) "
+                "REFERENCES gpkg_contents(table_name))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS %s ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "zoom_level INTEGER NOT NULL, tile_column INTEGER NOT NULL, "
+                "tile_row INTEGER NOT NULL, tile_data BLOB NOT NULL, "
+                "UNIQUE (zoom_level, tile_column, tile_row))" % self.quoted_table_name
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO gpkg_contents (table_name, data_type, "
+                "identifier, description, min_x, min_y, max_x, max_y, srs_id) "
+                "VALUES (?, 'tiles', ?, '', ?, ?, ?, ?, ?)",
+                (
+                    self.table_name,
+                    self.table_name,
+                    data_min_x,
+                    data_min_y,
+                    data_max_x,
+                    data_max_y,
+                    srs_id,
+                ),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO gpkg_tile_matrix_set (table_name, srs_id, "
+                "min_x, min_y, max_x, max_y) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.table_name, srs_id) + tuple(bounds),
+            )
+            for tz in range(tile_job_info.tminz, tile_job_info.tmaxz + 1):
+                res = profile.Resolution(tz)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO gpkg_tile_matrix (table_name, "
+                    "zoom_level, matrix_width, matrix_height, tile_width, "
+                    "tile_height, pixel_x_size, pixel_y_size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self.table_name,
+                        tz,
+                        matrix_width * 2**tz,
+                        2**tz,
+                        tile_size,
+                        tile_size,
+                        res,
+                        res,
+                    ),
+                )
+            if tile_job_info.tile_driver == "WEBP":
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS gpkg_extensions ("
+                    "table_name TEXT, column_name TEXT, "
+                    "extension_name TEXT NOT NULL, definition TEXT NOT NULL, "
+                    "scope TEXT NOT NULL, CONSTRAINT ge_tce UNIQUE "
+                    "(table_name, column_name, extension_name))"
+                )
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO gpkg_extensions (table_name, "
+                    "column_name, extension_name, definition, scope) VALUES "
+                    "(?, 'tile_data', 'gpkg_webp', "
+                    "'http://www.geopackage.org/spec120/#extension_tiles_webp', "
+                    "'read-write')",
+                    (self.table_name,),
+                )
+
+    def _flush(self) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO %s (zoom_level, tile_column, tile_row, "
+            "tile_data) VALUES (?, ?, ?, ?)" % self.quoted_table_name,
+            [
+                (tz, tx, 2**tz - 1 - ty, data)
+                for tz, tx, ty, data in self.pending_tiles
+            ],
+        )
+
+
+tile_container_classes = {"MBTILES": MBTilesContainer, "GPKG": GPKGContainer}
+
+
+def _get_tile_container(tile_job_info: "TileJobInfo") -> Optional[TileContainer]:
+    """Return a read-only connection to the tile container, kept open across
+    calls in a thread, or None when writing tiles in a directory"""
+    container = getattr(tile_job_info.options, "container", None)
+    if not container:
+        return None
+    cached_container = getattr(threadLocal, "cached_tile_container", None)
+    if cached_container and cached_container.filename == tile_job_info.output_file_path:
+        return cached_container
+    cached_container = tile_container_classes[container](
+        tile_job_info.output_file_path, tile_job_info.options
+    )
+    threadLocal.cached_tile_container = cached_container
+    return cached_container
+
+
+def _create_tile_writer(tile_job_info: "TileJobInfo") -> Optional[TileContainer]:
+    """Create the tile container in which the main process writes the tiles
+    generated by the workers, or return None when writing tiles in a directory"""
+    container = getattr(tile_job_info.options, "container", None)
+    if not container:
+        return None
+    writer = tile_container_classes[container](
+        tile_job_info.output_file_path, tile_job_info.options, update=True
+    )
+    writer.create(tile_job_info)
+    return writer
+
+
+def _create_overview_cache(tile_job_info: "TileJobInfo") -> Optional[RawTileCache]:
+    overview_cache = getattr(tile_job_info.options, "overview_cache", None)
+    if not overview_cache or tile_job_info.tmaxz <= tile_job_info.tminz:
+        return None
+    return RawTileCache(
+        int(overview_cache * 1024 * 1024), os.path.dirname(tile_job_info.src_file)
+    )
+
+
+def group_base_tiles_by_metatile(
+    tile_details: List["TileDetail"],
+) -> List[List["TileDetail"]]:
+    """Group base tiles that belong to the same metatile. Without metatiles,
+    each tile is in its own group"""
+
+    metatile_to_tiles = {}
+    for tile_detail in tile_details:
+        if tile_detail.metatile:
+            key = (tile_detail.metatile.tx, tile_detail.metatile.ty)
+        else:
+            key = (tile_detail.tx, tile_detail.ty_tms)
+        if key not in metatile_to_tiles:
+            metatile_to_tiles[key] = []
+        metatile_to_tiles[key].append(tile_detail)
+
+    return list(metatile_to_tiles.values())
+
+
+TileResult = Tuple[Tuple[int, int, int], Optional[bytes], Optional[bytes]]
+# Results of the tiles of a job, and its deduplication statistics
+TileJobResult = Tuple[List[TileResult], Tuple[int, int]]
+
+
+def _create_base_tile_job(
+    tile_job_info: "TileJobInfo",
+    tile_details: List["TileDetail"],
+    tmsMap: Optional[dict] = None,
+) -> TileJobResult:
+    """Generate a group of base tiles (see group_base_tiles_by_metatile()) and
+    return the key, the raw content and the encoded content of each of them"""
+    if tile_details[0].metatile:
+        tiles = create_base_metatile(tile_job_info, tmsMap, tile_details)
+    else:
+        tiles = [create_base_tile(tile_job_info, tmsMap, tile_details[0])]
+    results = [
+        ((tile_detail.tz, tile_detail.tx, tile_detail.ty_tms), raw_tile, encoded_tile)
+        for tile_detail, (raw_tile, encoded_tile) in zip(tile_details, tiles)
+    ]
+    return results, _pop_dedup_stats(tile_job_info)
+
+
+def _create_overview_tile_job(
+    base_tz: int,
+    output_folder: str,
+    tile_job_info: "TileJobInfo",
+    options: Options,
+    job: Tuple[List[Tuple[int, int]], Optional[Dict[Tuple[int, int], bytes]]],
+    tmsMap: Optional[dict] = None,
+) -> TileJobResult:
+    """Generate an overview tile and return its key, raw content and encoded
+    content"""
+    base_tiles, base_tiles_data = job
+    raw_tile, encoded_tile = create_overview_tile(
+        base_tz,
+        base_tiles,
+        output_folder,
+        tile_job_info,
+        options,
+        tmsMap,
+        base_tiles_data,
+    )
+    key = (base_tz - 1, base_tiles[0][0] >> 1, base_tiles[0][1] >> 1)
+    return [(key, raw_tile, encoded_tile)], _pop_dedup_stats(tile_job_info)
+
+
+def _store_tile_results(
+    job_result: TileJobResult,
+    overview_cache: Optional[RawTileCache],
+    tile_writer: Optional[TileContainer],
+    dedup_stats: DedupStats,
+) -> int:
+    """Dispatch the results of a tile job to the overview cache and the tile
+    container writer, and return the number of processed tiles"""
+    results, job_dedup_stats = job_result
+    dedup_stats.add(job_dedup_stats)
+    for key, raw_tile, encoded_tile in results:
+        if overview_cache:
+            overview_cache.put(key, raw_tile)
+        if tile_writer and encoded_tile is not None:
+            tile_writer.write_tile(*key, encoded_tile)
+    return len(results)
+
+
 def optparse_init() -> Tuple[optparse.OptionParser, Dict[Any, Any]]:
     """Prepare the option parser for input (argv)"""
 
@@ -1841,6 +2752,32 @@ def optparse_init() -> Tuple[optparse.OptionParser, Dict[Any, Any]]:
         default=100,
         help="Minimum percentage of source pixels that must be at nodata (or alpha=0 or any other way to express transparent pixel) to cause the target pixel value to be transparent. Default value is 100 (%). Only taken into account for average resampling",
     )
+    p.add_option(
+        "--metatile",
+        dest="metatile",
+        metavar="N",
+        type="int",
+        help="Read the source dataset by windows of N x N base tiles, instead of one tile at a time. Not supported with the raster profile.",
+    )
+    p.add_option(
+        "--depth-first",
+        dest="depth_first",
+        action="store_true",
+        help="Walk the tile pyramid depth-first, generating each overview tile as soon as its child tiles are available, instead of one zoom level after the other.",
+    )
+    p.add_option(
+        "--overview-cache",
+        dest="overview_cache",
+        metavar="MEGABYTES",
+        type=float,
+        help="Build overview tiles from raw child tiles kept in a cache of the specified size (in megabytes), instead of decoding the tiles written on disk. Tiles that do not fit in the cache are spilled as raw temporary files.",
+    )
+    p.add_option(
+        "--dedup",
+        dest="dedup",
+        action="store_true",
+        help="Do not encode again tiles identical to a recently generated tile, such as blank or ocean tiles: they are written as hard links to the previous tile, or share its content in MBTiles outputs.",
+    )
 
     # KML options
     g = optparse.OptionGroup(
@@ -2073,6 +3010,46 @@ def options_post_processing(
             exit_with_error("jpeg_quality should be in the range [1-100]")
         options.jpeg_quality = int(options.jpeg_quality)
 
+    if getattr(options, "overview_cache", None) is not None:
+        if options.overview_cache <= 0:
+            exit_with_error("overview_cache should be strictly positive")
+
+    # Tiles written into a single file container rather than in a directory
+    options.container = {".mbtiles": "MBTILES", ".gpkg": "GPKG"}.get(
+        os.path.splitext(output_folder)[1].lower()
+    )
+    if options.container:
+        if output_folder.startswith("/vsi"):
+            exit_with_error("MBTiles and GeoPackage outputs must be local files")
+        if options.container == "MBTILES" and options.profile != "mercator":
+            exit_with_error(
+                "MBTiles output is only supported with the mercator profile"
+            )
+        if options.container == "GPKG" and options.profile not in (
+            "mercator",
+            "geodetic",
+        ):
+            exit_with_error(
+                "GeoPackage output is only supported with the mercator and geodetic profiles"
+            )
+        if options.xyz:
+            exit_with_error(
+                "--xyz is not supported with MBTiles and GeoPackage outputs"
+            )
+        # Web viewers and KML files refer to tiles as files
+        options.webviewer = "none"
+        options.kml = False
+        # Overview tiles cannot be read back from the container while it is
+        # being written, so always transmit child tiles in memory
+        if getattr(options, "overview_cache", None) is None:
+            options.overview_cache = 256
+
+    if getattr(options, "metatile", None) is not None:
+        if options.metatile < 1:
+            exit_with_error("metatile should be a strictly positive integer")
+        if options.metatile > 1 and options.profile == "raster":
+            exit_with_error("--metatile is not supported with the raster profile")
+
     # Output the results
     if options.verbose:
         logger.debug("Options: %s" % str(options))
@@ -2097,6 +3074,9 @@ class TileDetail:
     wxsize = 0
     wysize = 0
     querysize = 0
+    metatile = None
+    metatile_col = 0
+    metatile_row = 0
 
     def __init__(self, **kwargs):
         for key in kwargs:
@@ -2110,6 +3090,37 @@ class TileDetail:
         return "TileDetail %s\n%s\n%s\n" % (self.tx, self.ty, self.tz)
 
 
+class MetaTileDetail:
+    """
+    Source window of a metatile, i.e. a group of N x N base tiles read at once.
+    tx and ty are the metatile indices, and querysize the size of the whole
+    metatile query.
+    """
+
+    tx = 0
+    ty = 0
+    rx = 0
+    ry = 0
+    rxsize = 0
+    rysize = 0
+    wx = 0
+    wy = 0
+    wxsize = 0
+    wysize = 0
+    querysize = 0
+
+    def __init__(self, **kwargs):
+        for key in kwargs:
+            if hasattr(self, key):
+                setattr(self, key, kwargs[key])
+
+    def __str__(self):
+        return "MetaTileDetail %s\n%s\n" % (self.tx, self.ty)
+
+    def __repr__(self):
+        return "MetaTileDetail %s\n%s\n" % (self.tx, self.ty)
+
+
 class TileJobInfo:
     """
     Plain object to hold tile job configuration for a dataset
@@ -2194,7 +3205,11 @@ class GDAL2Tiles:
             self.tileext = "webp"
         else:
             self.tileext = "jpg"
-        if options.mpi:
+        if options.mpi and getattr(options, "container", None):
+            self.tmp_dir = tempfile.mkdtemp(
+                dir=os.path.dirname(os.path.abspath(output_folder))
+            )
+        elif options.mpi:
             makedirs(output_folder)
             self.tmp_dir = tempfile.mkdtemp(dir=output_folder)
         else:
@@ -2675,6 +3690,10 @@ class GDAL2Tiles:
         tiles are generated during the tile processing).
         """
 
+        if self.options.container:
+            # Metadata is written by the container writer
+            return
+
         makedirs(self.output_folder)
 
         if self.options.profile == "mercator":
@@ -2824,12 +3843,22 @@ class GDAL2Tiles:
 
         tile_details = []
 
+        metatile_size = self.options.metatile or 1
+        metatiles = {}
+
         tz = self.tmaxz
 
         # Create directories for the tiles
-        for tx in range(tminx, tmaxx + 1):
-            tiledirname = os.path.join(self.output_folder, str(tz), str(tx))
-            makedirs(tiledirname)
+        if not self.options.container:
+            for tx in range(tminx, tmaxx + 1):
+                tiledirname = os.path.join(self.output_folder, str(tz), str(tx))
+                makedirs(tiledirname)
+
+        tile_container = None
+        if self.options.container and self.options.resume:
+            tile_container = tile_container_classes[self.options.container](
+                self.output_folder, self.options
+            )
 
         for ty in range(tmaxy, tminy - 1, -1):
             for tx in range(tminx, tmaxx + 1):
@@ -2845,20 +3874,17 @@ class GDAL2Tiles:
                 if self.options.verbose:
                     logger.debug("%d / %d, %s" % (ti, tcount, tilefilename))
 
-                if self.options.resume and isfile(tilefilename):
+                if self.options.resume and (
+                    tile_container.has_tile(tz, tx, ty)
+                    if tile_container
+                    else isfile(tilefilename)
+                ):
                     if self.options.verbose:
                         logger.debug("Tile generation skipped because of --resume")
                     continue
 
-                if self.options.profile == "mercator":
-                    # Tile bounds in EPSG:3857
-                    b = self.mercator.TileBounds(tx, ty, tz)
-                elif self.options.profile == "geodetic":
-                    b = self.geodetic.TileBounds(tx, ty, tz)
-                elif self.options.profile != "raster":
-                    b = self.tmsMap[self.options.profile].TileBounds(
-                        tx, ty, tz, self.tile_size
-                    )
+                if self.options.profile != "raster":
+                    b = self.tile_bounds(tx, ty, tz)
 
                 # Don't scale up by nearest neighbour, better change the querysize
                 # to the native resolution (and return smaller query tile) for scaling
@@ -2922,24 +3948,42 @@ class GDAL2Tiles:
 
                 # Read the source raster if anything is going inside the tile as per the computed
                 # geo_query
-                tile_details.append(
-                    TileDetail(
-                        tx=tx,
-                        ty_tms=ty,
-                        ty=ytile,
-                        tz=tz,
-                        rx=rx,
-                        ry=ry,
-                        rxsize=rxsize,
-                        rysize=rysize,
-                        wx=wx,
-                        wy=wy,
-                        wxsize=wxsize,
-                        wysize=wysize,
-                        querysize=querysize,
-                    )
+                tile_detail = TileDetail(
+                    tx=tx,
+                    ty_tms=ty,
+                    ty=ytile,
+                    tz=tz,
+                    rx=rx,
+                    ry=ry,
+                    rxsize=rxsize,
+                    rysize=rysize,
+                    wx=wx,
+                    wy=wy,
+                    wxsize=wxsize,
+                    wysize=wysize,
+                    querysize=querysize,
                 )
 
+                if metatile_size > 1:
+                    mtx = tx // metatile_size
+                    mty = ty // metatile_size
+                    if (mtx, mty) not in metatiles:
+                        metatiles[(mtx, mty)] = self.metatile_query(
+                            ds, mtx, mty, tz, metatile_size, querysize
+                        )
+                    tile_detail.metatile = metatiles[(mtx, mty)]
+                    tile_detail.metatile_col = tx - mtx * metatile_size
+                    # Metatile rows go from north to south, TMS rows from
+                    # south to north
+                    tile_detail.metatile_row = (
+                        mty * metatile_size + metatile_size - 1 - ty
+                    )
+
+                tile_details.append(tile_detail)
+
+        if tile_container:
+            tile_container.close()
+
         conf = TileJobInfo(
             src_file=self.tmp_vrt_filename,
             nb_data_bands=self.dataBandsCount,
@@ -2961,6 +4005,48 @@ class GDAL2Tiles:
 
         return conf, tile_details
 
+    def tile_bounds(self, tx, ty, tz):
+        """Return the bounds of a tile in the output SRS, for all profiles but
+        'raster'"""
+        if self.options.profile == "mercator":
+            # Tile bounds in EPSG:3857
+            return self.mercator.TileBounds(tx, ty, tz)
+        elif self.options.profile == "geodetic":
+            return self.geodetic.TileBounds(tx, ty, tz)
+        return self.tmsMap[self.options.profile].TileBounds(tx, ty, tz, self.tile_size)
+
+    def metatile_query(self, ds, mtx, mty, tz, metatile_size, querysize):
+        """
+        Return the MetaTileDetail of the metatile of indices (mtx, mty), covering
+        base tiles (mtx * metatile_size, mty * metatile_size) to
+        ((mtx + 1) * metatile_size - 1, (mty + 1) * metatile_size - 1)
+        """
+        south_west = self.tile_bounds(mtx * metatile_size, mty * metatile_size, tz)
+        north_east = self.tile_bounds(
+            (mtx + 1) * metatile_size - 1, (mty + 1) * metatile_size - 1, tz
+        )
+        (rx, ry, rxsize, rysize), (wx, wy, wxsize, wysize) = self.geo_query(
+            ds,
+            south_west[0],
+            north_east[3],
+            north_east[2],
+            south_west[1],
+            querysize=querysize * metatile_size,
+        )
+        return MetaTileDetail(
+            tx=mtx,
+            ty=mty,
+            rx=rx,
+            ry=ry,
+            rxsize=rxsize,
+            rysize=rysize,
+            wx=wx,
+            wy=wy,
+            wxsize=wxsize,
+            wysize=wysize,
+            querysize=querysize * metatile_size,
+        )
+
     def geo_query(self, ds, ulx, uly, lrx, lry, querysize=0):
         """
         For given dataset and query in cartographic coordinates returns parameters for ReadRaster()
@@ -4496,6 +5582,170 @@ def get_tile_swne(tile_job_info, options):
     return tile_swne
 
 
+def _quadtree_key(tx: int, ty: int) -> int:
+    """Return the Z-order (Morton) code of a tile, so that sorting tiles on it
+    makes the descendants of any tile consecutive"""
+    key = 0
+    bit = 0
+    while tx or ty:
+        key |= (tx & 1) << (2 * bit)
+        key |= (ty & 1) << (2 * bit + 1)
+        tx >>= 1
+        ty >>= 1
+        bit += 1
+    return key
+
+
+def _submit_tile_job(pool, done_queue: queue.Queue, func, arg) -> None:
+    """Run func(arg) on pool, or synchronously if pool is None, and put its
+    result (or the exception it raised) in done_queue"""
+    if pool is None:
+        done_queue.put(func(arg))
+    elif hasattr(pool, "apply_async"):
+        # multiprocessing.Pool
+        pool.apply_async(
+            func, (arg,), callback=done_queue.put, error_callback=done_queue.put
+        )
+    else:
+        # concurrent.futures executor, as used for MPI
+        future = pool.submit(func, arg)
+        future.add_done_callback(lambda f: done_queue.put(f.exception() or f.result()))
+
+
+def depth_first_tiling(
+    conf: TileJobInfo,
+    tile_details: List[TileDetail],
+    output_folder: str,
+    options: Options,
+    pool=None,
+    nb_processes: int = 1,
+    tmsMap: Optional[dict] = None,
+) -> None:
+    """
+    Generate base and overview tiles in a single walk over the tile pyramid.
+
+    Base tiles are scheduled in quadtree order, and an overview tile is
+    scheduled as soon as all its child tiles have been generated, so that
+    base and overview tiles are generated concurrently, without any barrier
+    between zoom levels. Only a few tiles per zoom level are waiting for
+    their parent at any time, which keeps the overview cache small.
+    """
+
+    def parent_of(key):
+        tz, tx, ty = key
+        return (tz - 1, tx >> 1, ty >> 1)
+
+    overview_cache = _create_overview_cache(conf)
+    tile_writer = _create_tile_writer(conf)
+    dedup_stats = DedupStats()
+
+    # Child tiles of each overview tile
+    overview_base_tiles = {}
+    for base_tz in range(conf.tmaxz, conf.tminz, -1):
+        for base_tiles in group_overview_base_tiles(base_tz, output_folder, conf):
+            key = (base_tz - 1, base_tiles[0][0] >> 1, base_tiles[0][1] >> 1)
+            overview_base_tiles[key] = base_tiles
+
+    # Number of scheduled child tiles each overview tile is waiting for
+    pending = {key: 0 for key in overview_base_tiles}
+    for tile_detail in tile_details:
+        parent = parent_of((tile_detail.tz, tile_detail.tx, tile_detail.ty_tms))
+        if parent in pending:
+            pending[parent] += 1
+    for key in overview_base_tiles:
+        parent = parent_of(key)
+        if parent in pending:
+            pending[parent] += 1
+
+    ready = [key for key, count in pending.items() if count == 0]
+    for key in ready:
+        del pending[key]
+
+    base_jobs = iter(
+        sorted(
+            group_base_tiles_by_metatile(tile_details),
+            key=lambda group: _quadtree_key(group[0].tx, group[0].ty_tms),
+        )
+    )
+
+    if not options.verbose and not options.quiet:
+        progress_bar = ProgressBar(len(tile_details) + len(overview_base_tiles))
+        progress_bar.start()
+
+    # The TMS map is not worth being pickled to worker processes
+    job_tmsMap = tmsMap if pool is None else None
+
+    done_queue = queue.Queue()
+    max_in_flight = 4 * nb_processes if pool is not None else 1
+    in_flight = 0
+    remaining = len(tile_details) + len(overview_base_tiles)
+    try:
+        while remaining:
+            while in_flight < max_in_flight:
+                if ready:
+                    # Most recently completed parents first, to go depth-first
+                    key = ready.pop()
+                    base_tz = key[0] + 1
+                    base_tiles = overview_base_tiles[key]
+                    base_tiles_data = None
+                    if overview_cache:
+                        base_tiles_data = overview_cache.pop_base_tiles(
+                            base_tz, base_tiles
+                        )
+                    _submit_tile_job(
+                        pool,
+                        done_queue,
+                        partial(
+                            _create_overview_tile_job,
+                            base_tz,
+                            output_folder,
+                            conf,
+                            options,
+                            tmsMap=job_tmsMap,
+                        ),
+                        (base_tiles, base_tiles_data),
+                    )
+                else:
+                    base_tiles_group = next(base_jobs, None)
+                    if base_tiles_group is None:
+                        break
+                    _submit_tile_job(
+                        pool,
+                        done_queue,
+                        partial(_create_base_tile_job, conf, tmsMap=job_tmsMap),
+                        base_tiles_group,
+                    )
+                in_flight += 1
+
+            job_result = done_queue.get()
+            if isinstance(job_result, BaseException):
+                raise job_result
+            in_flight -= 1
+
+            results, job_dedup_stats = job_result
+            dedup_stats.add(job_dedup_stats)
+            for key, raw_tile, encoded_tile in results:
+                remaining -= 1
+                if tile_writer and encoded_tile is not None:
+                    tile_writer.write_tile(*key, encoded_tile)
+                parent = parent_of(key)
+                if parent in pending:
+                    if overview_cache:
+                        overview_cache.put(key, raw_tile)
+                    pending[parent] -= 1
+                    if pending[parent] == 0:
+                        del pending[parent]
+                        ready.append(parent)
+
+            if not options.verbose and not options.quiet:
+                progress_bar.log_progress(len(results))
+    finally:
+        if tile_writer:
+            tile_writer.close()
+
+    dedup_stats.report(options)
+
+
 def single_threaded_tiling(
     input_file: str, output_folder: str, options: Options, tmsMap: dict
 ) -> None:
@@ -4510,37 +5760,69 @@ def single_threaded_tiling(
     if options.verbose:
         logger.debug("Tiles details calc complete.")
 
+    if options.depth_first:
+        depth_first_tiling(conf, tile_details, output_folder, options, tmsMap=tmsMap)
+        if getattr(threadLocal, "cached_ds", None):
+            del threadLocal.cached_ds
+        shutil.rmtree(os.path.dirname(conf.src_file))
+        return
+
     if not options.verbose and not options.quiet:
         base_progress_bar = ProgressBar(len(tile_details))
         base_progress_bar.start()
 
-    for tile_detail in tile_details:
-        create_base_tile(conf, tmsMap, tile_detail)
-
-        if not options.verbose and not options.quiet:
-            base_progress_bar.log_progress()
-
-    if getattr(threadLocal, "cached_ds", None):
-        del threadLocal.cached_ds
-
-    if not options.quiet:
-        count = count_overview_tiles(conf)
-        if count:
-            logger.info("Generating Overview Tiles:")
+    overview_cache = _create_overview_cache(conf)
+    tile_writer = _create_tile_writer(conf)
+    dedup_stats = DedupStats()
 
-            if not options.verbose:
-                overview_progress_bar = ProgressBar(count)
-                overview_progress_bar.start()
-
-    for base_tz in range(conf.tmaxz, conf.tminz, -1):
-        base_tile_groups = group_overview_base_tiles(base_tz, output_folder, conf)
-        for base_tiles in base_tile_groups:
-            create_overview_tile(
-                base_tz, base_tiles, output_folder, conf, options, tmsMap
+    try:
+        for base_tiles_group in group_base_tiles_by_metatile(tile_details):
+            nb_tiles = _store_tile_results(
+                _create_base_tile_job(conf, base_tiles_group, tmsMap),
+                overview_cache,
+                tile_writer,
+                dedup_stats,
             )
+
             if not options.verbose and not options.quiet:
-                overview_progress_bar.log_progress()
+                base_progress_bar.log_progress(nb_tiles)
+
+        if getattr(threadLocal, "cached_ds", None):
+            del threadLocal.cached_ds
+
+        if not options.quiet:
+            count = count_overview_tiles(conf)
+            if count:
+                logger.info("Generating Overview Tiles:")
+
+                if not options.verbose:
+                    overview_progress_bar = ProgressBar(count)
+                    overview_progress_bar.start()
+
+        for base_tz in range(conf.tmaxz, conf.tminz, -1):
+            base_tile_groups = group_overview_base_tiles(base_tz, output_folder, conf)
+            for base_tiles in base_tile_groups:
+                base_tiles_data = None
+                if overview_cache:
+                    base_tiles_data = overview_cache.pop_base_tiles(base_tz, base_tiles)
+                job_result = _create_overview_tile_job(
+                    base_tz,
+                    output_folder,
+                    conf,
+                    options,
+                    (base_tiles, base_tiles_data),
+                    tmsMap,
+                )
+                _store_tile_results(
+                    job_result, overview_cache, tile_writer, dedup_stats
+                )
+                if not options.verbose and not options.quiet:
+                    overview_progress_bar.log_progress()
+    finally:
+        if tile_writer:
+            tile_writer.close()
 
+    dedup_stats.report(options)
     shutil.rmtree(os.path.dirname(conf.src_file))
 
 
@@ -4558,46 +5840,81 @@ def multi_threaded_tiling(
     if options.verbose:
         logger.debug("Tiles details calc complete.")
 
+    if options.depth_first:
+        depth_first_tiling(
+            conf, tile_details, output_folder, options, pool, nb_processes
+        )
+        shutil.rmtree(os.path.dirname(conf.src_file))
+        return
+
     if not options.verbose and not options.quiet:
         base_progress_bar = ProgressBar(len(tile_details))
         base_progress_bar.start()
 
     # TODO: gbataille - check the confs for which each element is an array... one useless level?
     # TODO: gbataille - assign an ID to each job for print in verbose mode "ReadRaster Extent ..."
-    chunksize = max(1, min(128, len(tile_details) // nb_processes))
-    for _ in pool.imap_unordered(
-        partial(create_base_tile, conf, None), tile_details, chunksize=chunksize
-    ):
-        if not options.verbose and not options.quiet:
-            base_progress_bar.log_progress()
-
-    if not options.quiet:
-        count = count_overview_tiles(conf)
-        if count:
-            logger.info("Generating Overview Tiles:")
+    overview_cache = _create_overview_cache(conf)
+    tile_writer = _create_tile_writer(conf)
+    dedup_stats = DedupStats()
 
-            if not options.verbose:
-                overview_progress_bar = ProgressBar(count)
-                overview_progress_bar.start()
-
-    for base_tz in range(conf.tmaxz, conf.tminz, -1):
-        base_tile_groups = group_overview_base_tiles(base_tz, output_folder, conf)
-        chunksize = max(1, min(128, len(base_tile_groups) // nb_processes))
-        for _ in pool.imap_unordered(
-            partial(
-                create_overview_tile,
-                base_tz,
-                output_folder=output_folder,
-                tile_job_info=conf,
-                options=options,
-                tmsMap=None,
-            ),
-            base_tile_groups,
+    try:
+        base_tiles_groups = group_base_tiles_by_metatile(tile_details)
+        chunksize = max(1, min(128, len(base_tiles_groups) // nb_processes))
+        for job_result in pool.imap_unordered(
+            partial(_create_base_tile_job, conf),
+            base_tiles_groups,
             chunksize=chunksize,
         ):
+            nb_tiles = _store_tile_results(
+                job_result, overview_cache, tile_writer, dedup_stats
+            )
             if not options.verbose and not options.quiet:
-                overview_progress_bar.log_progress()
+                base_progress_bar.log_progress(nb_tiles)
+
+        if not options.quiet:
+            count = count_overview_tiles(conf)
+            if count:
+                logger.info("Generating Overview Tiles:")
+
+                if not options.verbose:
+                    overview_progress_bar = ProgressBar(count)
+                    overview_progress_bar.start()
+
+        for base_tz in range(conf.tmaxz, conf.tminz, -1):
+            base_tile_groups = group_overview_base_tiles(base_tz, output_folder, conf)
+            chunksize = max(1, min(128, len(base_tile_groups) // nb_processes))
+            jobs = (
+                (
+                    base_tiles,
+                    (
+                        overview_cache.pop_base_tiles(base_tz, base_tiles)
+                        if overview_cache
+                        else None
+                    ),
+                )
+                for base_tiles in base_tile_groups
+            )
+            for job_result in pool.imap_unordered(
+                partial(
+                    _create_overview_tile_job,
+                    base_tz,
+                    output_folder,
+                    conf,
+                    options,
+                ),
+                jobs,
+                chunksize=chunksize,
+            ):
+                _store_tile_results(
+                    job_result, overview_cache, tile_writer, dedup_stats
+                )
+                if not options.verbose and not options.quiet:
+                    overview_progress_bar.log_progress()
+    finally:
+        if tile_writer:
+            tile_writer.close()
 
+    dedup_stats.report(options)
     shutil.rmtree(os.path.dirname(conf.src_file))
 
 
@@ -12,6 +12,7 @@
 #
 # SPDX-License-Identifier: MIT
 ###############################################################################
+import os
 import sys
 import textwrap
 from numbers import Number
@@ -20,7 +21,7 @@ from typing import Optional, Sequence, Tuple, Union
 import numpy as np
 
 from osgeo import gdal
-from osgeo_utils.auxiliary.base import PathLikeOrStr
+from osgeo_utils.auxiliary.base import PathLikeOrStr, get_extension
 from osgeo_utils.auxiliary.gdal_argparse import GDALArgumentParser, GDALScript
 from osgeo_utils.auxiliary.numpy_util import GDALTypeCodeAndNumericTypeCodeFromDataSet
 from osgeo_utils.auxiliary.progress import (
@@ -35,6 +36,184 @@ from osgeo_utils.auxiliary.util import (
 )
 
 
+def _xyz_blocks(
+    bands: Sequence[gdal.Band],
+    gt: Sequence[float],
+    srcwin: Sequence[int],
+    x_skip: int,
+    y_skip: int,
+    np_dt,
+    src_nodata: Optional[np.ndarray],
+    dst_nodata: Optional[np.ndarray],
+    skip_nodata: bool,
+    max_block_values: int = 1 << 20,
+):
+    """
+    Yields the points of a raster, a block of lines at a time, as
+    (lines, geo_x, geo_y, data) tuples, where lines is the number of lines of the block,
+    geo_x and geo_y are the (points) coordinates of the pixel centers,
+    and data the (points, bands) values.
+    """
+    x_off, y_off, x_size, y_size = srcwin
+    band_count = len(bands)
+    replace_nodata = (not skip_nodata) and (dst_nodata is not None)
+    process_nodata = skip_nodata or replace_nodata
+
+    x_i = np.arange(0, x_size, x_skip)
+    ys = range(y_off, y_off + y_size, y_skip)
+    x = x_i + x_off
+    lines_per_block = max(1, max_block_values // (max(1, len(x_i)) * (band_count + 2)))
+
+    for block_start in range(0, len(ys), lines_per_block):
+        block_ys = ys[block_start : block_start + lines_per_block]
+        data = np.empty(
+            (band_count, len(block_ys), len(x_i)), dtype=np_dt
+        )  # dims: (bands_count, lines, points per line)
+        for i_bnd, band in enumerate(bands):
+            if y_skip == 1:
+                # read all the lines of the block at once
+                band_data = band.ReadAsArray(x_off, block_ys[0], x_size, len(block_ys))
+                data[i_bnd] = band_data[:, ::x_skip]
+            else:
+                for i_line, y in enumerate(block_ys):
+                    band_data = band.ReadAsArray(x_off, y, x_size, 1)
+                    data[i_bnd, i_line] = band_data[0, ::x_skip]
+        data = data.reshape(band_count, -1)
+
+        y = np.asarray(block_ys)[:, np.newaxis]
+        geo_x = (gt[0] + (x + 0.5) * gt[1] + (y + 0.5) * gt[2]).ravel()
+        geo_y = (gt[3] + (x + 0.5) * gt[4] + (y + 0.5) * gt[5]).ravel()
+
+        if process_nodata:
+            is_nodata = np.all(data == src_nodata[:, np.newaxis], axis=0)
+            if skip_nodata:
+                is_data = ~is_nodata
+                geo_x = geo_x[is_data]
+                geo_y = geo_y[is_data]
+                data = data[:, is_data]
+            else:
+                data[:, is_nodata] = dst_nodata[:, np.newaxis]
+
+        yield len(block_ys), geo_x, geo_y, data.transpose()
+
+
+# output formats, and the extensions they are guessed from
+OutputFormatExtensions = {
+    "XYZ": (),
+    "Parquet": ("parquet",),
+    "Arrow": ("arrow", "arrows", "feather", "ipc"),
+    "NPY": ("npy",),
+}
+
+
+def get_output_format(dstfile: Optional[PathLikeOrStr]) -> str:
+    """Guess the output format from the extension of the output file name"""
+    if dstfile is not None:
+        ext = get_extension(dstfile).lower()
+        for output_format, extensions in OutputFormatExtensions.items():
+            if ext in extensions:
+                return output_format
+    return "XYZ"
+
+
+def _column_names(bands: Sequence[gdal.Band]) -> Sequence[str]:
+    return ["x", "y"] + [f"band_{band.GetBand()}" for band in bands]
+
+
+class _ArrowWriter:
+    """Writes blocks of points as Arrow record batches into an attribute-only
+    layer of a Parquet or Arrow IPC dataset"""
+
+    def __init__(self, dstfile, driver_name, bands, np_dt):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise Exception(f"The {driver_name} output format requires pyarrow")
+        from osgeo import ogr
+
+        self.pa = pa
+        drv = ogr.GetDriverByName(driver_name)
+        if drv is None:
+            raise Exception(f"The {driver_name} driver is not available")
+        self.ds = drv.CreateDataSource(dstfile)
+        if self.ds is None:
+            raise Exception(f"Could not create {dstfile}")
+        self.lyr = self.ds.CreateLayer(
+            os.path.splitext(os.path.basename(dstfile))[0], geom_type=ogr.wkbNone
+        )
+        self.names = _column_names(bands)
+        self.schema = pa.schema(
+            [(name, pa.float64()) for name in self.names[:2]]
+            + [(name, pa.from_numpy_dtype(np_dt)) for name in self.names[2:]]
+        )
+
+    def write(self, geo_x, geo_y, data):
+        # the columns of the batch share the memory of the numpy arrays
+        batch = self.pa.RecordBatch.from_arrays(
+            [geo_x, geo_y] + [np.ascontiguousarray(col) for col in data.transpose()],
+            schema=self.schema,
+        )
+        self.lyr.WriteArrow(batch)
+
+    def close(self):
+        self.lyr = None
+        self.ds = None
+
+
+class _NPYWriter:
+    """Writes blocks of points into a .npy file of (x, y, band values) records,
+    which can be loaded back with numpy.load(filename, mmap_mode="r")"""
+
+    def __init__(self, dstfile, bands, np_dt, max_count):
+        self.dtype = np.dtype(
+            [(name, np.float64) for name in _column_names(bands)[:2]]
+            + [(name, np_dt) for name in _column_names(bands)[2:]]
+        )
+        self.fh = gdal.VSIFOpenL(dstfile, "wb")
+        if self.fh is None:
+            raise Exception(f"Could not create {dstfile}")
+        self.count = 0
+        # the number of points is only known at the end when skipping nodata:
+        # the header is written for the maximum count, and rewritten with the
+        # same length when closing
+        self.header = self._header(max_count)
+        self._write(self.header)
+
+    def _header(self, count, length=None):
+        header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(self.dtype),
+            count,
+        )
+        magic = b"\x93NUMPY\x01\x00"
+        if length is None:
+            # total length aligned on 64 bytes
+            length = -(-(len(magic) + 2 + len(header) + 1) // 64) * 64
+        header = header.ljust(length - len(magic) - 2 - 1) + "\n"
+        return magic + (len(header)).to_bytes(2, "little") + header.encode("latin1")
+
+    def _write(self, buf):
+        if gdal.VSIFWriteL(buf, len(buf), 1, self.fh) != 1:
+            gdal.VSIFCloseL(self.fh)
+            raise IOError("Cannot write into destination file")
+
+    def write(self, geo_x, geo_y, data):
+        records = np.empty(len(geo_x), dtype=self.dtype)
+        names = self.dtype.names
+        records[names[0]] = geo_x
+        records[names[1]] = geo_y
+        for name, col in zip(names[2:], data.transpose()):
+            records[name] = col
+        self._write(records.tobytes())
+        self.count += len(records)
+
+    def close(self):
+        header = self._header(self.count, len(self.header))
+        if header != self.header:
+            gdal.VSIFSeekL(self.fh, 0, 0)
+            self._write(header)
+        gdal.VSIFCloseL(self.fh)
+
+
 @enable_gdal_exceptions
 def gdal2xyz(
     srcfile: PathOrDS,
@@ -49,6 +228,7 @@ def gdal2xyz(
     return_np_arrays: bool = False,
     pre_allocate_np_arrays: bool = True,
     progress_callback: OptionalProgressCallback = ...,
+    output_format: Optional[str] = None,
 ) -> Optional[Tuple]:
     """
     translates a raster file (or dataset) into xyz format
@@ -67,9 +247,12 @@ def gdal2xyz(
     srcfile - The source dataset filename or dataset object
     dstfile - The output dataset filename; for dstfile=None - if return_np_arrays=False then output will be printed to stdout
     return_np_arrays - return numpy arrays of the result, otherwise returns None
-    pre_allocate_np_arrays - pre-allocated result arrays.
-        Should be faster unless skip_nodata and the input is very sparse thus most data points will be skipped.
+    pre_allocate_np_arrays - ignored, kept for backward compatibility.
+        The result arrays are built from the arrays of each block of lines.
     progress_callback - progress callback function. use None for quiet or Ellipsis for using the default callback
+    output_format - format of dstfile: XYZ (text), Parquet, Arrow (IPC) or NPY (records).
+        default (`None`) - guess from the extension of dstfile, XYZ if it cannot be guessed.
+        Parquet and Arrow require pyarrow. The points are written a block of lines at a time.
     """
 
     result = None
@@ -95,8 +278,22 @@ def gdal2xyz(
 
     dt, np_dt = GDALTypeCodeAndNumericTypeCodeFromDataSet(ds)
 
+    if output_format is None:
+        output_format = get_output_format(dstfile)
+    output_format = {f.upper(): f for f in OutputFormatExtensions}.get(
+        output_format.upper()
+    )
+    if output_format is None:
+        raise Exception(
+            f"Unknown output format, should be one of {', '.join(OutputFormatExtensions)}"
+        )
+    if output_format != "XYZ" and dstfile is None:
+        raise Exception(f"The {output_format} output format requires an output file")
+
     # Open the output file.
-    if dstfile is not None:
+    if output_format != "XYZ":
+        dst_fh = None
+    elif dstfile is not None:
         dst_fh = gdal.VSIFOpenL(dstfile, "wb")
     elif return_np_arrays:
         dst_fh = None
@@ -105,9 +302,9 @@ def gdal2xyz(
 
     if dst_fh:
         if dt == gdal.GDT_Int32 or dt == gdal.GDT_UInt32:
-            band_format = (("%d" + delim) * len(bands)).rstrip(delim) + "\n"
+            band_format = delim.join(["%d"] * band_count)
         else:
-            band_format = (("%g" + delim) * len(bands)).rstrip(delim) + "\n"
+            band_format = delim.join(["%g"] * band_count)
 
         # Setup an appropriate print format.
         if (
@@ -116,9 +313,9 @@ def gdal2xyz(
             and abs(ds.RasterXSize * gt[1]) < 180
             and abs(ds.RasterYSize * gt[5]) < 180
         ):
-            frmt = "%.10g" + delim + "%.10g" + delim + "%s"
+            frmt = "%.10g" + delim + "%.10g" + delim + band_format + "\n"
         else:
-            frmt = "%.3f" + delim + "%.3f" + delim + "%s"
+            frmt = "%.3f" + delim + "%.3f" + delim + band_format + "\n"
 
     if isinstance(src_nodata, Number):
         src_nodata = [src_nodata] * band_count
@@ -138,7 +335,6 @@ def gdal2xyz(
 
     skip_nodata = skip_nodata and (src_nodata is not None)
     replace_nodata = (not skip_nodata) and (dst_nodata is not None)
-    process_nodata = skip_nodata or replace_nodata
 
     if isinstance(skip, Sequence):
         x_skip, y_skip = skip
@@ -146,83 +342,73 @@ def gdal2xyz(
         x_skip = y_skip = skip
 
     x_off, y_off, x_size, y_size = srcwin
-    bands_count = len(bands)
-
-    nXBlocks = (x_size - x_off) // x_skip
-    nYBlocks = (y_size - y_off) // y_skip
-    progress_end = nXBlocks * nYBlocks
+    progress_end = len(range(y_off, y_off + y_size, y_skip))
     progress_curr = 0
-    progress_prev = -1
-    progress_parts = 100
 
-    if return_np_arrays:
-        size = progress_end if pre_allocate_np_arrays else 0
-        all_geo_x = np.empty(size)
-        all_geo_y = np.empty(size)
-        all_data = np.empty((size, band_count), dtype=np_dt)
-
-    # Loop emitting data.
-    idx = 0
-    for y in range(y_off, y_off + y_size, y_skip):
-
-        size = bands_count if pre_allocate_np_arrays else 0
-        data = np.empty((size, x_size), dtype=np_dt)  # dims: (bands_count, x_size)
-        for i_bnd, band in enumerate(bands):
-            band_data = band.ReadAsArray(x_off, y, x_size, 1)  # read one band line
-            if pre_allocate_np_arrays:
-                data[i_bnd] = band_data[0]
-            else:
-                data = np.append(data, band_data, axis=0)
-
-        for x_i in range(0, x_size, x_skip):
-
-            progress_curr += 1
-            if progress_callback:
-                progress_frac = progress_curr / progress_end
-                progress = int(progress_frac * progress_parts)
-                if progress > progress_prev:
-                    progress_prev = progress
-                    progress_callback(progress_frac)
-
-            x_i_data = data[:, x_i]  # single pixel, dims: (bands)
-            if process_nodata and np.array_equal(src_nodata, x_i_data):
-                if skip_nodata:
-                    continue
-                elif replace_nodata:
-                    x_i_data = dst_nodata
-
-            x = x_i + x_off
-
-            geo_x = gt[0] + (x + 0.5) * gt[1] + (y + 0.5) * gt[2]
-            geo_y = gt[3] + (x + 0.5) * gt[4] + (y + 0.5) * gt[5]
-
-            if dst_fh:
-                band_str = band_format % tuple(x_i_data)
-                line = (frmt % (float(geo_x), float(geo_y), band_str)).encode("UTF-8")
-                if gdal.VSIFWriteL(line, len(line), 1, dst_fh) != 1:
-                    gdal.VSIFCloseL(dst_fh)
-                    raise IOError("Cannot write into destination file")
-            if return_np_arrays:
-                if pre_allocate_np_arrays:
-                    all_geo_x[idx] = geo_x
-                    all_geo_y[idx] = geo_y
-                    all_data[idx] = x_i_data
-                else:
-                    all_geo_x = np.append(all_geo_x, geo_x)
-                    all_geo_y = np.append(all_geo_y, geo_y)
-                    all_data = np.append(all_data, [x_i_data], axis=0)
-            idx += 1
+    if output_format == "NPY":
+        writer = _NPYWriter(
+            os.fspath(dstfile),
+            bands,
+            np_dt,
+            progress_end * len(range(0, x_size, x_skip)),
+        )
+    elif output_format != "XYZ":
+        writer = _ArrowWriter(os.fspath(dstfile), output_format, bands, np_dt)
+    else:
+        writer = None
+
+    all_geo_x = []
+    all_geo_y = []
+    all_data = []
+
+    # Loop emitting data, a block of lines at a time.
+    for lines, geo_x, geo_y, data in _xyz_blocks(
+        bands,
+        gt,
+        srcwin,
+        x_skip,
+        y_skip,
+        np_dt,
+        src_nodata,
+        dst_nodata,
+        skip_nodata,
+    ):
+        if dst_fh and len(geo_x):
+            # format all the lines of the block with a single % operation
+            values = np.empty((len(geo_x), 2 + band_count))
+            values[:, 0] = geo_x
+            values[:, 1] = geo_y
+            values[:, 2:] = data
+            lines_str = (frmt * len(geo_x)) % tuple(values.ravel().tolist())
+            buf = lines_str.encode("UTF-8")
+            if gdal.VSIFWriteL(buf, len(buf), 1, dst_fh) != 1:
+                gdal.VSIFCloseL(dst_fh)
+                raise IOError("Cannot write into destination file")
+        if writer and len(geo_x):
+            writer.write(geo_x, geo_y, data)
+        if return_np_arrays:
+            all_geo_x.append(geo_x)
+            all_geo_y.append(geo_y)
+            all_data.append(data)
+
+        progress_curr += lines
+        if progress_callback:
+            progress_callback(progress_curr / progress_end)
 
     if return_np_arrays:
         nodata = None if skip_nodata else dst_nodata if replace_nodata else src_nodata
-        if idx != progress_curr:
-            all_geo_x = all_geo_x[:idx]
-            all_geo_y = all_geo_y[:idx]
-            all_data = all_data[:idx, :]
+        all_geo_x = np.concatenate(all_geo_x) if all_geo_x else np.empty(0)
+        all_geo_y = np.concatenate(all_geo_y) if all_geo_y else np.empty(0)
+        if all_data:
+            all_data = np.concatenate(all_data)
+        else:
+            all_data = np.empty((0, band_count), dtype=np_dt)
         result = all_geo_x, all_geo_y, all_data.transpose(), nodata
 
     if dst_fh:
         gdal.VSIFCloseL(dst_fh)
+    if writer:
+        writer.close()
 
     return result
 
@@ -292,6 +478,15 @@ class GDAL2XYZ(GDALScript):
             help="Use comma instead of space as a delimiter.",
         )
 
+        parser.add_argument(
+            "-of",
+            dest="output_format",
+            choices=list(OutputFormatExtensions),
+            help="Output format. Parquet and Arrow require pyarrow. "
+            "Default: guessed from the extension of the destination file, "
+            "XYZ if it cannot be guessed.",
+        )
+
         parser.add_argument(
             "-skipnodata",
             "--skipnodata",
@@ -16,12 +16,22 @@
 # ******************************************************************************
 
 import argparse
+import ast
+import builtins
+import collections
+import concurrent.futures
+import contextlib
+import functools
 import glob
+import math
+import operator
 import os
 import os.path
 import string
 import sys
 import textwrap
+import threading
+import xml.sax.saxutils
 from numbers import Number
 from typing import Dict, Optional, Sequence, Tuple, Union
 
@@ -65,6 +75,9 @@ DefaultNDVLookup = {
     gdal.GDT_CFloat64: None,
 }
 
+# default memory budget of a processing chunk, in megabytes
+DefaultMaxChunkMemory = 64
+
 # tuple of available output datatypes names
 GDALDataTypeNames = tuple(gdal.GetDataTypeName(dt) for dt in DefaultNDVLookup.keys())
 
@@ -91,8 +104,439 @@ work with two bands:
 
 sum all files with hidden noDataValue
     Calc(calc="sum(a,axis=0)", a=['0.tif','1.tif','2.tif'], outfile="sum.tif", hideNoData=True)
+
+evaluate blocks with 8 threads:
+    Calc(calc="A+B", A="input1.tif", B="input2.tif", outfile="result.tif", num_threads=8)
+
+write a VRT evaluating the calculation when it is read:
+    Calc(calc="A+B", A="input1.tif", B="input2.tif", outfile="result.vrt", lazy=True)
 """
 
+# Python pixel function of the bands of the VRT written in lazy mode. It
+# receives one array per input band, in the order of the alphas argument, and
+# follows the same nodata and casting rules as the blocks computed by Calc.
+LazyPixelFunctionCode = """
+import numpy
+
+_namespace = None
+
+
+def gdal_calc(in_ar, out_ar, xoff, yoff, xsize, ysize, raster_xsize,
+              raster_ysize, buf_radius, gt, **kwargs):
+    global _namespace
+    if _namespace is None:
+        from osgeo import gdal_array
+        _namespace = {
+            key: getattr(module, key)
+            for module in [gdal_array, numpy]
+            for key in dir(module)
+            if not key.startswith("__")
+        }
+
+    args = {key: value.decode("utf-8") for key, value in kwargs.items()}
+    alphas = args["alphas"].split(",")
+    dtypes = args["dtypes"].split(",")
+    nodata = [None if v == "None" else float(v) for v in args["nodata"].split(",")]
+    out_nodata = None if args["out_nodata"] == "None" else float(args["out_nodata"])
+    list_dtypes = dict(
+        item.split("=") for item in args["list_dtypes"].split(",") if item
+    )
+
+    local_namespace = {}
+    lists = {}
+    nodata_mask = None
+    for alpha, dtype, ndv, ar in zip(alphas, dtypes, nodata, in_ar):
+        ar = ar.astype(dtype, copy=False)
+        if ndv is not None:
+            if nodata_mask is None:
+                nodata_mask = numpy.zeros(out_ar.shape)
+            nodata_mask = 1 * numpy.logical_or(nodata_mask == 1, ar == ndv)
+        if alpha in list_dtypes:
+            lists.setdefault(alpha, []).append(ar.astype(list_dtypes[alpha]))
+        else:
+            local_namespace[alpha] = ar
+    for alpha, arrays in lists.items():
+        local_namespace[alpha] = arrays[0] if len(arrays) == 1 else numpy.stack(arrays)
+
+    result = eval(args["calc"], _namespace, local_namespace)
+
+    if nodata_mask is not None and out_nodata is not None:
+        result = ((1 * (nodata_mask == 0)) * result) + (out_nodata * nodata_mask)
+    elif not isinstance(result, numpy.ndarray):
+        result = numpy.ones(out_ar.shape) * result
+
+    # round and clamp to the output data type, as GDAL does when writing
+    if out_ar.dtype.kind in "iu" and result.dtype.kind in "iuf":
+        if result.dtype.kind == "f":
+            result = numpy.nan_to_num(result, nan=0)
+            result = numpy.trunc(result + numpy.copysign(0.5, result))
+        info = numpy.iinfo(out_ar.dtype)
+        result = numpy.clip(result, info.min, info.max)
+    out_ar[:] = result
+"""
+
+
+def plan_chunk_size(
+    raster_size: Sequence[int],
+    block_sizes: Sequence[Sequence[int]],
+    bytes_per_pixel: int,
+    max_chunk_memory: int,
+) -> Tuple[int, int]:
+    """
+    Return the size of the processing window, within a memory budget of
+    max_chunk_memory bytes: a multiple of all the block sizes (clamped to the
+    raster size) if such a window fits, otherwise a multiple of the first
+    block size (that of the output raster), otherwise whole rows, or parts of
+    a row, of the raster. Windows are first extended horizontally up to whole
+    rows, then vertically.
+    """
+    xsize, ysize = raster_size
+    max_pixels = max(1, max_chunk_memory // max(1, bytes_per_pixel))
+    unit_x = min(xsize, functools.reduce(_lcm, (b[0] for b in block_sizes), 1))
+    unit_y = min(ysize, functools.reduce(_lcm, (b[1] for b in block_sizes), 1))
+    if unit_x * unit_y > max_pixels and block_sizes:
+        unit_x = min(xsize, block_sizes[0][0])
+        unit_y = min(ysize, block_sizes[0][1])
+    if unit_x * unit_y > max_pixels:
+        unit_x = min(xsize, max_pixels)
+        unit_y = 1
+    chunk_x = min(xsize, unit_x * max(1, max_pixels // (unit_x * unit_y)))
+    chunk_y = min(ysize, unit_y * max(1, max_pixels // (chunk_x * unit_y)))
+    return chunk_x, chunk_y
+
+
+def _lcm(a: int, b: int) -> int:
+    return a * b // math.gcd(a, b)
+
+
+def _map_ordered(executor, func, iterable, max_pending):
+    """Like executor.map(), but with at most max_pending calls submitted ahead
+    of the results consumed, to bound memory usage"""
+    pending = collections.deque()
+    for item in iterable:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class CalcExpression:
+    """
+    Calc expression parsed once, and evaluated on successive blocks.
+
+    Arithmetic operators, comparisons and calls to numpy ufuncs are evaluated
+    with the ufunc out= argument into scratch buffers that are kept from one
+    block to the next, so that intermediate results do not cause new
+    allocations for each block. The semantics are those of eval(): the same
+    ufuncs are called with the same operands, and the Python operators are
+    used when operands are not plain numpy arrays. The other constructs are
+    evaluated with eval().
+
+    An instance, and thus its scratch buffers, must not be shared between
+    threads.
+    """
+
+    # Number of scratch buffers (for different block shapes and operand
+    # types) kept for each operation
+    max_scratch_per_node = 4
+
+    _binop_ufuncs = {
+        ast.Add: (numpy.add, operator.add),
+        ast.Sub: (numpy.subtract, operator.sub),
+        ast.Mult: (numpy.multiply, operator.mul),
+        ast.Div: (numpy.true_divide, operator.truediv),
+        ast.FloorDiv: (numpy.floor_divide, operator.floordiv),
+        ast.Mod: (numpy.remainder, operator.mod),
+        ast.BitAnd: (numpy.bitwise_and, operator.and_),
+        ast.BitOr: (numpy.bitwise_or, operator.or_),
+        ast.BitXor: (numpy.bitwise_xor, operator.xor),
+        ast.LShift: (numpy.left_shift, operator.lshift),
+        ast.RShift: (numpy.right_shift, operator.rshift),
+    }
+
+    _unaryop_ufuncs = {
+        ast.USub: (numpy.negative, operator.neg),
+        ast.UAdd: (numpy.positive, operator.pos),
+        ast.Invert: (numpy.invert, operator.invert),
+    }
+
+    _compare_ufuncs = {
+        ast.Lt: (numpy.less, operator.lt),
+        ast.LtE: (numpy.less_equal, operator.le),
+        ast.Gt: (numpy.greater, operator.gt),
+        ast.GtE: (numpy.greater_equal, operator.ge),
+        ast.Eq: (numpy.equal, operator.eq),
+        ast.NotEq: (numpy.not_equal, operator.ne),
+    }
+
+    def __init__(self, expression: str, global_namespace: Dict) -> None:
+        self.expression = expression
+        self.global_namespace = global_namespace
+        self.scratch_buffers = []
+        tree = ast.parse(expression.strip(), mode="eval")
+        self.root = self._compile(tree.body, is_root=True)
+
+    def evaluate(self, local_namespace: Dict):
+        """Evaluate the expression with the arrays of a block"""
+        result = self.root(local_namespace)
+        if isinstance(result, numpy.ndarray) and any(
+            numpy.may_share_memory(result, buf)
+            for scratch in self.scratch_buffers
+            for buf in scratch.values()
+        ):
+            # The result must remain valid after the evaluation of next block
+            result = result.copy()
+        return result
+
+    def _compile_generic(self, node: ast.expr):
+        code = compile(ast.Expression(body=node), "<calc>", "eval")
+        global_namespace = self.global_namespace
+        return lambda ns: eval(code, global_namespace, ns)
+
+    def _compile(self, node: ast.expr, is_root: bool = False):
+        """Return a function evaluating node with a local namespace"""
+        if isinstance(node, ast.Name):
+            name = node.id
+            global_namespace = self.global_namespace
+
+            def evaluate_name(ns):
+                if name in ns:
+                    return ns[name]
+                if name in global_namespace:
+                    return global_namespace[name]
+                try:
+                    return getattr(builtins, name)
+                except AttributeError:
+                    raise NameError(f"name '{name}' is not defined")
+
+            return evaluate_name
+
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda ns: value
+
+        if isinstance(node, ast.BinOp) and type(node.op) in self._binop_ufuncs:
+            ufunc, op = self._binop_ufuncs[type(node.op)]
+            return self._compile_ufunc(
+                ufunc, op, [node.left, node.right], is_root=is_root
+            )
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in self._unaryop_ufuncs:
+            ufunc, op = self._unaryop_ufuncs[type(node.op)]
+            return self._compile_ufunc(ufunc, op, [node.operand], is_root=is_root)
+
+        if (
+            isinstance(node, ast.Compare)
+            and len(node.ops) == 1
+            and type(node.ops[0]) in self._compare_ufuncs
+        ):
+            ufunc, op = self._compare_ufuncs[type(node.ops[0])]
+            return self._compile_ufunc(
+                ufunc, op, [node.left, node.comparators[0]], is_root=is_root
+            )
+
+        if isinstance(node, ast.Attribute):
+            value = self._compile(node.value)
+            attr = node.attr
+            return lambda ns: getattr(value(ns), attr)
+
+        if (
+            isinstance(node, ast.Call)
+            and not any(isinstance(arg, ast.Starred) for arg in node.args)
+            and all(keyword.arg is not None for keyword in node.keywords)
+        ):
+            func = self._compile(node.func)
+            if node.keywords:
+                args = [self._compile(arg) for arg in node.args]
+                kwargs = {k.arg: self._compile(k.value) for k in node.keywords}
+                return lambda ns: func(ns)(
+                    *[arg(ns) for arg in args],
+                    **{key: value(ns) for key, value in kwargs.items()},
+                )
+            # Calls of ufuncs, such as log10(A), use a scratch buffer
+            return self._compile_ufunc(func, None, node.args, is_root=is_root)
+
+        return self._compile_generic(node)
+
+    def _compile_ufunc(self, ufunc, op, operand_nodes, is_root: bool):
+        """Return a function evaluating ufunc(*operands), with ufunc being
+        either a numpy ufunc, or a compiled function returning the callable
+        (which may be a ufunc) to call.
+        When the operands are not all numpy arrays or scalars, op (the Python
+        operator), if set, is used instead"""
+        operands = [self._compile(operand) for operand in operand_nodes]
+        scratch = {}
+        if not is_root:
+            self.scratch_buffers.append(scratch)
+        max_scratch = self.max_scratch_per_node
+
+        def evaluate_ufunc(ns):
+            args = [operand(ns) for operand in operands]
+            f = ufunc if op is not None else ufunc(ns)
+            if not isinstance(f, numpy.ufunc) or f.nout != 1:
+                return f(*args)
+
+            key = []
+            has_array = False
+            for arg in args:
+                if type(arg) is numpy.ndarray:
+                    has_array = True
+                    key.append((arg.dtype, arg.shape))
+                elif isinstance(arg, (Number, numpy.generic)):
+                    # Value based casting (numpy < 2) depends on the value
+                    key.append((type(arg), arg))
+                else:
+                    key = None
+                    break
+            if not has_array or key is None:
+                # Keep the exact semantics of the Python operator (for
+                # Python scalars, masked arrays, ...)
+                return op(*args) if op is not None else f(*args)
+            if is_root:
+                return f(*args)
+
+            key = tuple(key)
+            buf = scratch.pop(key, None)
+            if buf is None:
+                buf = f(*args)
+                if not isinstance(buf, numpy.ndarray):
+                    return buf
+            else:
+                f(*args, out=buf)
+            # Most recently used last
+            scratch[key] = buf
+            if len(scratch) > max_scratch:
+                del scratch[next(iter(scratch))]
+            return buf
+
+        return evaluate_ufunc
+
+
+class NumExprCalcExpression:
+    """Calc expression evaluated by numexpr, which evaluates the whole
+    expression in a single pass over cache-sized chunks of the block. Only
+    the subset of the numpy syntax supported by numexpr can be used, and the
+    numexpr casting rules apply."""
+
+    def __init__(self, expression: str, global_namespace: Dict) -> None:
+        import numexpr
+
+        self.numexpr = numexpr
+        self.expression = expression.strip()
+        self.global_namespace = global_namespace
+
+    def evaluate(self, local_namespace: Dict):
+        """Evaluate the expression with the arrays of a block"""
+        return self.numexpr.evaluate(
+            self.expression,
+            local_dict=local_namespace,
+            global_dict=self.global_namespace,
+        )
+
+
+CalcEngines = {"numpy": CalcExpression, "numexpr": NumExprCalcExpression}
+
+
+def _create_lazy_vrt(
+    outfile: str,
+    dimensions: Sequence[int],
+    out_type: GDALDataType,
+    band_sources: Sequence[Sequence[Tuple[gdal.Dataset, Optional[str], int]]],
+    band_calcs: Sequence[str],
+    alphas: Sequence[str],
+    list_alphas: Sequence[str],
+    nodata: Sequence[Optional[Number]],
+    out_nodata: Optional[Number],
+) -> Optional[gdal.Dataset]:
+    """Write a VRT whose bands evaluate the calculations with a Python pixel
+    function, from the (dataset, filename, band number) of each input of each
+    output band, and return it opened in update mode"""
+
+    def attr(value) -> str:
+        return xml.sax.saxutils.quoteattr(str(value))
+
+    vrt_xml = (
+        f'<VRTDataset rasterXSize="{dimensions[0]}" rasterYSize="{dimensions[1]}">\n'
+    )
+    for band_no, (sources, band_calc) in enumerate(
+        zip(band_sources, band_calcs), start=1
+    ):
+        bands = [ds.GetRasterBand(src_band) for ds, _, src_band in sources]
+        transfer_type = bands[0].DataType
+        list_types = {}
+        for alpha, band in zip(alphas, bands):
+            transfer_type = gdal.DataTypeUnion(transfer_type, band.DataType)
+            if alpha in list_alphas:
+                list_types[alpha] = gdal.DataTypeUnion(
+                    list_types.get(alpha, band.DataType), band.DataType
+                )
+        dtypes = [
+            numpy.dtype(gdal_array.GDALTypeCodeToNumericTypeCode(band.DataType)).name
+            for band in bands
+        ]
+        list_dtypes = [
+            f"{alpha}={numpy.dtype(gdal_array.GDALTypeCodeToNumericTypeCode(dt)).name}"
+            for alpha, dt in list_types.items()
+        ]
+
+        vrt_xml += (
+            f'  <VRTRasterBand dataType="{gdal.GetDataTypeName(out_type)}" '
+            f'band="{band_no}" subClass="VRTDerivedRasterBand">\n'
+            f"    <PixelFunctionType>gdal_calc</PixelFunctionType>\n"
+            f"    <PixelFunctionLanguage>Python</PixelFunctionLanguage>\n"
+            f"    <PixelFunctionCode><![CDATA[{LazyPixelFunctionCode}]]></PixelFunctionCode>\n"
+            f"    <PixelFunctionArguments calc={attr(band_calc)} "
+            f"alphas={attr(','.join(alphas))} "
+            f"dtypes={attr(','.join(dtypes))} "
+            f"nodata={attr(','.join(repr(v) for v in nodata))} "
+            f"out_nodata={attr(repr(out_nodata))} "
+            f"list_dtypes={attr(','.join(list_dtypes))}/>\n"
+            f"    <SourceTransferType>{gdal.GetDataTypeName(transfer_type)}</SourceTransferType>\n"
+        )
+        for (ds, filename, src_band), band in zip(sources, bands):
+            if filename is None:
+                # a Dataset object: it must be reopenable from its description
+                filename = ds.GetDescription()
+                if not filename or gdal.VSIStatL(filename) is None:
+                    raise Exception(
+                        "Error! lazy requires inputs that can be reopened from "
+                        "their filename"
+                    )
+            filename = os.fspath(filename)
+            relative = "0"
+            if not os.path.isabs(filename) and not filename.startswith("/vsi"):
+                try:
+                    filename = os.path.relpath(
+                        filename, os.path.dirname(outfile) or os.curdir
+                    )
+                    relative = "1"
+                except ValueError:
+                    # Thrown if generating a relative path is not possible, e.g. if
+                    # filename is on a different Windows drive from outfile
+                    pass
+            block_xsize, block_ysize = band.GetBlockSize()
+            vrt_xml += (
+                f"    <SimpleSource>\n"
+                f'      <SourceFilename relativeToVRT="{relative}">'
+                f"{xml.sax.saxutils.escape(filename)}</SourceFilename>\n"
+                f"      <SourceBand>{src_band}</SourceBand>\n"
+                f'      <SourceProperties RasterXSize="{dimensions[0]}" '
+                f'RasterYSize="{dimensions[1]}" '
+                f'DataType="{gdal.GetDataTypeName(band.DataType)}" '
+                f'BlockXSize="{block_xsize}" BlockYSize="{block_ysize}"/>\n'
+                f"    </SimpleSource>\n"
+            )
+        vrt_xml += "  </VRTRasterBand>\n"
+    vrt_xml += "</VRTDataset>\n"
+
+    f = gdal.VSIFOpenL(outfile, "wb")
+    if f is None:
+        return None
+    gdal.VSIFWriteL(vrt_xml, 1, len(vrt_xml), f)
+    gdal.VSIFCloseL(f)
+    return gdal.Open(outfile, gdal.GA_Update)
+
 
 @enable_gdal_exceptions
 def Calc(
@@ -113,6 +557,10 @@ def Calc(
     debug: bool = False,
     quiet: bool = False,
     progress_callback: Optional = gdal.TermProgress_nocb,
+    num_threads: Optional[Union[int, str]] = None,
+    engine: str = "numpy",
+    max_chunk_memory: Optional[float] = None,
+    lazy: bool = False,
     **input_files,
 ):
 
@@ -120,7 +568,15 @@ def Calc(
         print(f"gdal_calc.py starting calculation {calc}")
 
     if outfile and os.path.isfile(outfile) and not overwrite:
-        if type or format or creation_options or hideNoData or extent or projwin:
+        if (
+            type
+            or format
+            or creation_options
+            or hideNoData
+            or extent
+            or projwin
+            or lazy
+        ):
             raise Exception(
                 "One or several options implying file creation have been provided but Output file exists, must use --overwrite option!"
             )
@@ -143,8 +599,23 @@ def Calc(
     }
 
     if user_namespace:
+        if lazy:
+            raise Exception(
+                "Error! user_namespace cannot be used with lazy, as it cannot be "
+                "serialized in the VRT"
+            )
         global_namespace.update(user_namespace)
 
+    if engine not in CalcEngines:
+        raise Exception(
+            f"Error! Unknown engine {engine}, should be one of {', '.join(CalcEngines)}"
+        )
+    if engine == "numexpr":
+        try:
+            import numexpr  # noqa
+        except ImportError:
+            raise Exception("Error! The numexpr engine requires the numexpr module")
+
     if not calc:
         raise Exception("No calculation provided.")
     elif not outfile and format.upper() != "MEM":
@@ -152,6 +623,8 @@ def Calc(
 
     if format is None:
         format = GetOutputDriverFor(outfile)
+    if lazy and format.upper() != "VRT":
+        raise Exception("Error! lazy requires the VRT output format")
 
     if isinstance(extent, GeoRectangle):
         pass
@@ -212,6 +685,11 @@ def Calc(
         else:
             # I guess this alphas should be in the global_namespace,
             # It would have been better to pass it as user_namespace, but I'll accept it anyway
+            if lazy:
+                raise Exception(
+                    f"Error! {alphas} is not an input file, and cannot be "
+                    f"serialized in the VRT written with lazy"
+                )
             global_namespace[alphas] = filenames
             continue
         for alpha, filename in zip(alphas * len(filenames), filenames):
@@ -318,10 +796,20 @@ def Calc(
     else:
         allBandsCount = len(calc)
 
+    def input_band_number(i, bandNo):
+        if allBandsIndex is not None and allBandsIndex == i:
+            return bandNo
+        return myBands[i]
+
     if extent not in [Extent.IGNORE, Extent.FAIL] and (
         GeoTransformDiffer or isinstance(extent, GeoRectangle)
     ):
         # mixing different GeoTransforms/Extents
+        if lazy:
+            raise Exception(
+                "Error! lazy cannot be used with inputs of different extents, "
+                "or with an output extent"
+            )
         (
             GeoTransformCheck,
             DimensionsCheck,
@@ -410,16 +898,47 @@ def Calc(
             if isinstance(myOutType, str):
                 myOutType = gdal.GetDataTypeByName(myOutType)
 
+        if NoDataValue is None and not hideNoData:
+            myOutNDV = DefaultNDVLookup[
+                myOutType
+            ]  # use the default noDataValue for this datatype
+        elif isinstance(NoDataValue, str) and NoDataValue.lower() == "none":
+            myOutNDV = None  # not to set any noDataValue
+        else:
+            myOutNDV = NoDataValue  # use the given noDataValue
+
         # create file
-        myOutDrv = gdal.GetDriverByName(format)
-        myOut = myOutDrv.Create(
-            os.fspath(outfile),
-            DimensionsCheck[0],
-            DimensionsCheck[1],
-            allBandsCount,
-            myOutType,
-            creation_options,
-        )
+        if lazy:
+            myOut = _create_lazy_vrt(
+                os.fspath(outfile),
+                DimensionsCheck,
+                myOutType,
+                [
+                    [
+                        (myFiles[i], myFileNames[i], input_band_number(i, bandNo))
+                        for i in range(len(myFiles))
+                    ]
+                    for bandNo in range(1, allBandsCount + 1)
+                ],
+                [
+                    calc[bandNo - 1 if len(calc) > 1 else 0]
+                    for bandNo in range(1, allBandsCount + 1)
+                ],
+                myAlphaList,
+                myAlphaFileLists,
+                myNDV,
+                myOutNDV,
+            )
+        else:
+            myOutDrv = gdal.GetDriverByName(format)
+            myOut = myOutDrv.Create(
+                os.fspath(outfile),
+                DimensionsCheck[0],
+                DimensionsCheck[1],
+                allBandsCount,
+                myOutType,
+                creation_options,
+            )
         if myOut is None:
             raise Exception(f"Error! Could not create output file {outfile}")
 
@@ -434,15 +953,6 @@ def Calc(
         if ProjectionCheck:
             myOut.SetProjection(ProjectionCheck)
 
-        if NoDataValue is None and not hideNoData:
-            myOutNDV = DefaultNDVLookup[
-                myOutType
-            ]  # use the default noDataValue for this datatype
-        elif isinstance(NoDataValue, str) and NoDataValue.lower() == "none":
-            myOutNDV = None  # not to set any noDataValue
-        else:
-            myOutNDV = NoDataValue  # use the given noDataValue
-
         for i in range(1, allBandsCount + 1):
             myOutB = myOut.GetRasterBand(i)
             if myOutNDV is not None:
@@ -462,48 +972,66 @@ def Calc(
             f"output file: {outfile}, dimensions: {myOut.RasterXSize}, {myOut.RasterYSize}, type: {myOutTypeName}"
         )
 
+    if lazy:
+        # the calculation is evaluated when the VRT is read
+        myOut.FlushCache()
+        if not quiet:
+            progress_callback(1.0, "", None)
+        return myOut
+
     ################################################################
-    # find block size to chop grids into bite-sized chunks
+    # set up the datasets read by each thread
     ################################################################
 
-    # use the block size of the first layer to read efficiently
-    myBlockSize = myFiles[0].GetRasterBand(myBands[0]).GetBlockSize()
-    # find total x and y blocks to be read
-    nXBlocks = (int)((DimensionsCheck[0] + myBlockSize[0] - 1) / myBlockSize[0])
-    nYBlocks = (int)((DimensionsCheck[1] + myBlockSize[1] - 1) / myBlockSize[1])
-    myBufSize = myBlockSize[0] * myBlockSize[1]
-
-    if debug:
-        print(f"using blocksize {myBlockSize[0]} x {myBlockSize[1]}")
-
-    # variables for displaying progress
-    ProgressCt = -1
-    ProgressEnd = nXBlocks * nYBlocks * allBandsCount
+    if num_threads is not None and str(num_threads).upper() == "ALL_CPUS":
+        num_threads = gdal.GetNumCPUs()
+    num_threads = int(num_threads) if num_threads else 1
+    if num_threads < 1:
+        raise Exception("Error! num_threads must be a strictly positive integer")
+
+    # Datasets cannot be used concurrently by several threads, so each thread
+    # opens its own dataset handles, except for inputs given as Dataset
+    # objects, which are shared and read under a lock.
+    myInputPaths = []
+    for i in range(len(myFiles)):
+        if myTempFileNames:
+            myFiles[i].FlushCache()  # make sure the temp vrt is written
+            myInputPaths.append(myTempFileNames[i])
+        else:
+            myInputPaths.append(myFileNames[i])
+    sharedFilesLock = threading.Lock()
+    threadLocal = threading.local()
+
+    def get_thread_files():
+        if num_threads == 1:
+            return myFiles
+        files = getattr(threadLocal, "files", None)
+        if files is None:
+            files = [
+                open_ds(path) if path is not None else ds
+                for path, ds in zip(myInputPaths, myFiles)
+            ]
+            threadLocal.files = files
+        return files
+
+    def file_lock(files, i):
+        if num_threads > 1 and files[i] is myFiles[i]:
+            return sharedFilesLock
+        return contextlib.nullcontext()
 
     ################################################################
-    # start looping through each band in allBandsCount
+    # find the input bands used for each output band
     ################################################################
 
+    count_file_per_alpha_per_band = {}
+    largest_datatype_per_alpha_per_band = {}
     for bandNo in range(1, allBandsCount + 1):
-
-        ################################################################
-        # start looping through blocks of data
-        ################################################################
-
-        # store these numbers in variables that may change later
-        nXValid = myBlockSize[0]
-        nYValid = myBlockSize[1]
-
         count_file_per_alpha = {}
         largest_datatype_per_alpha = {}
         for i, Alpha in enumerate(myAlphaList):
             if Alpha in myAlphaFileLists:
                 # populate lettered arrays with values
-                if allBandsIndex is not None and allBandsIndex == i:
-                    myBandNo = bandNo
-                else:
-                    myBandNo = myBands[i]
-                band = myFiles[i].GetRasterBand(myBandNo)
+                band = myFiles[i].GetRasterBand(input_band_number(i, bandNo))
                 if Alpha not in count_file_per_alpha:
                     count_file_per_alpha[Alpha] = 1
                     largest_datatype_per_alpha[Alpha] = band.DataType
@@ -513,135 +1041,251 @@ def Calc(
                         largest_datatype_per_alpha[Alpha] = gdal.DataTypeUnion(
                             largest_datatype_per_alpha[Alpha], band.DataType
                         )
+        count_file_per_alpha_per_band[bandNo] = count_file_per_alpha
+        largest_datatype_per_alpha_per_band[bandNo] = largest_datatype_per_alpha
+
+    # The bands of a same file (with the same data type, so that arrays keep
+    # the data type of their band) used by the inputs that are not lists of
+    # files are read with a single multi-band read per chunk.
+    myReadGroups = {}  # (file key, data type) -> (file index, band numbers)
+    myReadGroupOfInput = {}  # (input index, bandNo) -> (read group, band index)
+    for bandNo in range(1, allBandsCount + 1):
+        for i, Alpha in enumerate(myAlphaList):
+            if Alpha in myAlphaFileLists:
+                continue
+            myBandNo = input_band_number(i, bandNo)
+            file_key = myFileNames[i] if myFileNames[i] is not None else id(myFiles[i])
+            group_key = (file_key, myFiles[i].GetRasterBand(myBandNo).DataType)
+            if group_key not in myReadGroups:
+                myReadGroups[group_key] = (i, [])
+            band_list = myReadGroups[group_key][1]
+            if myBandNo not in band_list:
+                band_list.append(myBandNo)
+            myReadGroupOfInput[(i, bandNo)] = (
+                list(myReadGroups).index(group_key),
+                band_list.index(myBandNo),
+            )
+    myReadGroups = list(myReadGroups.items())
 
-        # loop through X-lines
-        for X in range(0, nXBlocks):
-
-            # in case the blocks don't fit perfectly
-            # change the block size of the final piece
-            if X == nXBlocks - 1:
-                nXValid = DimensionsCheck[0] - X * myBlockSize[0]
-
-            # find X offset
-            myX = X * myBlockSize[0]
-
-            # reset buffer size for start of Y loop
-            nYValid = myBlockSize[1]
-            myBufSize = nXValid * nYValid
+    ################################################################
+    # find chunk size to chop grids into bite-sized chunks
+    ################################################################
 
-            # loop through Y lines
-            for Y in range(0, nYBlocks):
-                ProgressCt += 1
-                if not quiet:
-                    progress_callback(float(ProgressCt) / ProgressEnd, "", None)
+    # use windows made of whole blocks of all the inputs and the output, to
+    # read and write efficiently
+    myBlockSizes = [myOut.GetRasterBand(1).GetBlockSize()]
+    for bandNo in range(1, allBandsCount + 1):
+        for i in range(len(myFiles)):
+            myBlockSizes.append(
+                myFiles[i].GetRasterBand(input_band_number(i, bandNo)).GetBlockSize()
+            )
 
-                # change the block size of the final piece
-                if Y == nYBlocks - 1:
-                    nYValid = DimensionsCheck[1] - Y * myBlockSize[1]
-                    myBufSize = nXValid * nYValid
+    # rough estimate of the memory needed per pixel of a chunk: input arrays,
+    # results of each output band, and nodata mask and temporary arrays of the
+    # evaluation of one output band
+    myBytesPerPixel = sum(
+        len(band_list) * gdal.GetDataTypeSize(group_key[1]) // 8
+        for group_key, (_, band_list) in myReadGroups
+    )
+    for count_file_per_alpha, largest_datatype_per_alpha in zip(
+        count_file_per_alpha_per_band.values(),
+        largest_datatype_per_alpha_per_band.values(),
+    ):
+        for Alpha, count in count_file_per_alpha.items():
+            myBytesPerPixel += (
+                count * gdal.GetDataTypeSize(largest_datatype_per_alpha[Alpha]) // 8
+            )
+    myBytesPerPixel += allBandsCount * gdal.GetDataTypeSize(myOutType) // 8
+    myBytesPerPixel += 3 * 8
+
+    if max_chunk_memory is None:
+        max_chunk_memory = DefaultMaxChunkMemory
+    if max_chunk_memory <= 0:
+        raise Exception("Error! max_chunk_memory must be strictly positive")
+    myBlockSize = plan_chunk_size(
+        DimensionsCheck,
+        myBlockSizes,
+        myBytesPerPixel,
+        int(max_chunk_memory * 1024 * 1024),
+    )
+    # find total x and y blocks to be read
+    nXBlocks = (int)((DimensionsCheck[0] + myBlockSize[0] - 1) / myBlockSize[0])
+    nYBlocks = (int)((DimensionsCheck[1] + myBlockSize[1] - 1) / myBlockSize[1])
 
-                # find Y offset
-                myY = Y * myBlockSize[1]
+    if debug:
+        print(f"using blocksize {myBlockSize[0]} x {myBlockSize[1]}")
 
-                # create empty buffer to mark where nodata occurs
-                myNDVs = None
+    # variables for displaying progress
+    ProgressCt = -1
+    ProgressEnd = nXBlocks * nYBlocks
 
-                # make local namespace for calculation
-                local_namespace = {}
+    ################################################################
+    # read the inputs and evaluate the calculations on a block
+    ################################################################
 
-                # Create destination numpy arrays for each alpha
-                numpy_arrays = {}
-                counter_per_alpha = {}
-                for Alpha in count_file_per_alpha:
-                    dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
-                        largest_datatype_per_alpha[Alpha]
+    @enable_gdal_exceptions
+    def calc_block(block):
+        """Read the inputs and evaluate the calculation of each output band on
+        a block"""
+        myX, myY, nXValid, nYValid = block
+        files = get_thread_files()
+
+        # fetch data for each file read at once
+        group_arrays = []
+        for _, (i, band_list) in myReadGroups:
+            with file_lock(files, i):
+                myval = files[i].ReadAsArray(
+                    myX, myY, nXValid, nYValid, band_list=band_list
+                )
+            if myval is None:
+                raise Exception(
+                    f"Input block reading failed from filename {myFileNames[i]}"
+                )
+            if len(band_list) == 1:
+                myval = myval[numpy.newaxis]
+            group_arrays.append(myval)
+
+        myResults = []
+        for bandNo in range(1, allBandsCount + 1):
+            count_file_per_alpha = count_file_per_alpha_per_band[bandNo]
+            largest_datatype_per_alpha = largest_datatype_per_alpha_per_band[bandNo]
+
+            # create empty buffer to mark where nodata occurs
+            myNDVs = None
+
+            # make local namespace for calculation
+            local_namespace = {}
+
+            # Create destination numpy arrays for each alpha
+            numpy_arrays = {}
+            counter_per_alpha = {}
+            for Alpha in count_file_per_alpha:
+                dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
+                    largest_datatype_per_alpha[Alpha]
+                )
+                if count_file_per_alpha[Alpha] == 1:
+                    numpy_arrays[Alpha] = numpy.empty((nYValid, nXValid), dtype=dtype)
+                else:
+                    numpy_arrays[Alpha] = numpy.empty(
+                        (count_file_per_alpha[Alpha], nYValid, nXValid), dtype=dtype
                     )
-                    if count_file_per_alpha[Alpha] == 1:
-                        numpy_arrays[Alpha] = numpy.empty(
-                            (nYValid, nXValid), dtype=dtype
-                        )
-                    else:
-                        numpy_arrays[Alpha] = numpy.empty(
-                            (count_file_per_alpha[Alpha], nYValid, nXValid), dtype=dtype
-                        )
-                    counter_per_alpha[Alpha] = 0
+                counter_per_alpha[Alpha] = 0
 
-                # fetch data for each input layer
-                for i, Alpha in enumerate(myAlphaList):
+            # fetch data for each input layer
+            for i, Alpha in enumerate(myAlphaList):
 
+                if Alpha in myAlphaFileLists:
                     # populate lettered arrays with values
-                    if allBandsIndex is not None and allBandsIndex == i:
-                        myBandNo = bandNo
+                    if count_file_per_alpha[Alpha] == 1:
+                        buf_obj = numpy_arrays[Alpha]
                     else:
-                        myBandNo = myBands[i]
-
-                    if Alpha in myAlphaFileLists:
-                        if count_file_per_alpha[Alpha] == 1:
-                            buf_obj = numpy_arrays[Alpha]
-                        else:
-                            buf_obj = numpy_arrays[Alpha][counter_per_alpha[Alpha]]
+                        buf_obj = numpy_arrays[Alpha][counter_per_alpha[Alpha]]
+                    counter_per_alpha[Alpha] += 1
+                    with file_lock(files, i):
                         myval = gdal_array.BandReadAsArray(
-                            myFiles[i].GetRasterBand(myBandNo),
+                            files[i].GetRasterBand(input_band_number(i, bandNo)),
                             xoff=myX,
                             yoff=myY,
                             win_xsize=nXValid,
                             win_ysize=nYValid,
                             buf_obj=buf_obj,
                         )
-                        counter_per_alpha[Alpha] += 1
-                    else:
-                        myval = gdal_array.BandReadAsArray(
-                            myFiles[i].GetRasterBand(myBandNo),
-                            xoff=myX,
-                            yoff=myY,
-                            win_xsize=nXValid,
-                            win_ysize=nYValid,
-                        )
                     if myval is None:
                         raise Exception(
-                            f"Input block reading failed from filename {filename[i]}"
+                            f"Input block reading failed from filename {myFileNames[i]}"
                         )
+                else:
+                    group_idx, band_idx = myReadGroupOfInput[(i, bandNo)]
+                    myval = group_arrays[group_idx][band_idx]
+
+                # fill in nodata values
+                if myNDV[i] is not None:
+                    # myNDVs is a boolean buffer.
+                    # a cell equals to 1 if there is NDV in any of the corresponding cells in input raster bands.
+                    if myNDVs is None:
+                        # this is the first band that has NDV set. we initializes myNDVs to a zero buffer
+                        # as we didn't see any NDV value yet.
+                        myNDVs = numpy.zeros(nXValid * nYValid)
+                        myNDVs.shape = (nYValid, nXValid)
+                    myNDVs = 1 * numpy.logical_or(myNDVs == 1, myval == myNDV[i])
+
+                # add an array of values for this block to the eval namespace
+                if Alpha not in myAlphaFileLists:
+                    local_namespace[Alpha] = myval
+                myval = None
+
+            for lst in myAlphaFileLists:
+                local_namespace[lst] = numpy_arrays[lst]
+
+            # try the calculation on the array blocks
+            calc_index = bandNo - 1 if len(calc) > 1 else 0
+            this_calc = calc[calc_index]
+            try:
+                # expressions, and their scratch buffers, are specific to a thread
+                evaluators = getattr(threadLocal, "evaluators", None)
+                if evaluators is None:
+                    evaluators = threadLocal.evaluators = {}
+                if calc_index not in evaluators:
+                    evaluators[calc_index] = CalcEngines[engine](
+                        this_calc, global_namespace
+                    )
+                myResult = evaluators[calc_index].evaluate(local_namespace)
+            except Exception:
+                print(f"evaluation of calculation {this_calc} failed")
+                raise
 
-                    # fill in nodata values
-                    if myNDV[i] is not None:
-                        # myNDVs is a boolean buffer.
-                        # a cell equals to 1 if there is NDV in any of the corresponding cells in input raster bands.
-                        if myNDVs is None:
-                            # this is the first band that has NDV set. we initializes myNDVs to a zero buffer
-                            # as we didn't see any NDV value yet.
-                            myNDVs = numpy.zeros(myBufSize)
-                            myNDVs.shape = (nYValid, nXValid)
-                        myNDVs = 1 * numpy.logical_or(myNDVs == 1, myval == myNDV[i])
-
-                    # add an array of values for this block to the eval namespace
-                    if Alpha not in myAlphaFileLists:
-                        local_namespace[Alpha] = myval
-                    myval = None
-
-                for lst in myAlphaFileLists:
-                    local_namespace[lst] = numpy_arrays[lst]
-
-                # try the calculation on the array blocks
-                this_calc = calc[bandNo - 1 if len(calc) > 1 else 0]
-                try:
-                    myResult = eval(this_calc, global_namespace, local_namespace)
-                except Exception:
-                    print(f"evaluation of calculation {this_calc} failed")
-                    raise
-
-                # Propagate nodata values (set nodata cells to zero
-                # then add nodata value to these cells).
-                if myNDVs is not None and myOutNDV is not None:
-                    myResult = ((1 * (myNDVs == 0)) * myResult) + (myOutNDV * myNDVs)
-                elif not isinstance(myResult, numpy.ndarray):
-                    myResult = numpy.ones((nYValid, nXValid)) * myResult
-
-                # Convert float16 to float32 if necessary
-                # (While numpy probably supports float16, GDAL may not)
-                if myResult.dtype == "float16":
-                    myResult = numpy.float32(myResult)
-
-                # write data block to the output file
+            # Propagate nodata values (set nodata cells to zero
+            # then add nodata value to these cells).
+            if myNDVs is not None and myOutNDV is not None:
+                myResult = ((1 * (myNDVs == 0)) * myResult) + (myOutNDV * myNDVs)
+            elif not isinstance(myResult, numpy.ndarray):
+                myResult = numpy.ones((nYValid, nXValid)) * myResult
+
+            # Convert float16 to float32 if necessary
+            # (While numpy probably supports float16, GDAL may not)
+            if myResult.dtype == "float16":
+                myResult = numpy.float32(myResult)
+
+            myResults.append(myResult)
+
+        return myResults
+
+    ################################################################
+    # start looping through blocks of data
+    ################################################################
+
+    def blocks():
+        # loop through X-lines
+        for X in range(0, nXBlocks):
+            # find X offset, and in case the blocks don't fit perfectly
+            # change the block size of the final piece
+            myX = X * myBlockSize[0]
+            nXValid = min(myBlockSize[0], DimensionsCheck[0] - myX)
+
+            # loop through Y lines
+            for Y in range(0, nYBlocks):
+                myY = Y * myBlockSize[1]
+                nYValid = min(myBlockSize[1], DimensionsCheck[1] - myY)
+                yield myX, myY, nXValid, nYValid
+
+    with (
+        concurrent.futures.ThreadPoolExecutor(num_threads)
+        if num_threads > 1
+        else contextlib.nullcontext()
+    ) as executor:
+        if executor:
+            # blocks are evaluated concurrently, and written in order
+            results = _map_ordered(executor, calc_block, blocks(), 2 * num_threads)
+        else:
+            results = map(calc_block, blocks())
+
+        for (myX, myY, _, _), myResults in zip(blocks(), results):
+            ProgressCt += 1
+            if not quiet:
+                progress_callback(float(ProgressCt) / ProgressEnd, "", None)
+
+            # write data blocks to the output file
+            for bandNo, myResult in enumerate(myResults, start=1):
                 myOutB = myOut.GetRasterBand(bandNo)
                 if gdal_array.BandWriteArray(myOutB, myResult, xoff=myX, yoff=myY) != 0:
                     raise Exception("Block writing failed")
@@ -852,6 +1496,37 @@ class GDALCalc(GDALScript):
             "--color-table", type=str, dest="color_table", help="color table file name"
         )
 
+        parser.add_argument(
+            "--threads",
+            dest="num_threads",
+            type=str,
+            metavar="{ALL_CPUS|n}",
+            help="number of threads used to evaluate blocks concurrently (default 1)",
+        )
+        parser.add_argument(
+            "--max-chunk-memory",
+            dest="max_chunk_memory",
+            type=float,
+            metavar="megabytes",
+            help=f"approximate memory budget of a processing chunk, in megabytes "
+            f"(default {DefaultMaxChunkMemory})",
+        )
+        parser.add_argument(
+            "--engine",
+            dest="engine",
+            choices=list(CalcEngines),
+            default="numpy",
+            help="engine evaluating the calculation: numpy (default), or numexpr "
+            "if installed",
+        )
+        parser.add_argument(
+            "--lazy",
+            dest="lazy",
+            action="store_true",
+            help="write a VRT output file whose bands evaluate the calculation "
+            "when they are read, instead of computing the values",
+        )
+
         group = parser.add_mutually_exclusive_group()
         group.add_argument(
             "--extent",
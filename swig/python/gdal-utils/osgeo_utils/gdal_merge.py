@@ -29,8 +29,11 @@
 # building the stack.
 # anssi.pekkarinen@fao.org
 
+import collections
+import concurrent.futures
 import math
 import sys
+import threading
 import time
 
 from osgeo import gdal
@@ -291,11 +294,58 @@ class file_info:
         Returns 1 on success (or if nothing needs to be copied), and zero one
         failure.
         """
-        t_geotransform = t_fh.GetGeoTransform()
+        windows = self.get_windows(
+            t_fh.GetGeoTransform(), t_fh.RasterXSize, t_fh.RasterYSize
+        )
+        if windows is None:
+            return 1
+        (
+            tw_xoff,
+            tw_yoff,
+            tw_xsize,
+            tw_ysize,
+            sw_xoff,
+            sw_yoff,
+            sw_xsize,
+            sw_ysize,
+        ) = windows
+
+        # Open the source file, and copy the selected region.
+        s_fh = gdal.Open(self.filename)
+
+        return raster_copy(
+            s_fh,
+            sw_xoff,
+            sw_yoff,
+            sw_xsize,
+            sw_ysize,
+            s_band,
+            t_fh,
+            tw_xoff,
+            tw_yoff,
+            tw_xsize,
+            tw_ysize,
+            t_band,
+            nodata_arg,
+            verbose,
+        )
+
+    def get_windows(self, t_geotransform, t_xsize, t_ysize):
+        """
+        Compute the overlap area of this file and of a target raster.
+
+        t_geotransform -- geotransform of the target raster.
+        t_xsize, t_ysize -- dimensions of the target raster.
+
+        Returns the target window and the source window, as a
+        (tw_xoff, tw_yoff, tw_xsize, tw_ysize, sw_xoff, sw_yoff, sw_xsize,
+        sw_ysize) tuple in pixel coordinates, or None if they do not
+        intersect.
+        """
         t_ulx = t_geotransform[0]
         t_uly = t_geotransform[3]
-        t_lrx = t_geotransform[0] + t_fh.RasterXSize * t_geotransform[1]
-        t_lry = t_geotransform[3] + t_fh.RasterYSize * t_geotransform[5]
+        t_lrx = t_geotransform[0] + t_xsize * t_geotransform[1]
+        t_lry = t_geotransform[3] + t_ysize * t_geotransform[5]
 
         # figure out intersection region
         tgw_ulx = max(t_ulx, self.ulx)
@@ -309,11 +359,11 @@ class file_info:
 
         # do they even intersect?
         if tgw_ulx >= tgw_lrx:
-            return 1
+            return None
         if t_geotransform[5] < 0 and tgw_uly <= tgw_lry:
-            return 1
+            return None
         if t_geotransform[5] > 0 and tgw_uly >= tgw_lry:
-            return 1
+            return None
 
         # compute target window in pixel coordinates.
         tw_xoff = int((tgw_ulx - t_geotransform[0]) / t_geotransform[1] + 0.1)
@@ -326,7 +376,7 @@ class file_info:
         )
 
         if tw_xsize < 1 or tw_ysize < 1:
-            return 1
+            return None
 
         # Compute source window in pixel coordinates.
         sw_xoff = int((tgw_ulx - self.geotransform[0]) / self.geotransform[1] + 0.1)
@@ -339,29 +389,222 @@ class file_info:
         )
 
         if sw_xsize < 1 or sw_ysize < 1:
-            return 1
-
-        # Open the source file, and copy the selected region.
-        s_fh = gdal.Open(self.filename)
+            return None
 
-        return raster_copy(
-            s_fh,
-            sw_xoff,
-            sw_yoff,
-            sw_xsize,
-            sw_ysize,
-            s_band,
-            t_fh,
+        return (
             tw_xoff,
             tw_yoff,
             tw_xsize,
             tw_ysize,
-            t_band,
-            nodata_arg,
-            verbose,
+            sw_xoff,
+            sw_yoff,
+            sw_xsize,
+            sw_ysize,
         )
 
 
+# =============================================================================
+def merge_blocks(
+    t_fh, file_infos, band_sources, nodata=None, num_threads=1, callback=None
+):
+    """
+    Copy the images of source files into a target file, one chunk of whole
+    blocks of the target file at a time.
+
+    The contributing files of each chunk are found with a grid index of the
+    target windows of the files, and composited in memory, in the order of
+    file_infos, before the chunk is written. Chunks are composited by a pool
+    of num_threads threads, and written by the calling thread, so that memory
+    use depends on the chunk size rather than on the size of the inputs.
+
+    t_fh -- gdal.Dataset object of the target file.
+    file_infos -- list of file_info objects.
+    band_sources -- for each band of the target file, list of the
+    (index in file_infos, source band number) copied into it.
+    nodata -- source nodata value, or None to use the source masks.
+    callback -- progress function called with the completed ratio.
+
+    Returns the number of chunks written.
+    """
+    import numpy as np
+
+    from osgeo import gdal_array
+
+    t_geotransform = t_fh.GetGeoTransform()
+    t_xsize = t_fh.RasterXSize
+    t_ysize = t_fh.RasterYSize
+    windows = [fi.get_windows(t_geotransform, t_xsize, t_ysize) for fi in file_infos]
+
+    # chunks made of whole blocks of the target file, of at least
+    # 512x512 pixels
+    block_xsize, block_ysize = t_fh.GetRasterBand(1).GetBlockSize()
+    chunk_xsize = min(block_xsize * max(1, -(-512 // block_xsize)), t_xsize)
+    chunk_ysize = min(block_ysize * max(1, -(-512 // block_ysize)), t_ysize)
+
+    # grid index: contributing files of each chunk, in order
+    chunk_files = {}
+    for i, window in enumerate(windows):
+        if window is None:
+            continue
+        tw_xoff, tw_yoff, tw_xsize, tw_ysize = window[:4]
+        for cy in range(
+            tw_yoff // chunk_ysize, (tw_yoff + tw_ysize - 1) // chunk_ysize + 1
+        ):
+            for cx in range(
+                tw_xoff // chunk_xsize, (tw_xoff + tw_xsize - 1) // chunk_xsize + 1
+            ):
+                chunk_files.setdefault((cx, cy), []).append(i)
+
+    # datasets cannot be used concurrently, so each thread opens its own,
+    # and the target dataset, written by the main thread, is not accessed by
+    # the workers
+    t_types = [t_fh.GetRasterBand(n).DataType for n in range(1, len(band_sources) + 1)]
+    thread_local = threading.local()
+
+    def get_source_ds(i):
+        datasets = getattr(thread_local, "datasets", None)
+        if datasets is None:
+            datasets = thread_local.datasets = {}
+        if i not in datasets:
+            datasets[i] = gdal.Open(file_infos[i].filename)
+        return datasets[i]
+
+    def composite_chunk(chunk, t_types):
+        """Composite the contributing files of a chunk, and return the data
+        and the mask of the pixels written of each target band, of data
+        types t_types"""
+        (cx, cy), files = chunk
+        x0 = cx * chunk_xsize
+        y0 = cy * chunk_ysize
+        xsize = min(chunk_xsize, t_xsize - x0)
+        ysize = min(chunk_ysize, t_ysize - y0)
+
+        results = []
+        for sources, t_type in zip(band_sources, t_types):
+            data = None
+            written = None
+            for i, s_band_n in sources:
+                if i not in files:
+                    continue
+                (
+                    tw_xoff,
+                    tw_yoff,
+                    tw_xsize,
+                    tw_ysize,
+                    sw_xoff,
+                    sw_yoff,
+                    sw_xsize,
+                    sw_ysize,
+                ) = windows[i]
+
+                # intersection of the target window with the chunk
+                ix0 = max(tw_xoff, x0)
+                iy0 = max(tw_yoff, y0)
+                ix1 = min(tw_xoff + tw_xsize, x0 + xsize)
+                iy1 = min(tw_yoff + tw_ysize, y0 + ysize)
+                if ix0 >= ix1 or iy0 >= iy1:
+                    continue
+
+                # corresponding (possibly fractional) source window
+                x_ratio = sw_xsize / tw_xsize
+                y_ratio = sw_ysize / tw_ysize
+                s_window = dict(
+                    xoff=sw_xoff + (ix0 - tw_xoff) * x_ratio,
+                    yoff=sw_yoff + (iy0 - tw_yoff) * y_ratio,
+                    win_xsize=(ix1 - ix0) * x_ratio,
+                    win_ysize=(iy1 - iy0) * y_ratio,
+                    buf_xsize=ix1 - ix0,
+                    buf_ysize=iy1 - iy0,
+                )
+
+                s_band = get_source_ds(i).GetRasterBand(s_band_n)
+                m_band = None
+                if nodata is None:
+                    if s_band.GetMaskFlags() != gdal.GMF_ALL_VALID:
+                        m_band = s_band.GetMaskBand()
+                    elif s_band.GetColorInterpretation() == gdal.GCI_AlphaBand:
+                        m_band = s_band
+
+                valid = None
+                if nodata is not None:
+                    data_src = s_band.ReadAsArray(**s_window)
+                    if not np.isnan(nodata):
+                        valid = np.not_equal(data_src, nodata)
+                    else:
+                        valid = ~np.isnan(data_src)
+                    if s_band.DataType != t_type:
+                        data_src = None
+                elif m_band is not None:
+                    valid = np.not_equal(m_band.ReadAsArray(**s_window), 0)
+                    data_src = None
+                else:
+                    data_src = None
+                if data_src is None:
+                    # let GDAL convert the values to the target data type
+                    data_src = s_band.ReadAsArray(buf_type=t_type, **s_window)
+
+                if data is None:
+                    data = np.empty(
+                        (ysize, xsize),
+                        dtype=gdal_array.GDALTypeCodeToNumericTypeCode(t_type),
+                    )
+                    written = np.zeros((ysize, xsize), dtype=bool)
+                data_view = data[iy0 - y0 : iy1 - y0, ix0 - x0 : ix1 - x0]
+                written_view = written[iy0 - y0 : iy1 - y0, ix0 - x0 : ix1 - x0]
+                if valid is None:
+                    data_view[...] = data_src
+                    written_view[...] = True
+                else:
+                    data_view[valid] = data_src[valid]
+                    written_view |= valid
+
+            results.append((data, written))
+        return x0, y0, results
+
+    chunks = sorted(chunk_files.items(), key=lambda item: (item[0][1], item[0][0]))
+    if not chunks and callback is not None:
+        callback(1.0)
+    if num_threads > 1:
+        executor = concurrent.futures.ThreadPoolExecutor(num_threads)
+    else:
+        executor = None
+
+    def composited_chunks():
+        if executor is None:
+            for chunk in chunks:
+                yield composite_chunk(chunk, t_types)
+            return
+        # keep a bounded number of chunks in flight, in order
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(composite_chunk, chunk, t_types))
+            if len(pending) >= 2 * num_threads:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    try:
+        for chunk_count, (x0, y0, results) in enumerate(composited_chunks(), 1):
+            for t_band_n, (data, written) in enumerate(results, start=1):
+                if data is None or not written.any():
+                    continue
+                t_band = t_fh.GetRasterBand(t_band_n)
+                if not written.all():
+                    # keep the existing values of the pixels not written
+                    data_dst = t_band.ReadAsArray(x0, y0, data.shape[1], data.shape[0])
+                    data_dst[written] = data[written]
+                    data = data_dst
+                t_band.WriteArray(data, x0, y0)
+            if callback is not None:
+                callback(chunk_count / float(len(chunks)))
+    finally:
+        if executor is not None:
+            # at most 2 * num_threads chunks are in flight
+            executor.shutdown()
+
+    return len(chunks)
+
+
 # =============================================================================
 def Usage(isError):
     f = sys.stderr if isError else sys.stdout
@@ -383,7 +626,11 @@ def Usage(isError):
         file=f,
     )
     print(
-        "                     [-ot <datatype>] [-createonly] <input_file> [<input_file>]...",
+        "                     [-ot <datatype>] [-createonly] [-threads <n>|ALL_CPUS]",
+        file=f,
+    )
+    print(
+        "                     <input_file> [<input_file>]...",
         file=f,
     )
     print("                     [--help-general]", file=f)
@@ -414,6 +661,7 @@ def _gdal_merge(argv=None):
     band_type = None
     createonly = 0
     bTargetAlignedPixels = False
+    num_threads = 1
     start_time = time.time()
 
     if argv is None:
@@ -489,6 +737,19 @@ def _gdal_merge(argv=None):
         elif arg == "-tap":
             bTargetAlignedPixels = True
 
+        elif arg == "-threads":
+            i = i + 1
+            if argv[i].upper() == "ALL_CPUS":
+                num_threads = gdal.GetNumCPUs()
+            else:
+                try:
+                    num_threads = int(argv[i])
+                except ValueError:
+                    num_threads = 0
+                if num_threads < 1:
+                    print("Invalid value for -threads: %s" % argv[i])
+                    return 1
+
         elif arg == "-ul_lr":
             ulx = float(argv[i + 1])
             uly = float(argv[i + 2])
@@ -619,34 +880,75 @@ def _gdal_merge(argv=None):
         progress(0.0)
     fi_processed = 0
 
-    for fi in file_infos:
-        if createonly != 0:
-            continue
+    try:
+        import numpy  # noqa
 
-        if verbose != 0:
-            print("")
-            print(
-                "Processing file %5d of %5d, %6.3f%% completed in %d minutes."
-                % (
-                    fi_processed + 1,
-                    len(file_infos),
-                    fi_processed * 100.0 / len(file_infos),
-                    int(round((time.time() - start_time) / 60.0)),
-                )
-            )
-            fi.report()
+        from osgeo import gdal_array  # noqa
+
+        has_numpy = True
+    except ImportError:
+        has_numpy = False
 
+    if has_numpy and createonly == 0:
+        # Composite the files one chunk of the output file at a time.
+        band_sources = []
         if separate == 0:
             for band in range(1, bands + 1):
-                fi.copy_into(t_fh, band, band, nodata, verbose)
+                band_sources.append([(i, band) for i in range(len(file_infos))])
         else:
-            for band in range(1, fi.bands + 1):
-                fi.copy_into(t_fh, band, t_band, nodata, verbose)
-                t_band = t_band + 1
+            for i, fi in enumerate(file_infos):
+                for band in range(1, fi.bands + 1):
+                    band_sources.append([(i, band)])
+
+        if verbose != 0:
+            for fi in file_infos:
+                print("")
+                fi.report()
 
-        fi_processed = fi_processed + 1
-        if quiet == 0 and verbose == 0:
-            progress(fi_processed / float(len(file_infos)))
+        nchunks = merge_blocks(
+            t_fh,
+            file_infos,
+            band_sources,
+            nodata,
+            num_threads,
+            progress if quiet == 0 and verbose == 0 else None,
+        )
+
+        if verbose != 0:
+            print(
+                "Processed %d chunks in %d minutes."
+                % (nchunks, int(round((time.time() - start_time) / 60.0)))
+            )
+
+    else:
+        for fi in file_infos:
+            if createonly != 0:
+                continue
+
+            if verbose != 0:
+                print("")
+                print(
+                    "Processing file %5d of %5d, %6.3f%% completed in %d minutes."
+                    % (
+                        fi_processed + 1,
+                        len(file_infos),
+                        fi_processed * 100.0 / len(file_infos),
+                        int(round((time.time() - start_time) / 60.0)),
+                    )
+                )
+                fi.report()
+
+            if separate == 0:
+                for band in range(1, bands + 1):
+                    fi.copy_into(t_fh, band, band, nodata, verbose)
+            else:
+                for band in range(1, fi.bands + 1):
+                    fi.copy_into(t_fh, band, t_band, nodata, verbose)
+                    t_band = t_band + 1
+
+            fi_processed = fi_processed + 1
+            if quiet == 0 and verbose == 0:
+                progress(fi_processed / float(len(file_infos)))
 
     # Force file to be closed.
     t_fh = None
@@ -13,6 +13,7 @@
 ###############################################################################
 import os
 import sys
+from collections import OrderedDict
 
 from osgeo import gdal, ogr, osr
 from osgeo_utils.auxiliary.util import enable_gdal_exceptions
@@ -52,32 +53,71 @@ class AffineTransformDecorator:
 
 
 class DataSetCache:
-    """A class for caching source tiles"""
+    """
+    A least recently used cache of opened source tiles
 
-    def __init__(self):
-        self.cacheSize = 8
-        self.queue = []
-        self.dict = {}
+    cacheSize -- Maximum number of opened datasets
+    cacheMemory -- Maximum approximate memory, in bytes, of the opened
+                   datasets (0 for no limit). The memory of a dataset is
+                   estimated as the size of one row of blocks of all its bands.
+    """
+
+    def __init__(self, cacheSize=8, cacheMemory=0):
+        self.cacheSize = cacheSize
+        self.cacheMemory = cacheMemory
+        self.dict = OrderedDict()
+        self.memory = 0
+        self.opens = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def get(self, name):
 
         if name in self.dict:
-            return self.dict[name]
+            self.hits += 1
+            self.dict.move_to_end(name)
+            return self.dict[name][0]
+        self.misses += 1
         result = gdal.Open(name)
         if result is None:
             print("Error opening: %s" % NameError, file=sys.stderr)
             return 1
-        if len(self.queue) == self.cacheSize:
-            toRemove = self.queue.pop(0)
-            del self.dict[toRemove]
-        self.queue.append(name)
-        self.dict[name] = result
+        self.opens += 1
+        memory = self.getMemory(result)
+        while self.dict and (
+            len(self.dict) >= self.cacheSize
+            or (self.cacheMemory and self.memory + memory > self.cacheMemory)
+        ):
+            _, (_, evictedMemory) = self.dict.popitem(last=False)
+            self.memory -= evictedMemory
+            self.evictions += 1
+        self.dict[name] = (result, memory)
+        self.memory += memory
         return result
 
+    @staticmethod
+    def getMemory(ds):
+        memory = 0
+        for iband in range(ds.RasterCount):
+            band = ds.GetRasterBand(iband + 1)
+            blockYSize = band.GetBlockSize()[1]
+            memory += (
+                ds.RasterXSize
+                * min(blockYSize, ds.RasterYSize)
+                * gdal.GetDataTypeSize(band.DataType)
+                // 8
+            )
+        return memory
+
+    def report(self):
+        print(
+            "Dataset cache: %d opens, %d hits, %d misses, %d evictions"
+            % (self.opens, self.hits, self.misses, self.evictions)
+        )
+
     def __del__(self):
-        for dataset in self.dict.values():
-            del dataset
-        del self.queue
+        self.dict.clear()
         del self.dict
 
 
@@ -113,18 +153,22 @@ class tile_info:
 class mosaic_info:
     """A class holding information about a GDAL file or a GDAL fileset"""
 
-    def __init__(self, filename, inputDS):
+    def __init__(self, filename, inputDS, vrtMosaic=False, cache=None):
         """
         Initialize mosaic_info from filename
 
         filename -- Name of file to read.
         inputDS -- OGR DataSet representing the tile index
+        vrtMosaic -- Whether to read the subsets from a VRT mosaic of the tiles
+        cache -- DataSetCache used to open the tiles
 
         """
         self.TempDriver = gdal.GetDriverByName("MEM")
         self.filename = filename
-        self.cache = DataSetCache()
+        self.cache = cache if cache is not None else DataSetCache()
         self.ogrTileIndexDS = inputDS
+        self.vrtMosaic = vrtMosaic
+        self.vrtDS = None
 
         self.ogrTileIndexDS.GetLayer().ResetReading()
         # grab the first feature of the temporary tile index created
@@ -164,6 +208,7 @@ class mosaic_info:
         self.ysize = abs(int(round((self.uly - self.lry) / self.scaleY)))
 
     def __del__(self):
+        del self.vrtDS
         del self.cache
         del self.ogrTileIndexDS
 
@@ -173,6 +218,10 @@ class mosaic_info:
 
         returns GDALDataset or None
         """
+        # BuildVRT() only produces north-up mosaics
+        if self.vrtMosaic and self.scaleY < 0:
+            return self.getDataSetFromVRT(minx, miny, maxx, maxy)
+
         self.ogrTileIndexDS.GetLayer().ResetReading()
         self.ogrTileIndexDS.GetLayer().SetSpatialFilterRect(minx, miny, maxx, maxy)
         features = []
@@ -300,6 +349,96 @@ class mosaic_info:
 
         return resultDS
 
+    def getVRT(self):
+        """
+        Build, on first use, a VRT mosaic of all the tiles of the index, in
+        the order of the index, with the resolution and extent of the mosaic.
+        """
+        if self.vrtDS is None:
+            layer = self.ogrTileIndexDS.GetLayer()
+            layer.ResetReading()
+            names = [feature.GetField(0) for feature in layer]
+            layer.ResetReading()
+            self.vrtDS = gdal.BuildVRT(
+                "",
+                names,
+                outputBounds=(self.ulx, self.lry, self.lrx, self.uly),
+                xRes=self.scaleX,
+                yRes=-self.scaleY,
+                srcNodata="None",
+                VRTNodata=self.nodata if self.nodata is not None else "None",
+            )
+        return self.vrtDS
+
+    def getDataSetFromVRT(self, minx, miny, maxx, maxy):
+        """
+        Same as getDataSet(), but reading the subset with a single
+        ReadRaster() call from a VRT mosaic, so that the GDAL block cache can
+        be reused between adjacent subsets.
+        """
+        layer = self.ogrTileIndexDS.GetLayer()
+        layer.SetSpatialFilterRect(minx, miny, maxx, maxy)
+        featureCount = layer.GetFeatureCount()
+        layer.SetSpatialFilter(None)
+        if featureCount == 0:
+            return None
+
+        vrtDS = self.getVRT()
+
+        resultSizeX = int((maxx - minx) / self.scaleX + 0.5)
+        resultSizeY = int((miny - maxy) / self.scaleY + 0.5)
+
+        resultDS = self.TempDriver.Create(
+            "TEMP", resultSizeX, resultSizeY, self.bands, self.band_type, []
+        )
+        resultDS.SetGeoTransform([minx, self.scaleX, 0, maxy, 0, self.scaleY])
+
+        for bandNr in range(1, self.bands + 1):
+            t_band = resultDS.GetRasterBand(bandNr)
+            if self.nodata is not None:
+                t_band.SetNoDataValue(self.nodata)
+            if self.ct is not None:
+                t_band.SetRasterColorTable(self.ct)
+            t_band.SetRasterColorInterpretation(self.ci[bandNr - 1])
+
+        # Window of the subset in the VRT, clipped to its extent
+        xoff = int((minx - self.ulx) / self.scaleX + 0.5)
+        yoff = int((maxy - self.uly) / self.scaleY + 0.5)
+        sw_xoff = max(xoff, 0)
+        sw_yoff = max(yoff, 0)
+        sw_xsize = min(xoff + resultSizeX, vrtDS.RasterXSize) - sw_xoff
+        sw_ysize = min(yoff + resultSizeY, vrtDS.RasterYSize) - sw_yoff
+        if sw_xsize <= 0 or sw_ysize <= 0:
+            return resultDS
+
+        if (
+            sw_xoff != xoff
+            or sw_yoff != yoff
+            or sw_xsize != resultSizeX
+            or sw_ysize != resultSizeY
+        ) and self.nodata is not None:
+            for bandNr in range(1, self.bands + 1):
+                resultDS.GetRasterBand(bandNr).Fill(self.nodata)
+
+        data = vrtDS.ReadRaster(
+            sw_xoff,
+            sw_yoff,
+            sw_xsize,
+            sw_ysize,
+            buf_type=self.band_type,
+            band_list=list(range(1, self.bands + 1)),
+        )
+        resultDS.WriteRaster(
+            sw_xoff - xoff,
+            sw_yoff - yoff,
+            sw_xsize,
+            sw_ysize,
+            data,
+            buf_type=self.band_type,
+            band_list=list(range(1, self.bands + 1)),
+        )
+        return resultDS
+
     def closeDataSet(self, memDS):
         del memDS
         # self.TempDriver.Delete("TEMP")
@@ -311,6 +450,10 @@ class mosaic_info:
         print("UL:(%f,%f)   LR:(%f,%f)" % (self.ulx, self.uly, self.lrx, self.lry))
 
 
+def createDataSetCache(g):
+    return DataSetCache(g.CacheSize, g.CacheMemory * 1024 * 1024)
+
+
 def getTileIndexFromFiles(g):
     if g.Verbose:
         print("Building internal Index for %d tile(s) ..." % len(g.Names), end=" ")
@@ -409,6 +552,7 @@ def tileImage(g, minfo, ti):
         processed = 0
         total = len(xRange) * len(yRange)
 
+    jobs = []
     for yIndex in yRange:
         for xIndex in xRange:
             offsetY = (yIndex - 1) * (ti.tileHeight - ti.overlap)
@@ -426,13 +570,12 @@ def tileImage(g, minfo, ti):
                 height = ti.height - offsetY
 
             feature_only = g.Resume and os.path.exists(tilename)
-            createTile(
-                g, minfo, offsetX, offsetY, width, height, tilename, OGRDS, feature_only
-            )
+            jobs.append((offsetX, offsetY, width, height, tilename, feature_only))
 
-            if not g.Quiet and not g.Verbose:
-                processed += 1
-                progress(processed / float(total))
+    for _ in runTileJobs(g, minfo, jobs, OGRDS, 0):
+        if not g.Quiet and not g.Verbose:
+            processed += 1
+            progress(processed / float(total))
 
     if g.TileIndexName is not None:
         if g.UseDirForEachRow and not g.PyramidOnly:
@@ -821,7 +964,9 @@ def buildPyramid(g, minfo, createdTileIndexDS, tileWidth, tileHeight, overlap):
     inputDS = createdTileIndexDS
     for level in range(1, g.Levels + 1):
         g.LastRowIndx = -1
-        levelMosaicInfo = mosaic_info(minfo.filename, inputDS)
+        levelMosaicInfo = mosaic_info(
+            minfo.filename, inputDS, g.VrtMosaic, createDataSetCache(g)
+        )
         levelOutputTileInfo = tile_info(
             int(levelMosaicInfo.xsize / 2),
             int(levelMosaicInfo.ysize / 2),
@@ -830,6 +975,8 @@ def buildPyramid(g, minfo, createdTileIndexDS, tileWidth, tileHeight, overlap):
             overlap,
         )
         inputDS = buildPyramidLevel(g, levelMosaicInfo, levelOutputTileInfo, level)
+        if g.Verbose:
+            levelMosaicInfo.cache.report()
 
 
 def buildPyramidLevel(g, levelMosaicInfo, levelOutputTileInfo, level):
@@ -847,6 +994,7 @@ def buildPyramidLevel(g, levelMosaicInfo, levelOutputTileInfo, level):
         g.TileIndexDriverTyp,
     )
 
+    jobs = []
     for yIndex in yRange:
         for xIndex in xRange:
             offsetY = (yIndex - 1) * (
@@ -868,17 +1016,10 @@ def buildPyramidLevel(g, levelMosaicInfo, levelOutputTileInfo, level):
             )
 
             feature_only = g.Resume and os.path.exists(tilename)
-            createPyramidTile(
-                g,
-                levelMosaicInfo,
-                offsetX,
-                offsetY,
-                width,
-                height,
-                tilename,
-                OGRDS,
-                feature_only,
-            )
+            jobs.append((offsetX, offsetY, width, height, tilename, feature_only))
+
+    for _ in runTileJobs(g, levelMosaicInfo, jobs, OGRDS, level):
+        pass
 
     if g.TileIndexName is not None:
         shapeName = getTargetDir(g, level) + g.TileIndexName
@@ -891,6 +1032,140 @@ def buildPyramidLevel(g, levelMosaicInfo, levelOutputTileInfo, level):
     return OGRDS
 
 
+def runTileJobs(g, minfo, jobs, OGRDS, level):
+    """
+    Create the tiles of a level (0 for the base tiles), described by
+    (offsetX, offsetY, width, height, tileName, feature_only) jobs, and add
+    them to the OGRDS tile index, in the order of the jobs.
+
+    With g.Processes > 1, tiles are created by a pool of processes, each one
+    with its own mosaic_info, and thus its own DataSetCache and source
+    datasets. The tile index features are collected by the main process, and
+    inserted in a single transaction when supported.
+
+    Yields after the creation of each tile.
+    """
+    createFunc = createTile if level == 0 else createPyramidTile
+
+    if g.Processes <= 1 or len(jobs) <= 1:
+        for offsetX, offsetY, width, height, tileName, feature_only in jobs:
+            createFunc(
+                g, minfo, offsetX, offsetY, width, height, tileName, OGRDS, feature_only
+            )
+            yield
+        return
+
+    # Trick inspired from https://stackoverflow.com/questions/45720153/python-multiprocessing-error-attributeerror-module-main-has-no-attribute
+    # and https://bugs.python.org/issue42949
+    import __main__
+
+    if not hasattr(__main__, "__spec__"):
+        __main__.__spec__ = None
+    from multiprocessing import Pool
+
+    workerState = (
+        _getPicklableGlobals(g),
+        g.Source_SRS.ExportToWkt() if g.Source_SRS is not None else None,
+        minfo.filename,
+        _getTileIndexFeatures(minfo.ogrTileIndexDS),
+        level,
+    )
+    layer = OGRDS.GetLayer()
+    useTransaction = OGRDS.TestCapability(ogr.ODsCTransactions)
+    if useTransaction:
+        OGRDS.StartTransaction()
+    with Pool(
+        processes=min(g.Processes, len(jobs)),
+        initializer=_initTileWorker,
+        initargs=(workerState,),
+    ) as pool:
+        for features in pool.imap(_createTileJob, jobs):
+            for location, wkt in features:
+                feature = ogr.Feature(layer.GetLayerDefn())
+                feature.SetField(g.TileIndexFieldName, location)
+                feature.SetGeometryDirectly(
+                    ogr.CreateGeometryFromWkt(wkt, layer.GetSpatialRef())
+                )
+                layer.CreateFeature(feature)
+            yield
+    if useTransaction:
+        OGRDS.CommitTransaction()
+
+
+def _getPicklableGlobals(g):
+    """Copy of g without the GDAL objects, which cannot be pickled"""
+    workerGlobals = RetileGlobals()
+    for name in RetileGlobals.__slots__:
+        setattr(workerGlobals, name, getattr(g, name))
+    workerGlobals.Driver = None
+    workerGlobals.MemDriver = None
+    workerGlobals.Source_SRS = None
+    return workerGlobals
+
+
+def _getTileIndexFeatures(OGRDS):
+    """Return the (location, geometry WKT) of the features of a tile index"""
+    layer = OGRDS.GetLayer()
+    layer.ResetReading()
+    features = [
+        (feature.GetField(0), feature.GetGeometryRef().ExportToWkt())
+        for feature in layer
+    ]
+    layer.ResetReading()
+    return features
+
+
+# State of a tile creation worker process
+_worker = None
+
+
+def _initTileWorker(workerState):
+    global _worker
+
+    g, srsWkt, filename, features, level = workerState
+    gdal.UseExceptions()
+    g.Driver = gdal.GetDriverByName(g.Format)
+    if "DCAP_CREATE" not in g.Driver.GetMetadata():
+        g.MemDriver = gdal.GetDriverByName("MEM")
+    if srsWkt is not None:
+        g.Source_SRS = osr.SpatialReference()
+        g.Source_SRS.SetFromUserInput(srsWkt)
+    # directories of the rows are created by the main process
+    g.LastRowIndx = sys.maxsize
+
+    # rebuild the tile index of the source mosaic
+    inputDS = createTileIndex(
+        False, "TileIndex", g.TileIndexFieldName, g.Source_SRS, "Memory"
+    )
+    layer = inputDS.GetLayer()
+    for location, wkt in features:
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetField(g.TileIndexFieldName, location)
+        feature.SetGeometryDirectly(ogr.CreateGeometryFromWkt(wkt))
+        layer.CreateFeature(feature)
+
+    # tile index the created tiles are added to, before being sent to the
+    # main process
+    OGRDS = createTileIndex(
+        False, "TileResult", g.TileIndexFieldName, g.Source_SRS, "Memory"
+    )
+    minfo = mosaic_info(filename, inputDS, g.VrtMosaic, createDataSetCache(g))
+    _worker = (g, minfo, OGRDS, level)
+
+
+def _createTileJob(job):
+    g, minfo, OGRDS, level = _worker
+    offsetX, offsetY, width, height, tileName, feature_only = job
+    createFunc = createTile if level == 0 else createPyramidTile
+    createFunc(g, minfo, offsetX, offsetY, width, height, tileName, OGRDS, feature_only)
+
+    layer = OGRDS.GetLayer()
+    features = _getTileIndexFeatures(OGRDS)
+    for feature in list(layer):
+        layer.DeleteFeature(feature.GetFID())
+    return features
+
+
 def getTileName(g, minfo, ti, xIndex, yIndex, level=-1):
     """
     creates the tile file name
@@ -956,7 +1231,8 @@ def Usage(isError):
     print("        [-csv <fileName> [-csvDelim <delimiter>]]", file=f)
     print("        [-s_srs <srs_def>]  [-pyramidOnly] -levels <numberoflevels>", file=f)
     print("        [-r {near|bilinear|cubic|cubicspline|lanczos}]", file=f)
-    print("        [-useDirForEachRow] [-resume]", file=f)
+    print("        [-useDirForEachRow] [-resume] [-processes <n>] [-vrtMosaic]", file=f)
+    print("        [-cacheSize <n>] [-cacheMemory <MB>]", file=f)
     print("        -targetDir <TileDirectory> <input_file> [<input_file>]...", file=f)
     return 2 if isError else 0
 
@@ -1072,6 +1348,26 @@ def main(args=None, g=None):
             g.UseDirForEachRow = True
         elif arg == "-resume":
             g.Resume = True
+        elif arg == "-cacheSize":
+            i += 1
+            g.CacheSize = int(argv[i])
+            if g.CacheSize < 1:
+                print("Invalid cache size : %d" % g.CacheSize)
+                return 1
+        elif arg == "-cacheMemory":
+            i += 1
+            g.CacheMemory = int(argv[i])
+            if g.CacheMemory < 1:
+                print("Invalid cache memory : %d" % g.CacheMemory)
+                return 1
+        elif arg == "-vrtMosaic":
+            g.VrtMosaic = True
+        elif arg == "-processes":
+            i += 1
+            g.Processes = int(argv[i])
+            if g.Processes < 1:
+                print("Invalid number of processes : %d" % g.Processes)
+                return 1
         elif arg[:1] == "-":
             print("Unrecognized command option: %s" % arg, file=sys.stderr)
             return Usage(isError=True)
@@ -1134,7 +1430,7 @@ def main(args=None, g=None):
     if tileIndexDS is None:
         print("Error building tile index", file=sys.stderr)
         return 1
-    minfo = mosaic_info(g.Names[0], tileIndexDS)
+    minfo = mosaic_info(g.Names[0], tileIndexDS, g.VrtMosaic, createDataSetCache(g))
     ti = tile_info(minfo.xsize, minfo.ysize, g.TileWidth, g.TileHeight, g.Overlap)
 
     if g.Source_SRS is None and minfo.projection:
@@ -1150,6 +1446,8 @@ def main(args=None, g=None):
     if not g.PyramidOnly:
         dsCreatedTileIndex = tileImage(g, minfo, ti)
         tileIndexDS.Close()
+        if g.Verbose:
+            minfo.cache.report()
     else:
         dsCreatedTileIndex = tileIndexDS
 
@@ -1188,6 +1486,10 @@ class RetileGlobals:
         "LastRowIndx",
         "UseDirForEachRow",
         "Resume",
+        "Processes",
+        "VrtMosaic",
+        "CacheSize",
+        "CacheMemory",
     ]
 
     def __init__(self):
@@ -1218,6 +1520,10 @@ class RetileGlobals:
         self.LastRowIndx = -1
         self.UseDirForEachRow = False
         self.Resume = False
+        self.Processes = 1
+        self.VrtMosaic = False
+        self.CacheSize = 8
+        self.CacheMemory = 0
 
 
 if __name__ == "__main__":
@@ -15,9 +15,12 @@
 
 import array
 import filecmp
+import hashlib
+import json
 import math
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from osgeo import gdal, osr
 
@@ -28,11 +31,14 @@ from osgeo_utils.auxiliary.util import enable_gdal_exceptions
 my_print = print
 
 
-def compare_metadata(golden_md, new_md, md_id, options=None):
+def compare_metadata(golden_md, new_md, md_id, options=None, print_func=None):
 
     if golden_md is None and new_md is None:
         return 0
 
+    if print_func is None:
+        print_func = my_print
+
     found_diff = 0
 
     golden_keys = list(golden_md.keys())
@@ -46,29 +52,29 @@ def compare_metadata(golden_md, new_md, md_id, options=None):
             new_keys.remove(key)
 
     if len(golden_keys) != len(new_keys):
-        my_print("Difference in %s metadata key count" % md_id)
-        my_print("  Golden Keys: " + str(golden_keys))
-        my_print("  New Keys: " + str(new_keys))
+        print_func("Difference in %s metadata key count" % md_id)
+        print_func("  Golden Keys: " + str(golden_keys))
+        print_func("  New Keys: " + str(new_keys))
         found_diff += 1
 
     for key in golden_keys:
         if key not in new_keys:
-            my_print('New %s metadata lacks key "%s"' % (md_id, key))
+            print_func('New %s metadata lacks key "%s"' % (md_id, key))
             found_diff += 1
         elif md_id == "RPC" and new_md[key].strip() != golden_md[key].strip():
             # The strip above is because _RPC.TXT files and in-file have a difference
             # in white space that is not otherwise meaningful.
-            my_print('RPC Metadata value difference for key "' + key + '"')
-            my_print('  Golden: "' + golden_md[key] + '"')
-            my_print('  New:    "' + new_md[key] + '"')
+            print_func('RPC Metadata value difference for key "' + key + '"')
+            print_func('  Golden: "' + golden_md[key] + '"')
+            print_func('  New:    "' + new_md[key] + '"')
             found_diff += 1
         elif md_id != "RPC" and new_md[key] != golden_md[key]:
             if key == "NITF_FDT":
                 # this will always have the current date set
                 continue
-            my_print('Metadata value difference for key "' + key + '"')
-            my_print('  Golden: "' + golden_md[key] + '"')
-            my_print('  New:    "' + new_md[key] + '"')
+            print_func('Metadata value difference for key "' + key + '"')
+            print_func('  Golden: "' + golden_md[key] + '"')
+            print_func('  New:    "' + new_md[key] + '"')
             found_diff += 1
 
     return found_diff
@@ -76,7 +82,18 @@ def compare_metadata(golden_md, new_md, md_id, options=None):
 
 #######################################################
 # Review and report on the actual image pixels that differ.
-def compare_image_pixels(golden_band, new_band, id, options=None):
+def compare_image_pixels(
+    golden_band, new_band, id, options=None, windows=None, print_func=None
+):
+    """
+    Report the count of differing pixels and the maximum difference
+    between two bands, optionally restricted to a list of
+    (xoff, yoff, xsize, ysize) windows, other pixels being then assumed
+    identical.
+    """
+
+    if print_func is None:
+        print_func = my_print
 
     diff_count = 0
     max_diff = 0
@@ -93,54 +110,210 @@ def compare_image_pixels(golden_band, new_band, id, options=None):
             diff_fn, golden_band.XSize, golden_band.YSize, 1, gdal.GDT_Float32
         )
 
-    xsize = golden_band.XSize
-    for line in range(golden_band.YSize):
-        golden_line = array.array(
-            "d", golden_band.ReadRaster(0, line, xsize, 1, buf_type=gdal.GDT_Float64)
-        )
-        new_line = array.array(
-            "d", new_band.ReadRaster(0, line, xsize, 1, buf_type=gdal.GDT_Float64)
-        )
-        diff_line = [golden_line[i] - new_line[i] for i in range(xsize)]
-        max_diff_this_line = max([abs(x) for x in diff_line])
-        max_diff = max(max_diff, max_diff_this_line)
-        if max_diff_this_line:
-            diff_count += sum([(1 if x else 0) for x in diff_line])
-        if out_db is not None:
-            out_db.GetRasterBand(1).WriteRaster(
-                0,
-                line,
-                xsize,
-                1,
-                array.array("d", diff_line).tobytes(),
-                buf_type=gdal.GDT_Float64,
+    fail_fast = "FAIL_FAST" in options
+    stopped = False
+
+    try:
+        import numpy as np
+
+        from osgeo import gdal_array  # noqa
+    except ImportError:
+        np = None
+
+    if np is not None:
+        if windows is None:
+            windows = _get_block_windows(golden_band)
+        for xoff, yoff, xsize, ysize in windows:
+            golden_block = golden_band.ReadAsArray(
+                xoff, yoff, xsize, ysize, buf_type=gdal.GDT_Float64
             )
+            new_block = new_band.ReadAsArray(
+                xoff, yoff, xsize, ysize, buf_type=gdal.GDT_Float64
+            )
+            diff_block = golden_block - new_block
+            # fmax ignores NaN differences, like max() did in the line based
+            # comparison, but they are still counted as differing pixels.
+            max_diff_this_block = np.fmax.reduce(np.abs(diff_block), axis=None)
+            if max_diff_this_block > max_diff:
+                max_diff = float(max_diff_this_block)
+            diff_count_this_block = int(np.count_nonzero(diff_block))
+            diff_count += diff_count_this_block
+            if out_db is not None:
+                out_db.GetRasterBand(1).WriteArray(diff_block, xoff, yoff)
+            if fail_fast and diff_count_this_block:
+                stopped = True
+                break
+    else:
+        xsize = golden_band.XSize
+        for line in range(golden_band.YSize):
+            golden_line = array.array(
+                "d",
+                golden_band.ReadRaster(0, line, xsize, 1, buf_type=gdal.GDT_Float64),
+            )
+            new_line = array.array(
+                "d", new_band.ReadRaster(0, line, xsize, 1, buf_type=gdal.GDT_Float64)
+            )
+            diff_line = [golden_line[i] - new_line[i] for i in range(xsize)]
+            max_diff_this_line = max([abs(x) for x in diff_line])
+            max_diff = max(max_diff, max_diff_this_line)
+            if max_diff_this_line:
+                diff_count += sum([(1 if x else 0) for x in diff_line])
+            if out_db is not None:
+                out_db.GetRasterBand(1).WriteRaster(
+                    0,
+                    line,
+                    xsize,
+                    1,
+                    array.array("d", diff_line).tobytes(),
+                    buf_type=gdal.GDT_Float64,
+                )
+            if fail_fast and max_diff_this_line:
+                stopped = True
+                break
 
-    my_print("  Pixels Differing: " + str(diff_count))
-    my_print("  Maximum Pixel Difference: " + str(max_diff))
+    print_func("  Pixels Differing: " + str(diff_count))
+    print_func("  Maximum Pixel Difference: " + str(max_diff))
+    if stopped:
+        print_func("  Comparison stopped at the first differing block.")
     if out_db is not None:
-        my_print("  Wrote Diffs to: %s" % diff_fn)
+        print_func("  Wrote Diffs to: %s" % diff_fn)
+
+
+def _get_block_windows(band, min_pixels=1024 * 1024):
+    """
+    Yield the (xoff, yoff, xsize, ysize) windows of the natural blocks of a
+    band. Blocks spanning the whole width of the band (strips) are grouped
+    so that each window has at least min_pixels pixels.
+    """
+    blockxsize, blockysize = band.GetBlockSize()
+    if blockxsize >= band.XSize:
+        blockxsize = band.XSize
+        blockysize *= max(1, min_pixels // (band.XSize * blockysize))
+    for yoff in range(0, band.YSize, blockysize):
+        ysize = min(blockysize, band.YSize - yoff)
+        for xoff in range(0, band.XSize, blockxsize):
+            xsize = min(blockxsize, band.XSize - xoff)
+            yield xoff, yoff, xsize, ysize
+
+
+def _compute_block_hashes(band, windows):
+    """Return the hexadecimal digests of the raw content of windows of a band"""
+    return [
+        hashlib.blake2b(
+            band.ReadRaster(xoff, yoff, xsize, ysize), digest_size=16
+        ).hexdigest()
+        for xoff, yoff, xsize, ysize in windows
+    ]
+
+
+def _compute_root_hash(block_hashes):
+    """Return the root of the hash tree whose leaves are block_hashes"""
+    level = [bytes.fromhex(h) for h in block_hashes]
+    while len(level) > 1:
+        level = [
+            hashlib.blake2b(b"".join(level[i : i + 2]), digest_size=16).digest()
+            for i in range(0, len(level), 2)
+        ]
+    return level[0].hex() if level else ""
+
+
+def _compare_band_hashes(golden_band, new_band, id, hash_tree):
+    """
+    Compare the blocks of two bands by their hashes, the ones of the golden
+    band being taken from, or added to, the hash_tree dictionary.
+
+    Returns the list of (xoff, yoff, xsize, ysize) windows that differ.
+    """
+    windows = list(_get_block_windows(golden_band))
+    golden = hash_tree.get(id)
+    if golden is None or len(golden["blocks"]) != len(windows):
+        blocks = _compute_block_hashes(golden_band, windows)
+        golden = {"root": _compute_root_hash(blocks), "blocks": blocks}
+        hash_tree[id] = golden
+
+    new_blocks = _compute_block_hashes(new_band, windows)
+    if _compute_root_hash(new_blocks) == golden["root"]:
+        return []
+    return [
+        window
+        for window, golden_hash, new_hash in zip(windows, golden["blocks"], new_blocks)
+        if golden_hash != new_hash
+    ]
+
+
+def _get_hash_tree_filename(golden_db):
+    return golden_db.GetDescription() + ".hashtree.json"
+
+
+def _get_hash_tree_key(golden_db):
+    """Identify the golden file, to detect outdated cached hash trees"""
+    stat = gdal.VSIStatL(golden_db.GetDescription())
+    if stat is None:
+        return None
+    return {"size": stat.size, "mtime": stat.mtime}
+
+
+def _load_hash_tree(golden_db):
+    """Load the hash tree cached next to the golden file, if still valid"""
+    key = _get_hash_tree_key(golden_db)
+    if key is None:
+        return {}
+    filename = _get_hash_tree_filename(golden_db)
+    with gdal.ExceptionMgr(useExceptions=False), gdal.quiet_errors():
+        f = gdal.VSIFOpenL(filename, "rb")
+    if f is None:
+        return {}
+    try:
+        stat = gdal.VSIStatL(filename)
+        content = json.loads(gdal.VSIFReadL(1, stat.size, f))
+    except ValueError:
+        return {}
+    finally:
+        gdal.VSIFCloseL(f)
+    if content.get("golden") != key:
+        return {}
+    return content["bands"]
+
+
+def _save_hash_tree(golden_db, hash_tree):
+    key = _get_hash_tree_key(golden_db)
+    if key is None:
+        return
+    filename = _get_hash_tree_filename(golden_db)
+    with gdal.ExceptionMgr(useExceptions=False), gdal.quiet_errors():
+        f = gdal.VSIFOpenL(filename, "wb")
+    if f is None:
+        my_print("Cannot write hash tree cache %s" % filename)
+        return
+    content = json.dumps({"golden": key, "bands": hash_tree}).encode("utf-8")
+    gdal.VSIFWriteL(content, 1, len(content), f)
+    gdal.VSIFCloseL(f)
 
 
 #######################################################
 
 
-def compare_band(golden_band, new_band, id, options=None):
+def compare_band(
+    golden_band, new_band, id, options=None, hash_tree=None, print_func=None
+):
     found_diff = 0
 
+    if print_func is None:
+        print_func = my_print
+
     options = [] if options is None else options
 
     if golden_band.XSize != new_band.XSize or golden_band.YSize != new_band.YSize:
-        my_print(
+        print_func(
             "Band size mismatch (band=%s golden=[%d,%d], new=[%d,%d])"
             % (id, golden_band.XSize, golden_band.YSize, new_band.XSize, new_band.YSize)
         )
         found_diff += 1
 
     if golden_band.DataType != new_band.DataType:
-        my_print("Band %s pixel types differ." % id)
-        my_print("  Golden: " + gdal.GetDataTypeName(golden_band.DataType))
-        my_print("  New:    " + gdal.GetDataTypeName(new_band.DataType))
+        print_func("Band %s pixel types differ." % id)
+        print_func("  Golden: " + gdal.GetDataTypeName(golden_band.DataType))
+        print_func("  New:    " + gdal.GetDataTypeName(new_band.DataType))
         found_diff += 1
 
     golden_nodata = golden_band.GetNoDataValue()
@@ -161,49 +334,71 @@ def compare_band(golden_band, new_band, id, options=None):
     ):
         pass
     elif golden_nodata != new_nodata:
-        my_print("Band %s nodata values differ." % id)
-        my_print("  Golden: " + str(golden_nodata))
-        my_print("  New:    " + str(new_nodata))
+        print_func("Band %s nodata values differ." % id)
+        print_func("  Golden: " + str(golden_nodata))
+        print_func("  New:    " + str(new_nodata))
         found_diff += 1
 
     if golden_band.GetColorInterpretation() != new_band.GetColorInterpretation():
-        my_print("Band %s color interpretation values differ." % id)
-        my_print(
+        print_func("Band %s color interpretation values differ." % id)
+        print_func(
             "  Golden: "
             + gdal.GetColorInterpretationName(golden_band.GetColorInterpretation())
         )
-        my_print(
+        print_func(
             "  New:    "
             + gdal.GetColorInterpretationName(new_band.GetColorInterpretation())
         )
         found_diff += 1
 
-    golden_band_checksum = golden_band.Checksum()
-    new_band_checksum = new_band.Checksum()
-    if golden_band_checksum != new_band_checksum:
-        my_print("Band %s checksum difference:" % id)
-        my_print("  Golden: " + str(golden_band_checksum))
-        my_print("  New:    " + str(new_band_checksum))
-        if found_diff == 0:
-            compare_image_pixels(golden_band, new_band, id, options)
-        found_diff += 1
+    if hash_tree is not None:
+        # Blocks are compared by their hashes, so that only the differing ones
+        # are decoded again. A size or type difference is already reported.
+        if (
+            golden_band.XSize == new_band.XSize
+            and golden_band.YSize == new_band.YSize
+            and golden_band.DataType == new_band.DataType
+        ):
+            windows = _compare_band_hashes(golden_band, new_band, id, hash_tree)
+            if windows:
+                print_func("Band %s block hash difference:" % id)
+                print_func("  Blocks Differing: " + str(len(windows)))
+                if found_diff == 0:
+                    compare_image_pixels(
+                        golden_band, new_band, id, options, windows, print_func
+                    )
+                found_diff += 1
     else:
-        # check a bit deeper in case of Float data type for which the Checksum() function is not reliable
-        if golden_band.DataType in (gdal.GDT_Float32, gdal.GDT_Float64):
-            if golden_band.ComputeRasterMinMax(
-                can_return_none=True
-            ) != new_band.ComputeRasterMinMax(can_return_none=True):
-                my_print("Band %s statistics difference:" % 1)
-                my_print("  Golden: " + str(golden_band.ComputeBandStats()))
-                my_print("  New:    " + str(new_band.ComputeBandStats()))
-                compare_image_pixels(golden_band, new_band, id, {})
+        golden_band_checksum = golden_band.Checksum()
+        new_band_checksum = new_band.Checksum()
+        if golden_band_checksum != new_band_checksum:
+            print_func("Band %s checksum difference:" % id)
+            print_func("  Golden: " + str(golden_band_checksum))
+            print_func("  New:    " + str(new_band_checksum))
+            if found_diff == 0:
+                compare_image_pixels(
+                    golden_band, new_band, id, options, print_func=print_func
+                )
+            found_diff += 1
+        else:
+            # check a bit deeper in case of Float data type for which the Checksum() function is not reliable
+            if golden_band.DataType in (gdal.GDT_Float32, gdal.GDT_Float64):
+                if golden_band.ComputeRasterMinMax(
+                    can_return_none=True
+                ) != new_band.ComputeRasterMinMax(can_return_none=True):
+                    print_func("Band %s statistics difference:" % 1)
+                    print_func("  Golden: " + str(golden_band.ComputeBandStats()))
+                    print_func("  New:    " + str(new_band.ComputeBandStats()))
+                    compare_image_pixels(
+                        golden_band, new_band, id, {}, print_func=print_func
+                    )
 
     # Check overviews
     if "SKIP_OVERVIEWS" not in options:
         if golden_band.GetOverviewCount() != new_band.GetOverviewCount():
-            my_print("Band %s overview count difference:" % id)
-            my_print("  Golden: " + str(golden_band.GetOverviewCount()))
-            my_print("  New:    " + str(new_band.GetOverviewCount()))
+            print_func("Band %s overview count difference:" % id)
+            print_func("  Golden: " + str(golden_band.GetOverviewCount()))
+            print_func("  New:    " + str(new_band.GetOverviewCount()))
             found_diff += 1
         else:
             for i in range(golden_band.GetOverviewCount()):
@@ -212,13 +407,15 @@ def compare_band(golden_band, new_band, id, options=None):
                     new_band.GetOverview(i),
                     id + " overview " + str(i),
                     options,
+                    hash_tree,
+                    print_func,
                 )
 
     # Mask band
     if golden_band.GetMaskFlags() != new_band.GetMaskFlags():
-        my_print("Band %s mask flags difference:" % id)
-        my_print("  Golden: " + str(golden_band.GetMaskFlags()))
-        my_print("  New:    " + str(new_band.GetMaskFlags()))
+        print_func("Band %s mask flags difference:" % id)
+        print_func("  Golden: " + str(golden_band.GetMaskFlags()))
+        print_func("  New:    " + str(new_band.GetMaskFlags()))
         found_diff += 1
     elif golden_band.GetMaskFlags() == gdal.GMF_PER_DATASET:
         # Check mask band if it's GMF_PER_DATASET
@@ -227,12 +424,18 @@ def compare_band(golden_band, new_band, id, options=None):
             new_band.GetMaskBand(),
             id + " mask band",
             options,
+            hash_tree,
+            print_func,
         )
 
     # Metadata
     if "SKIP_METADATA" not in options:
         found_diff += compare_metadata(
-            golden_band.GetMetadata(), new_band.GetMetadata(), "Band " + id, options
+            golden_band.GetMetadata(),
+            new_band.GetMetadata(),
+            "Band " + id,
+            options,
+            print_func,
         )
 
     # Band Description - currently this is opt in since we have not
@@ -240,9 +443,9 @@ def compare_band(golden_band, new_band, id, options=None):
     # default at some point.
     if "CHECK_BAND_DESC" in options:
         if golden_band.GetDescription() != new_band.GetDescription():
-            my_print("Band %s descriptions difference:" % id)
-            my_print("  Golden: " + str(golden_band.GetDescription()))
-            my_print("  New:    " + str(new_band.GetDescription()))
+            print_func("Band %s descriptions difference:" % id)
+            print_func("  Golden: " + str(golden_band.GetDescription()))
+            print_func("  New:    " + str(new_band.GetDescription()))
             found_diff += 1
 
     # TODO: Color Table, gain/bias, units, blocksize, mask, min/max
@@ -356,13 +559,100 @@ def compare_db(golden_db, new_db, options=None):
 
     # If so-far-so-good, then compare pixels
     if found_diff == 0:
-        for i in range(golden_db.RasterCount):
-            found_diff += compare_band(
-                golden_db.GetRasterBand(i + 1),
-                new_db.GetRasterBand(i + 1),
-                str(i + 1),
-                options,
+        hash_tree = None
+        use_cache = "HASH_TREE_CACHE" in options
+        if use_cache:
+            hash_tree = _load_hash_tree(golden_db)
+            cached_hash_tree = dict(hash_tree)
+        elif "HASH_TREE" in options:
+            hash_tree = {}
+
+        num_threads = 1
+        for opt in options:
+            if opt.startswith("NUM_THREADS="):
+                num_threads = opt[len("NUM_THREADS=") :]
+                if num_threads.upper() == "ALL_CPUS":
+                    num_threads = gdal.GetNumCPUs()
+                else:
+                    num_threads = int(num_threads)
+        if num_threads > 1 and golden_db.RasterCount > 1:
+            found_diff += _compare_bands_parallel(
+                golden_db, new_db, options, num_threads, hash_tree
             )
+        else:
+            found_diff += _compare_bands(golden_db, new_db, options, hash_tree)
+
+        if use_cache and hash_tree != cached_hash_tree:
+            _save_hash_tree(golden_db, hash_tree)
+
+    return found_diff
+
+
+def _compare_bands(golden_db, new_db, options, hash_tree):
+    found_diff = 0
+    for i in range(golden_db.RasterCount):
+        found_diff += compare_band(
+            golden_db.GetRasterBand(i + 1),
+            new_db.GetRasterBand(i + 1),
+            str(i + 1),
+            options,
+            hash_tree,
+        )
+        if found_diff and "FAIL_FAST" in options:
+            break
+    return found_diff
+
+
+def _open_again(ds):
+    """Open a new handle of a dataset, or return None if it is not possible"""
+    with gdal.ExceptionMgr(useExceptions=False), gdal.quiet_errors():
+        return gdal.Open(ds.GetDescription())
+
+
+def _compare_bands_parallel(golden_db, new_db, options, num_threads, hash_tree):
+    """
+    Compare the bands of two datasets with a pool of threads, each thread
+    using its own handles on the datasets. Messages are reported in band
+    order, as if the bands had been compared sequentially.
+    """
+
+    if _open_again(golden_db) is None or _open_again(new_db) is None:
+        # e.g. datasets that only exist in memory: fallback to sequential
+        return _compare_bands(golden_db, new_db, options, hash_tree)
+
+    def compare_band_in_thread(i):
+        lines = []
+
+        def print_func(*args, **kwargs):
+            lines.append((args, kwargs))
+
+        thread_golden_db = _open_again(golden_db)
+        thread_new_db = _open_again(new_db)
+        band_diff = compare_band(
+            thread_golden_db.GetRasterBand(i + 1),
+            thread_new_db.GetRasterBand(i + 1),
+            str(i + 1),
+            options,
+            hash_tree,
+            print_func,
+        )
+        return band_diff, lines
+
+    found_diff = 0
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = [
+            executor.submit(compare_band_in_thread, i)
+            for i in range(golden_db.RasterCount)
+        ]
+        for future in futures:
+            band_diff, lines = future.result()
+            for args, kwargs in lines:
+                my_print(*args, **kwargs)
+            found_diff += band_diff
+            if found_diff and "FAIL_FAST" in options:
+                for future in futures:
+                    future.cancel()
+                break
 
     return found_diff
 
@@ -479,6 +769,8 @@ def Usage(isError=True):
     print("                      [-dumpdiffs] [-skip_binary] [-skip_overviews]", file=f)
     print("                      [-skip_geolocation] [-skip_geotransform]", file=f)
     print("                      [-skip_metadata] [-skip_rpc] [-skip_srs]", file=f)
+    print("                      [-fail_fast] [-num_threads <n>|ALL_CPUS]", file=f)
+    print("                      [-hash_tree] [-hash_tree_cache]", file=f)
     print("                      [-sds] <golden_file> <new_file>", file=f)
     return 2 if isError else 0
 
@@ -536,6 +828,19 @@ def main(argv=sys.argv):
         elif argv[i] == "-skip_srs":
             options.append("SKIP_SRS")
 
+        elif argv[i] == "-fail_fast":
+            options.append("FAIL_FAST")
+
+        elif argv[i] == "-hash_tree":
+            options.append("HASH_TREE")
+
+        elif argv[i] == "-hash_tree_cache":
+            options.append("HASH_TREE_CACHE")
+
+        elif argv[i] == "-num_threads" and i + 1 < len(argv):
+            i = i + 1
+            options.append("NUM_THREADS=" + argv[i])
+
         elif golden_file is None:
             golden_file = argv[i]
 
@@ -175,11 +175,162 @@ def gdallocationinfo(
     else:
         lines_q = y * line_fact
 
-    buf_xsize = buf_ysize = 1
     buf_type, typecode = GDALTypeCodeAndNumericTypeCodeFromDataSet(ds)
-    buf_obj = np.empty([buf_ysize, buf_xsize], dtype=typecode)
+    sample_by_blocks(
+        ds,
+        get_band_nums(ds, band_nums),
+        bands,
+        pixels_q,
+        lines_q,
+        results,
+        buf_type,
+        resample_alg,
+    )
+
+    is_scaled, scales, offsets = get_scales_and_offsets(bands)
+    if is_scaled:
+        for bnd_idx, (scale, offset) in enumerate(zip(scales, offsets)):
+            results[bnd_idx] = results[bnd_idx] * scale + offset
+
+    return x, y, results
+
 
-    for idx, (pixel, line) in enumerate(zip(pixels_q, lines_q)):
+def sample_by_blocks(
+    ds: gdal.Dataset,
+    band_nums: Sequence[int],
+    bands: Sequence[gdal.Band],
+    pixels: np.ndarray,
+    lines: np.ndarray,
+    results: np.ndarray,
+    buf_type: int,
+    resample_alg=gdalconst.GRIORA_NearestNeighbour,
+    max_window_size: int = 512,
+):
+    """
+    Samples the bands at the given pixel/line locations, and stores the values
+    into results (of shape (len(bands), len(pixels))), in the order of the points.
+    The points are grouped by the block they fall in (blocks larger than
+    max_window_size in a dimension being split), and for each group the
+    bounding box of its points is read only once for all the bands.
+    Points outside of the bands extent are left untouched in results.
+    This is done for nearest neighbour, and for bilinear resampling when the
+    bands have no nodata value nor mask. Otherwise, the points are sampled
+    with sample_by_raster_io().
+    """
+    bilinear = resample_alg == gdalconst.GRIORA_Bilinear
+    if resample_alg != gdalconst.GRIORA_NearestNeighbour and (
+        not bilinear
+        # let GDAL exclude the invalid pixels from the interpolation
+        or any(band.GetMaskFlags() != gdal.GMF_ALL_VALID for band in bands)
+    ):
+        return sample_by_raster_io(
+            bands, pixels, lines, results, buf_type, resample_alg
+        )
+
+    xsize, ysize = bands[0].XSize, bands[0].YSize
+    block_xsize, block_ysize = bands[0].GetBlockSize()
+    # do not read a whole image or a huge strip for a few points
+    block_xsize = min(block_xsize, max_window_size)
+    block_ysize = min(block_ysize, max_window_size)
+    # overview bands can not be read with a single dataset read
+    is_ds_read = xsize == ds.RasterXSize and ysize == ds.RasterYSize
+    np_dtype = results.dtype
+
+    with np.errstate(invalid="ignore"):
+        inside = (pixels >= 0) & (pixels < xsize) & (lines >= 0) & (lines < ysize)
+    point_idx = np.flatnonzero(inside)
+    if len(point_idx) == 0:
+        return
+
+    if bilinear:
+        # pixel centers are at half-integer coordinates; at the edges of the
+        # raster the nearest edge pixel is used for the missing neighbours
+        u = pixels[point_idx] - 0.5
+        v = lines[point_idx] - 0.5
+        col = np.floor(u)
+        row = np.floor(v)
+        x_frac = u - col
+        y_frac = v - row
+        col = col.astype(np.int64)
+        row = row.astype(np.int64)
+        col0, col1 = np.clip(col, 0, xsize - 1), np.clip(col + 1, 0, xsize - 1)
+        row0, row1 = np.clip(row, 0, ysize - 1), np.clip(row + 1, 0, ysize - 1)
+    else:
+        col0 = np.floor(pixels[point_idx]).astype(np.int64)
+        row0 = np.floor(lines[point_idx]).astype(np.int64)
+
+    # group the points by the block of their (upper left) source pixel
+    block_x = col0 // block_xsize
+    block_y = row0 // block_ysize
+    block_key = block_y * ((xsize + block_xsize - 1) // block_xsize) + block_x
+    order = np.argsort(block_key, kind="stable")
+    sorted_key = block_key[order]
+    starts = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+    ends = np.r_[starts[1:], len(order)]
+
+    for start, end in zip(starts, ends):
+        sel = order[start:end]
+        # bounding box of the source pixels of the points: for bilinear, it
+        # also includes the next column and row
+        xoff = int(col0[sel].min())
+        yoff = int(row0[sel].min())
+        win_xsize = int((col1 if bilinear else col0)[sel].max()) + 1 - xoff
+        win_ysize = int((row1 if bilinear else row0)[sel].max()) + 1 - yoff
+        if is_ds_read:
+            buf = ds.ReadRaster(
+                xoff,
+                yoff,
+                win_xsize,
+                win_ysize,
+                buf_type=buf_type,
+                band_list=band_nums,
+            )
+        else:
+            buf = b"".join(
+                band.ReadRaster(xoff, yoff, win_xsize, win_ysize, buf_type=buf_type)
+                for band in bands
+            )
+        data = np.frombuffer(buf, dtype=np_dtype).reshape(
+            len(bands), win_ysize, win_xsize
+        )
+
+        c0 = col0[sel] - xoff
+        r0 = row0[sel] - yoff
+        if bilinear:
+            c1 = col1[sel] - xoff
+            r1 = row1[sel] - yoff
+            fx = x_frac[sel]
+            fy = y_frac[sel]
+            values = (
+                data[:, r0, c0] * ((1 - fx) * (1 - fy))
+                + data[:, r0, c1] * (fx * (1 - fy))
+                + data[:, r1, c0] * ((1 - fx) * fy)
+                + data[:, r1, c1] * (fx * fy)
+            )
+            if np.issubdtype(np_dtype, np.integer):
+                values = np.floor(values + 0.5)
+            results[:, point_idx[sel]] = values
+        else:
+            results[:, point_idx[sel]] = data[:, r0, c0]
+
+
+def sample_by_raster_io(
+    bands: Sequence[gdal.Band],
+    pixels: np.ndarray,
+    lines: np.ndarray,
+    results: np.ndarray,
+    buf_type: int,
+    resample_alg=gdalconst.GRIORA_NearestNeighbour,
+):
+    """
+    Samples the bands at the given pixel/line locations with one resampled
+    RasterIO per point and band, and stores the values into results.
+    Any resampling algorithm is supported.
+    Values of points that cannot be read are left untouched in results.
+    """
+    buf_obj = np.empty([1, 1], dtype=results.dtype)
+
+    for idx, (pixel, line) in enumerate(zip(pixels, lines)):
         for bnd_idx, band in enumerate(bands):
             if (
                 BandRasterIONumPy(
@@ -199,13 +350,6 @@ def gdallocationinfo(
             ):
                 results[bnd_idx][idx] = buf_obj[0][0]
 
-    is_scaled, scales, offsets = get_scales_and_offsets(bands)
-    if is_scaled:
-        for bnd_idx, (scale, offset) in enumerate(zip(scales, offsets)):
-            results[bnd_idx] = results[bnd_idx] * scale + offset
-
-    return x, y, results
-
 
 def gdallocationinfo_util(
     filename_or_ds: PathOrDS,
@@ -17,17 +17,58 @@
    :since: GDAL 3.11
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import PurePath
 
 from fsspec.registry import register_implementation
-from fsspec.spec import AbstractFileSystem
+from fsspec.spec import AbstractBufferedFile, AbstractFileSystem
 from fsspec.utils import stringify_path
 
 from osgeo import gdal
 
 
+class VSIBufferedFile(AbstractBufferedFile):
+    """Read-only file object over a GDAL Virtual File System file, using the
+    fsspec caching strategies (readahead, blockcache, ...).
+
+    :since: GDAL 3.13
+    """
+
+    def __init__(self, fs, path, mode="rb", **kwargs):
+        # Must be set before calling the base constructor, as some caches
+        # (e.g. "all") fetch data from it.
+        self._vsi_file = None
+        super().__init__(fs, path, mode, **kwargs)
+
+    def _fetch_range(self, start, end):
+        """Implements AbstractBufferedFile._fetch_range()"""
+
+        if self._vsi_file is None:
+            self._vsi_file = gdal.VSIFile(self.fs._get_gdal_path(self.path), "rb")
+        self._vsi_file.seek(start)
+        return self._vsi_file.read(end - start)
+
+    def close(self):
+        """Implements AbstractBufferedFile.close()"""
+
+        super().close()
+        if self._vsi_file is not None:
+            self._vsi_file.close()
+            self._vsi_file = None
+
+
 class VSIFileSystem(AbstractFileSystem):
-    """Implementation of AbstractFileSystem for a GDAL Virtual File System"""
+    """Implementation of AbstractFileSystem for a GDAL Virtual File System
+
+    Directory listings are only cached if the filesystem is created with
+    use_listings_cache=True (since GDAL 3.13), since files may also be
+    modified directly through the GDAL API.
+    """
+
+    def __init__(self, *args, use_listings_cache=False, **storage_options):
+        super().__init__(
+            *args, use_listings_cache=use_listings_cache, **storage_options
+        )
 
     @classmethod
     def _get_gdal_path(cls, path):
@@ -56,14 +97,146 @@ class VSIFileSystem(AbstractFileSystem):
         cache_options=None,
         **kwargs,
     ):
-        """Implements AbstractFileSystem._open()"""
+        """Implements AbstractFileSystem._open()
+
+        In read mode, if block_size, cache_type or cache_options are
+        specified, a VSIBufferedFile using the requested fsspec cache is
+        returned. Otherwise a gdal.VSIFile is returned.
+        """
+
+        cache_type = kwargs.pop("cache_type", None)
+        if mode == "rb" and (block_size or cache_type or cache_options):
+            return VSIBufferedFile(
+                self,
+                path,
+                mode,
+                block_size=block_size or "default",
+                autocommit=autocommit,
+                cache_type=cache_type or "readahead",
+                cache_options=cache_options,
+                **kwargs,
+            )
+
+        if mode != "rb":
+            self.invalidate_cache(path)
+        return gdal.VSIFile(self._get_gdal_path(path), mode)
+
+    def _read_ranges(self, path, ranges):
+        """Read a list of (start, end) ranges of a file, with fsspec semantics
+        (None or negative values), with a single VSIFReadMultiRangeL() call.
+        """
+
+        gdal_path = self._get_gdal_path(path)
+        with gdal.ExceptionMgr(useExceptions=False):
+            f = gdal.VSIFOpenL(gdal_path, "rb")
+        if f is None:
+            raise FileNotFoundError(path)
+        try:
+            gdal.VSIFSeekL(f, 0, 2)
+            size = gdal.VSIFTellL(f)
+
+            offsets_and_sizes = []
+            for start, end in ranges:
+                if start is None:
+                    start = 0
+                elif start < 0:
+                    start = max(0, size + start)
+                if end is None:
+                    end = size
+                elif end < 0:
+                    end = size + end
+                start = min(start, size)
+                end = min(end, size)
+                offsets_and_sizes.append((start, max(0, end - start)))
+
+            with gdal.ExceptionMgr(useExceptions=False):
+                data = gdal.VSIFReadMultiRangeL(offsets_and_sizes, f)
+            if data is None:
+                raise IOError(f"Cannot read ranges of {path}")
+            return [bytes(x) for x in data]
+        finally:
+            gdal.VSIFCloseL(f)
+
+    def cat_file(self, path, start=None, end=None, **kwargs):
+        """Implements AbstractFileSystem.cat_file()"""
+
+        return self._read_ranges(path, [(start, end)])[0]
+
+    def cat_ranges(
+        self, paths, starts, ends, max_gap=None, on_error="return", **kwargs
+    ):
+        """Implements AbstractFileSystem.cat_ranges()
 
-        path = self._get_gdal_path(path)
-        return gdal.VSIFile(path, mode)
+        The ranges of each file are read with a single VSIFReadMultiRangeL()
+        call, which /vsicurl/ and derived file systems can merge and issue
+        in parallel, and different files are read in parallel.
+        """
+
+        if max_gap is not None:
+            raise NotImplementedError
+        if not isinstance(paths, list):
+            raise TypeError
+        if not isinstance(starts, list):
+            starts = [starts] * len(paths)
+        if not isinstance(ends, list):
+            ends = [ends] * len(paths)
+        if len(starts) != len(paths) or len(ends) != len(paths):
+            raise ValueError
+
+        ranges_per_path = {}
+        for idx, (path, start, end) in enumerate(zip(paths, starts, ends)):
+            ranges_per_path.setdefault(path, []).append((idx, start, end))
+
+        out = [None] * len(paths)
+
+        def read_path_ranges(path, ranges):
+            try:
+                data = self._read_ranges(
+                    path, [(start, end) for _, start, end in ranges]
+                )
+            except Exception as e:
+                if on_error == "raise":
+                    raise
+                data = [e] * len(ranges)
+            for (idx, _, _), x in zip(ranges, data):
+                out[idx] = x
+
+        if len(ranges_per_path) == 1:
+            for path, ranges in ranges_per_path.items():
+                read_path_ranges(path, ranges)
+        elif ranges_per_path:
+            max_workers = kwargs.get("max_workers") or min(
+                len(ranges_per_path), max(gdal.GetNumCPUs(), 4)
+            )
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(read_path_ranges, path, ranges)
+                    for path, ranges in ranges_per_path.items()
+                ]
+                for future in futures:
+                    future.result()
+        return out
+
+    def invalidate_cache(self, path=None):
+        """Implements AbstractFileSystem.invalidate_cache()"""
+
+        if path is None:
+            self.dircache.clear()
+        else:
+            path = self._strip_protocol(path)
+            self.dircache.pop(path, None)
+            self.dircache.pop(self._parent(path), None)
 
     def info(self, path, **kwargs):
         """Implements AbstractFileSystem.info()"""
 
+        if self.dircache.use_listings_cache:
+            # Use the listing of the parent directory if it has been cached
+            fs_path = self._strip_protocol(path)
+            for entry in self.dircache.get(self._parent(fs_path), []):
+                if entry["name"] == fs_path and entry["type"] is not None:
+                    return dict(entry)
+
         gdal_path = self._get_gdal_path(path)
         stat = gdal.VSIStatL(gdal_path)
         if stat is None:
@@ -96,19 +269,14 @@ class VSIFileSystem(AbstractFileSystem):
 
         return datetime.datetime.fromtimestamp(stat.mtime)
 
-    def ls(self, path, detail=True, **kwargs):
-        """Implements AbstractFileSystem.ls()"""
+    @staticmethod
+    def _get_dir_entries(fs_path, directory):
+        """Return the entries of a directory opened with gdal.OpenDir(),
+        as fsspec details dictionaries, using the stats returned with the
+        listing instead of a VSIStatL() per entry.
+        """
 
-        fs_path = self._strip_protocol(path)
-        gdal_path = self._get_gdal_path(path)
         ret = []
-        directory = gdal.OpenDir(gdal_path)
-        if directory is None:
-            stat = gdal.VSIStatL(gdal_path)
-            if stat is None:
-                raise FileNotFoundError(path)
-            return [fs_path]
-
         try:
             while True:
                 entry = gdal.GetNextDirEntry(directory)
@@ -134,6 +302,60 @@ class VSIFileSystem(AbstractFileSystem):
             gdal.CloseDir(directory)
         return ret
 
+    def ls(self, path, detail=True, **kwargs):
+        """Implements AbstractFileSystem.ls()"""
+
+        fs_path = self._strip_protocol(path)
+        ret = None
+        if not kwargs.get("refresh", False):
+            ret = self.dircache.get(fs_path)
+        if ret is None:
+            gdal_path = self._get_gdal_path(path)
+            directory = gdal.OpenDir(gdal_path)
+            if directory is None:
+                stat = gdal.VSIStatL(gdal_path)
+                if stat is None:
+                    raise FileNotFoundError(path)
+                return [fs_path]
+
+            ret = self._get_dir_entries(fs_path, directory)
+            self.dircache[fs_path] = ret
+
+        if not detail:
+            return [entry["name"] for entry in ret]
+        return [dict(entry) for entry in ret]
+
+    def find(self, path, maxdepth=None, withdirs=False, detail=False, **kwargs):
+        """Implements AbstractFileSystem.find(), with a single recursive
+        listing of the directory, instead of one listing per sub-directory.
+        """
+
+        if maxdepth is not None and maxdepth < 1:
+            raise ValueError("maxdepth must be at least 1")
+
+        fs_path = self._strip_protocol(path)
+        gdal_path = self._get_gdal_path(path)
+        out = {}
+        directory = gdal.OpenDir(gdal_path, -1 if maxdepth is None else maxdepth - 1)
+        if directory is None:
+            try:
+                info = self.info(path)
+            except FileNotFoundError:
+                info = None
+            if info is not None and info["type"] == "file":
+                out[fs_path] = info
+        else:
+            if withdirs and fs_path:
+                out[fs_path] = self.info(path)
+            for entry in self._get_dir_entries(fs_path, directory):
+                if entry["type"] != "directory" or withdirs:
+                    out[entry["name"]] = entry
+
+        names = sorted(out)
+        if detail:
+            return {name: out[name] for name in names}
+        return names
+
     def mkdir(self, path, create_parents=True, **kwargs):
         """Implements AbstractFileSystem.mkdir()"""
 
@@ -147,6 +369,7 @@ class VSIFileSystem(AbstractFileSystem):
         gdal_path = self._get_gdal_path(path)
         if gdal.VSIStatL(gdal_path):
             raise FileExistsError(path)
+        self.invalidate_cache(path)
         if create_parents:
             ret = gdal.MkdirRecursive(gdal_path, 0o755)
         else:
@@ -168,6 +391,7 @@ class VSIFileSystem(AbstractFileSystem):
     def _rm(self, path):
         """Implements AbstractFileSystem._rm()"""
 
+        self.invalidate_cache(path)
         gdal_path = self._get_gdal_path(path)
         ret = -1
         try:
@@ -182,6 +406,7 @@ class VSIFileSystem(AbstractFileSystem):
     def rmdir(self, path):
         """Implements AbstractFileSystem.rmdir()"""
 
+        self.invalidate_cache(path)
         gdal_path = self._get_gdal_path(path)
         ret = -1
         try:
@@ -196,6 +421,8 @@ class VSIFileSystem(AbstractFileSystem):
     def mv(self, path1, path2, recursive=False, maxdepth=None, **kwargs):
         """Implements AbstractFileSystem.mv()"""
 
+        self.invalidate_cache(path1)
+        self.invalidate_cache(path2)
         old_path = self._get_gdal_path(path1)
         new_path = self._get_gdal_path(path2)
         try:
@@ -213,6 +440,7 @@ class VSIFileSystem(AbstractFileSystem):
     ):
         """Implements AbstractFileSystem.copy()"""
 
+        self.invalidate_cache(path2)
         old_path = self._get_gdal_path(path1)
         new_path = self._get_gdal_path(path2)
         try: